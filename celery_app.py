@@ -1,6 +1,7 @@
 import os
 from celery import Celery
 from dotenv import load_dotenv
+from mt5_pool import pool_enabled, pool_size
 
 load_dotenv()
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -12,5 +13,27 @@ celery_app.conf.update(
     result_serializer='json',
     accept_content=['json'],
     timezone='UTC',
-    include=['tasks'] 
-)
\ No newline at end of file
+    include=['tasks'],
+    task_default_queue='mt5',
+    # Each sync stage has its own queue so slow DynamoDB writes and OpenAI
+    # calls never hold an MT5 terminal: run MT5 workers with -Q mt5 (plus any
+    # affinity queues) and separate workers with -Q persist,atlas.
+    task_routes={
+        'tasks.fetch_account_data': {'queue': 'mt5'},
+        'tasks.persist_account_data': {'queue': 'persist'},
+        'tasks.refresh_atlas_insights': {'queue': 'atlas'},
+        'tasks.sync_pipeline_failed': {'queue': 'persist'},
+    },
+)
+
+MT5_QUEUE = 'mt5'
+PERSIST_QUEUE = 'persist'
+ATLAS_QUEUE = 'atlas'
+
+# Each task leases a terminal process from the MT5 pool, so run one thread
+# per terminal — more would only queue on the pool, fewer leaves terminals idle.
+if pool_enabled():
+    celery_app.conf.update(
+        worker_pool='threads',
+        worker_concurrency=pool_size(),
+    )
\ No newline at end of file
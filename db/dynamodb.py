@@ -1,5 +1,14 @@
 import boto3
 import os
+import time
+import asyncio
+import logging
+import threading
+from functools import partial
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
 
 
 _dynamodb = boto3.resource(
@@ -7,75 +16,259 @@ _dynamodb = boto3.resource(
     region_name=os.getenv("AWS_REGION", "ap-south-1"),
 )
 
+# Blocking boto3 calls made from async routes run here, off the event loop
+_io_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DYNAMO_IO_THREADS", "32")),
+    thread_name_prefix="dynamo-io",
+)
+
+
+async def run_io(fn, *args, **kwargs):
+    """Run a blocking DynamoDB call on the I/O pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, partial(fn, *args, **kwargs))
+
+
+class AsyncTable:
+    """A boto3 Table with awaitable variants of its calls.
+
+    Synchronous use is unchanged (attributes pass through to the Table), so
+    stores and Celery tasks keep calling table.query(...); async routes call
+    await table.aquery(...) and friends instead.
+    """
+
+    def __init__(self, table):
+        self._table = table
+
+    def __getattr__(self, name):
+        return getattr(self._table, name)
+
+    async def aget_item(self, **kwargs):
+        return await run_io(self._table.get_item, **kwargs)
+
+    async def aput_item(self, **kwargs):
+        return await run_io(self._table.put_item, **kwargs)
+
+    async def aupdate_item(self, **kwargs):
+        return await run_io(self._table.update_item, **kwargs)
+
+    async def adelete_item(self, **kwargs):
+        return await run_io(self._table.delete_item, **kwargs)
+
+    async def aquery(self, **kwargs):
+        return await run_io(self._table.query, **kwargs)
+
+    async def ascan(self, **kwargs):
+        return await run_io(self._table.scan, **kwargs)
+
+    async def aquery_all(self, key_condition, **kwargs) -> list:
+        return await run_io(query_all, self._table, key_condition, **kwargs)
+
+    async def aquery_items(self, key_condition, **kwargs):
+        # Each page is fetched on the I/O pool as the caller consumes items
+        pages = query_pages(self._table, key_condition, **kwargs)
+        while True:
+            page = await run_io(next, pages, None)
+            if page is None:
+                return
+            for item in page:
+                yield item
+
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def _table(name: str) -> AsyncTable:
+    with _tables_lock:
+        if name not in _tables:
+            _tables[name] = AsyncTable(_dynamodb.Table(name))
+        return _tables[name]
+
 
 def get_strategies_table():
-    return _dynamodb.Table("UserStrategies")
+    return _table("UserStrategies")
 
 def get_journals_table():
-    return _dynamodb.Table("DailyJournals")
+    return _table("DailyJournals")
 
 def get_performance_snapshots_table():
-    return _dynamodb.Table("UserPerformanceSnapshots")
+    return _table("UserPerformanceSnapshots")
 
 def get_onboarding_table():
-    return _dynamodb.Table("UserOnboarding")
+    return _table("UserOnboarding")
 
 def get_analytics_stats_table():
-    return _dynamodb.Table("UserAnalyticsStats")
+    return _table("UserAnalyticsStats")
 
 def get_equity_curve_table():
-    return _dynamodb.Table("UserEquityCurve")
+    return _table("UserEquityCurve")
 
 def get_pnl_weekly_table():
-    return _dynamodb.Table("UserPnLWeekly")
+    return _table("UserPnLWeekly")
 
 def get_r_multiple_table():
-    return _dynamodb.Table("UserRMultiples")
+    return _table("UserRMultiples")
+
+# Keyed (user_id, position_id); time-ordered reads go through this GSI
+# (user_id, timestamp), which projects every attribute
+TRADES_TIME_INDEX = "timestamp-index"
 
 def get_trades_table():
-    return _dynamodb.Table("UserTrades")
+    return _table("UserPositionTrades")
+
+def get_legacy_trades_table():
+    # Keyed (user_id, timestamp) — read only by the position-key migration
+    return _table("UserTrades")
 
 def get_daily_pnl_table():
-    return _dynamodb.Table("UserDailyPnL")
+    return _table("UserDailyPnL")
 
 def get_dashboard_stats_table():
-    return _dynamodb.Table("UserDashboardStats")
+    return _table("UserDashboardStats")
 
 def get_report_stats_table():
-    return _dynamodb.Table("UserReportStats")
+    return _table("UserReportStats")
 
 def get_report_symbol_summary_table():
-    return _dynamodb.Table("UserReportSymbolSummary")
+    return _table("UserReportSymbolSummary")
 
 def get_report_win_rate_table():
-    return _dynamodb.Table("UserReportWinRate")
+    return _table("UserReportWinRate")
 
 def get_report_overview_table():
-    return _dynamodb.Table("UserReportOverview")
+    return _table("UserReportOverview")
 
 def get_drawdown_curve_table():
-    return _dynamodb.Table("UserDrawdownCurve")
+    return _table("UserDrawdownCurve")
 
 def get_session_performance_table():
-    return _dynamodb.Table("UserSessionPerformance")
+    return _table("UserSessionPerformance")
 
 def get_dashboard_session_performance_table():
-    return _dynamodb.Table("UserDashboardSessionPerformance")
+    return _table("UserDashboardSessionPerformance")
 
 def get_dashboard_symbol_performance_table():
-    return _dynamodb.Table("UserDashboardSymbolPerformance")
+    return _table("UserDashboardSymbolPerformance")
 
 def get_dashboard_daily_pnl_table():
-    return _dynamodb.Table("UserDashboardDailyPnL")
+    return _table("UserDashboardDailyPnL")
 
 def get_dashboard_equity_curve_table():
-    return _dynamodb.Table("UserDashboardEquityCurve")
+    return _table("UserDashboardEquityCurve")
 
 def get_atlas_stats_table():
-    return _dynamodb.Table("UserAtlasStats")
+    return _table("UserAtlasStats")
 
 def get_atlas_prompts_table():
-    return _dynamodb.Table("AtlasPrompts")
+    return _table("AtlasPrompts")
 
 def get_server_names_table():
-    return _dynamodb.Table("ServerNames")
\ No newline at end of file
+    return _table("ServerNames")
+
+def get_sync_history_table():
+    return _table("UserSyncHistory")
+
+def get_page_documents_table():
+    return _table("UserPageDocuments")
+
+def get_strategy_stats_table():
+    return _table("UserStrategyStats")
+
+def get_strategy_points_table():
+    return _table("UserStrategyPoints")
+
+def get_dynamodb_client():
+    return _dynamodb.meta.client
+
+
+# ─── Paginated queries ───────────────────────────────────────────────────────
+
+_consumed_capacity = defaultdict(float)
+_capacity_lock = threading.Lock()
+
+
+def _record_capacity(table_name: str, response: dict):
+    units = (response.get("ConsumedCapacity") or {}).get("CapacityUnits", 0)
+    with _capacity_lock:
+        _consumed_capacity[table_name] += units
+
+
+def consumed_read_capacity() -> dict:
+    """Read capacity used by query_pages in this process, per table."""
+    with _capacity_lock:
+        return dict(_consumed_capacity)
+
+
+def query_pages(table, key_condition, projection=None, max_items=None, **kwargs):
+    """Lazily yield a query's result pages (lists of items), following LastEvaluatedKey.
+
+    projection is a list of attribute names (reserved words like "timestamp"
+    are handled). max_items stops after that many items in total. Any other
+    keyword is passed to table.query as-is. Consumed capacity is recorded
+    per table — see consumed_read_capacity().
+    """
+    kwargs["KeyConditionExpression"] = key_condition
+    kwargs["ReturnConsumedCapacity"] = "TOTAL"
+    if projection:
+        names = dict(kwargs.get("ExpressionAttributeNames", {}))
+        placeholders = []
+        for i, attribute in enumerate(projection):
+            names[f"#p{i}"] = attribute
+            placeholders.append(f"#p{i}")
+        kwargs["ProjectionExpression"] = ", ".join(placeholders)
+        kwargs["ExpressionAttributeNames"] = names
+
+    remaining = max_items
+    while remaining is None or remaining > 0:
+        if remaining is not None:
+            kwargs["Limit"] = min(remaining, kwargs.get("Limit", remaining))
+        response = table.query(**kwargs)
+        _record_capacity(table.name, response)
+
+        items = response.get("Items", [])
+        if remaining is not None:
+            items = items[:remaining]
+            remaining -= len(items)
+        if items:
+            yield items
+
+        last_key = response.get("LastEvaluatedKey")
+        if not last_key:
+            return
+        kwargs["ExclusiveStartKey"] = last_key
+
+
+def query_items(table, key_condition, **kwargs):
+    """Like query_pages, but yields one item at a time."""
+    for page in query_pages(table, key_condition, **kwargs):
+        yield from page
+
+
+def query_all(table, key_condition, **kwargs) -> list:
+    return [item for page in query_pages(table, key_condition, **kwargs) for item in page]
+
+
+# DynamoDB's limit for one BatchGetItem call
+BATCH_GET_SIZE = 100
+
+
+def batch_get_items(table, keys: list, projection=None) -> list:
+    """Fetch items by primary key, retrying UnprocessedKeys. Order is not kept."""
+    items = []
+    for start in range(0, len(keys), BATCH_GET_SIZE):
+        request = {"Keys": keys[start:start + BATCH_GET_SIZE]}
+        if projection:
+            request["ProjectionExpression"] = ", ".join(f"#p{i}" for i in range(len(projection)))
+            request["ExpressionAttributeNames"] = {f"#p{i}": a for i, a in enumerate(projection)}
+        pending = {table.name: request}
+        for attempt in range(10):
+            response = _dynamodb.batch_get_item(RequestItems=pending)
+            items.extend(response.get("Responses", {}).get(table.name, []))
+            pending = response.get("UnprocessedKeys") or {}
+            if not pending:
+                break
+            time.sleep(min(0.05 * 2 ** attempt, 2.0))
+        else:
+            raise RuntimeError(f"BatchGetItem on {table.name} left keys unprocessed")
+    return items
@@ -0,0 +1,13 @@
+import os
+import redis
+from dotenv import load_dotenv
+
+load_dotenv()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Same Redis instance Celery uses as broker and result backend
+_redis = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+
+
+def get_redis():
+    return _redis
@@ -1,8 +1,9 @@
 import os
 import json
+import asyncio
 import hmac
 import hashlib
-from fastapi import FastAPI, HTTPException, Request, Depends
+from fastapi import FastAPI, HTTPException, Request, Response, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from celery.result import AsyncResult
@@ -17,11 +18,18 @@ from schemas.strategies import StrategyCreateRequest
 from db.dynamodb import get_performance_snapshots_table
 from db.dynamodb import get_analytics_stats_table
 
-from tasks import get_account_summary
+from tasks import dispatch_account_sync
+from celery_app import celery_app
+from services.snapshot_slots import asnapshot_partition
+from services.page_documents import ainvalidate_page_document
+from services.response_cache import cached_response, abump_data_version, cache_stats
+from services.trade_search_index import refresh_search_index
+from services.unreviewed_trades import list_unreviewed_trades, get_unreviewed_count
+from services.strategy_stats import load_strategy_stats, load_strategy_points, summarize, equity_curve
 
 from db.dynamodb import get_strategies_table
 from db.dynamodb import get_journals_table
-from db.dynamodb import get_trades_table
+from db.dynamodb import run_io
 from schemas.journal import JournalCreateRequest
 from db.dynamodb import get_onboarding_table
 from schemas.broker_link import BrokerLinkRequest
@@ -88,6 +96,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 app.include_router(analytics_router)
@@ -128,7 +137,7 @@ def decimal_to_float(obj):
 
 async def require_payment(current_user: dict = Depends(get_current_user)):
     table = get_onboarding_table()
-    response = table.get_item(Key={"user_id": current_user["user_id"]})
+    response = await table.aget_item(Key={"user_id": current_user["user_id"]})
     item = response.get("Item", {})
     if not item.get("has_paid"):
         raise HTTPException(status_code=403, detail="Payment required")
@@ -186,7 +195,7 @@ async def create_razorpay_order(current_user: dict = Depends(get_current_user)):
     table = get_onboarding_table()
 
     # Idempotency — already paid
-    existing = table.get_item(Key={"user_id": user_id})
+    existing = await table.aget_item(Key={"user_id": user_id})
     item = existing.get("Item", {})
     if item.get("has_paid"):
         return {"already_paid": True}
@@ -203,7 +212,7 @@ async def create_razorpay_order(current_user: dict = Depends(get_current_user)):
 
     # Store order ID + creation timestamp before checkout starts (replay attack prevention)
     if item:
-        table.update_item(
+        await table.aupdate_item(
             Key={"user_id": user_id},
             UpdateExpression="SET razorpay_order_id = :oid, order_created_at = :oca, updated_at = :u",
             ExpressionAttributeValues={
@@ -213,7 +222,7 @@ async def create_razorpay_order(current_user: dict = Depends(get_current_user)):
             },
         )
     else:
-        table.put_item(Item={
+        await table.aput_item(Item={
             "user_id":           user_id,
             "razorpay_order_id": order["id"],
             "order_created_at":  now,
@@ -241,7 +250,7 @@ async def verify_payment(
     user_id = current_user["user_id"]
     table = get_onboarding_table()
 
-    existing = table.get_item(Key={"user_id": user_id})
+    existing = await table.aget_item(Key={"user_id": user_id})
     item = existing.get("Item", {})
 
     # Already paid — idempotent
@@ -288,7 +297,7 @@ async def verify_payment(
 
     # Mark paid
     now = datetime.utcnow().isoformat()
-    table.update_item(
+    await table.aupdate_item(
         Key={"user_id": user_id},
         UpdateExpression="""
             SET has_paid   = :p,
@@ -346,12 +355,12 @@ async def razorpay_webhook(request: Request):
         table = get_onboarding_table()
 
         # Duplicate webhook protection — check before writing
-        existing = table.get_item(Key={"user_id": user_id})
+        existing = await table.aget_item(Key={"user_id": user_id})
         if existing.get("Item", {}).get("has_paid"):
             return {"status": "already_processed"}
 
         now = datetime.utcnow().isoformat()
-        table.update_item(
+        await table.aupdate_item(
             Key={"user_id": user_id},
             UpdateExpression="SET has_paid = :p, payment_id = :pid, paid_at = :pa, updated_at = :u",
             ExpressionAttributeValues={
@@ -374,11 +383,10 @@ async def request_account_summary(
     request: AccountRequest,
     current_user: dict = Depends(get_current_user),
 ):
-    task = get_account_summary.apply_async(
-        args=[current_user["user_id"], request.server,
-              request.login, request.password]
+    task_id, coalesced = await run_io(
+        dispatch_account_sync, current_user["user_id"], request.server, request.login, request.password
     )
-    return {"task_id": task.id, "status": "processing"}
+    return {"task_id": task_id, "status": "processing", "coalesced": coalesced}
 
 
 @app.get("/account/summary/{task_id}")
@@ -386,10 +394,14 @@ async def get_task_result(
     task_id: str,
     current_user: dict = Depends(get_current_user),
 ):
-    task_result = AsyncResult(task_id, app=get_account_summary.app)
+    task_result = AsyncResult(task_id, app=celery_app)
 
     if task_result.state == "PROGRESS":
-        return {"status": "progress", "step": task_result.info.get("step")}
+        return {
+            "status": "progress",
+            "step": task_result.info.get("step"),
+            "telemetry": task_result.info.get("telemetry"),
+        }
 
     if task_result.ready():
         result = task_result.get()
@@ -398,8 +410,8 @@ async def get_task_result(
             raise HTTPException(status_code=500, detail=result.get("message"))
 
         table = get_analytics_stats_table()
-        response = table.query(
-            KeyConditionExpression=Key("user_id").eq(current_user["user_id"]),
+        response = await table.aquery(
+            KeyConditionExpression=Key("user_id").eq(await asnapshot_partition(current_user["user_id"])),
             ScanIndexForward=False,
             Limit=1,
         )
@@ -420,7 +432,12 @@ async def get_task_result(
                 "avg_loss":      decimal_to_float(item["avg_loss"]),
             }
 
-        return {"status": "success", "sync": result, "analytics_stats": analytics}
+        return {
+            "status": "success",
+            "sync": result,
+            "telemetry": result.get("telemetry"),
+            "analytics_stats": analytics,
+        }
 
     return {"task_id": task_id, "status": task_result.status, "message": "Task is still in progress."}
 
@@ -428,15 +445,17 @@ async def get_task_result(
 @app.post("/account/sync")
 async def sync_account(
     days: int | None = Query(default=None, ge=1, le=365),
+    full: bool = Query(default=False, description="Ignore the sync watermark and re-fetch all history"),
+    rerun: bool = Query(default=False, description="If a sync is running, sync again once it finishes"),
     current_user: dict = Depends(require_payment),
 ):
-    logger.info(f"/account/sync called with days={days}")
+    logger.info(f"/account/sync called with days={days} full={full}")
     user_id = current_user["user_id"]
 
     onboarding_table = get_onboarding_table()
 
     try:
-        response = onboarding_table.get_item(Key={"user_id": user_id})
+        response = await onboarding_table.aget_item(Key={"user_id": user_id})
     except Exception as e:
         logger.error("DynamoDB get_item FAILED", exc_info=True)
         raise HTTPException(status_code=500, detail="DB fetch failed")
@@ -452,40 +471,47 @@ async def sync_account(
             status_code=400, detail="Broker credentials missing")
 
     try:
-        task = get_account_summary.apply_async(
-            args=[user_id, item["server"], int(
-                item["login"]), str(item["password"]), days]
+        task_id, coalesced = await run_io(
+            dispatch_account_sync,
+            user_id, item["server"], int(item["login"]), str(item["password"]),
+            days=days, full_sync=full, rerun=rerun,
         )
-        logger.info(f"Celery sync task started: {task.id} for days={days}")
+        if coalesced:
+            logger.info(f"Sync coalesced into in-flight task {task_id} (rerun={rerun})")
+        else:
+            logger.info(f"Celery sync task started: {task_id} for days={days}")
     except Exception as e:
         logger.error("Celery task creation failed", exc_info=True)
         raise HTTPException(status_code=500, detail="Task dispatch failed")
 
-    return {"status": "processing", "task_id": task.id}
+    return {"status": "processing", "task_id": task_id, "coalesced": coalesced}
 
 
 @app.get("/account/sync/new-trades")
 async def get_new_trades(current_user: dict = Depends(get_current_user)):
     user_id = current_user["user_id"]
-    table = get_trades_table()
-    response = table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id),
-        ScanIndexForward=False,
-    )
 
-    new_trades = []
-    for item in response.get("Items", []):
-        if "unreviewed" in item.get("tags", []):
-            new_trades.append({
-                "timestamp": decimal_to_float(item["timestamp"]),
-                "symbol":    item.get("symbol"),
-                "pnl":       float(item["pnl"]),
-                "volume":    float(item["volume"]),
-            })
+    # Sparse index: only unreviewed rows are read
+    new_trades = [
+        {
+            "position_id": int(item["position_id"]),
+            "timestamp": decimal_to_float(item["timestamp"]),
+            "symbol":    item.get("symbol"),
+            "pnl":       float(item["pnl"]),
+            "volume":    float(item["volume"]),
+        }
+        for item in await run_io(list_unreviewed_trades, user_id)
+    ]
 
     return {"status": "success", "data": new_trades}
 
 
+@app.get("/account/sync/new-trades/count")
+async def get_new_trades_count(current_user: dict = Depends(get_current_user)):
+    count = await run_io(get_unreviewed_count, current_user["user_id"])
+    return {"status": "success", "count": count}
+
+
 # ─── Onboarding ───────────────────────────────────────────────────────────────
 
 @app.get("/onboarding/status")
@@ -497,12 +523,12 @@ async def get_onboarding_status(current_user: dict = Depends(get_current_user)):
 
     logger.info(f"onboarding/status: user_id={user_id} email={email}")
 
-    response = table.get_item(Key={"user_id": user_id})
+    response = await table.aget_item(Key={"user_id": user_id})
 
     if "Item" not in response:
         logger.info(f"onboarding/status: no item found for user_id={user_id}")
         if email:
-            table.put_item(Item={
+            await table.aput_item(Item={
                 "user_id":       user_id,
                 "email":         email,
                 "has_paid":      False,
@@ -520,7 +546,7 @@ async def get_onboarding_status(current_user: dict = Depends(get_current_user)):
 
     # Backfill email if missing — ensures GSI works for WinProFX lookups
     if email and not item.get("email"):
-        table.update_item(
+        await table.aupdate_item(
             Key={"user_id": user_id},
             UpdateExpression="SET email = :e, updated_at = :u",
             ExpressionAttributeValues={
@@ -545,7 +571,7 @@ async def select_broker(
     table = get_onboarding_table()
     user_id = current_user["user_id"]
 
-    table.update_item(
+    await table.aupdate_item(
         Key={"user_id": user_id},
         UpdateExpression="SET broker_name = :broker, broker_linked = :linked, updated_at = :updated",
         ExpressionAttributeValues={
@@ -572,7 +598,7 @@ async def link_broker(
     logger.info(f"Broker link request: {safe_request}")
 
     try:
-        existing_response = onboarding_table.get_item(Key={"user_id": user_id})
+        existing_response = await onboarding_table.aget_item(Key={"user_id": user_id})
         existing = existing_response.get("Item")
     except Exception as e:
         logger.error("DynamoDB get_item failed", exc_info=True)
@@ -580,9 +606,16 @@ async def link_broker(
 
     now = datetime.utcnow().isoformat()
 
+    # A different account must not be merged into the old one's journal:
+    # dropping the watermark makes the next sync a full one
+    account_changed = bool(existing) and (
+        existing.get("server") != request.server
+        or str(existing.get("login")) != str(request.login)
+    )
+
     try:
         if existing:
-            onboarding_table.update_item(
+            await onboarding_table.aupdate_item(
                 Key={"user_id": user_id},
                 UpdateExpression="""
                     SET broker_name   = :b,
@@ -591,7 +624,7 @@ async def link_broker(
                         password      = :p,
                         broker_linked = :bl,
                         updated_at    = :u
-                """,
+                """ + ("REMOVE last_sync_at" if account_changed else ""),
                 ExpressionAttributeValues={
                     ":b":  request.broker,
                     ":s":  request.server,
@@ -602,7 +635,7 @@ async def link_broker(
                 },
             )
         else:
-            onboarding_table.put_item(Item={
+            await onboarding_table.aput_item(Item={
                 "user_id":      user_id,
                 "broker_name":  request.broker,
                 "server":       request.server,
@@ -616,12 +649,14 @@ async def link_broker(
         logger.error("DynamoDB write failed", exc_info=True)
         raise HTTPException(status_code=500, detail="DB write failed")
 
-    task = get_account_summary.apply_async(
-        args=[user_id, request.server, request.login, request.password]
+    # New credentials must be synced even if an older sync is still running
+    task_id, coalesced = await run_io(
+        dispatch_account_sync, user_id, request.server, request.login, request.password,
+        full_sync=account_changed, rerun=True,
     )
-    logger.info(f"Celery task started: {task.id}")
+    logger.info(f"Celery task started: {task_id} (coalesced={coalesced})")
 
-    return {"status": "syncing", "task_id": task.id}
+    return {"status": "syncing", "task_id": task_id}
 
 
 # ─── Strategies ───────────────────────────────────────────────────────────────
@@ -647,61 +682,72 @@ async def create_strategy(
         "created_at":  datetime.utcnow().isoformat(),
     }
 
-    strategies_table.put_item(Item=strategy_item)
+    await strategies_table.aput_item(Item=strategy_item)
+    await ainvalidate_page_document(user_id, "analytics")
+    await abump_data_version(user_id, "edits")
+    refresh_search_index(user_id)
     return {"status": "success", "strategy_id": strategy_id, "strategy": strategy_item}
 
 
 @app.get("/strategies")
-async def get_my_strategies(current_user: dict = Depends(get_current_user)):
-    strategies_table = get_strategies_table()
-    trades_table = get_trades_table()
+async def get_my_strategies(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
     user_id = current_user["user_id"]
-
-    strategies_response = strategies_table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id)
+    return await cached_response(
+        user_id, "strategies", lambda: _list_strategies(user_id),
+        request=request, response=response,
     )
-    strategies = strategies_response.get("Items", [])
 
-    trades_response = trades_table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id)
-    )
-    all_trades = trades_response.get("Items", [])
 
-    strategy_trades_map = {}
-    for trade in all_trades:
-        for tag in trade.get("tags", []):
-            if tag.startswith("strategy#"):
-                sid = tag.replace("strategy#", "")
-                if sid not in strategy_trades_map:
-                    strategy_trades_map[sid] = []
-                strategy_trades_map[sid].append(trade)
+async def _list_strategies(user_id: str) -> dict:
+    strategies_table = get_strategies_table()
+
+    # One stats row per strategy, kept current as tags change and trades sync
+    strategies, stats = await asyncio.gather(
+        strategies_table.aquery_all(Key("user_id").eq(user_id)),
+        run_io(load_strategy_stats, user_id),
+    )
 
     enriched = []
     for strategy in strategies:
-        sid = strategy["strategy_id"]
-        trades = strategy_trades_map.get(sid, [])
-        total = len(trades)
-        wins = [t for t in trades if float(t.get("pnl", 0)) > 0]
-        losses = [t for t in trades if float(t.get("pnl", 0)) < 0]
-
-        win_rate = round((len(wins) / total) * 100, 2) if total else 0
-        avg_rr = round(sum(float(t.get("r_multiple", 0))
-                       for t in trades) / total, 2) if total else 0
-        total_pnl = round(sum(float(t.get("pnl", 0)) for t in trades), 2)
-
+        row = stats.get(strategy["strategy_id"], {})
         enriched.append({
             **{k: (float(v) if isinstance(v, Decimal) else v) for k, v in strategy.items()},
-            "trades":    total,
-            "wins":      len(wins),
-            "losses":    len(losses),
-            "win_rate":  win_rate,
-            "avg_rr":    avg_rr,
-            "total_pnl": total_pnl,
+            **summarize(row),
         })
 
     return {"status": "success", "data": enriched}
 
 
+@app.get("/strategies/{strategy_id}/equity-curve")
+async def get_strategy_equity_curve(
+    strategy_id: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
+    user_id = current_user["user_id"]
+    return await cached_response(
+        user_id, "strategy_equity_curve", lambda: _strategy_equity_curve(user_id, strategy_id),
+        params={"strategy_id": strategy_id}, request=request, response=response,
+    )
+
+
+async def _strategy_equity_curve(user_id: str, strategy_id: str) -> dict:
+    strategy = await get_strategies_table().aget_item(
+        Key={"user_id": user_id, "strategy_id": strategy_id},
+        ProjectionExpression="strategy_id",
+    )
+    if "Item" not in strategy:
+        raise HTTPException(status_code=404, detail="Strategy not found")
+
+    points = await run_io(load_strategy_points, user_id, strategy_id)
+    return {"status": "success", "data": equity_curve(points)}
+
+
 # ─── Journal ──────────────────────────────────────────────────────────────────
 
 @app.post("/journal")
@@ -724,7 +770,7 @@ async def create_journal_entry(
     }
 
     try:
-        table.put_item(
+        await table.aput_item(
             Item=item,
             ConditionExpression="attribute_not_exists(journal_date)",
         )
@@ -743,7 +789,7 @@ async def get_my_journals(current_user: dict = Depends(get_current_user)):
     user_id = current_user["user_id"]
 
     try:
-        response = table.query(
+        response = await table.aquery(
             KeyConditionExpression=Key("user_id").eq(user_id),
             ScanIndexForward=False,
         )
@@ -756,12 +802,23 @@ async def get_my_journals(current_user: dict = Depends(get_current_user)):
 # ─── Reports ──────────────────────────────────────────────────────────────────
 
 @app.get("/reports/summary")
-async def get_reports_summary(current_user: dict = Depends(get_current_user)):
-    table = get_performance_snapshots_table()
+async def get_reports_summary(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
     user_id = current_user["user_id"]
+    return await cached_response(
+        user_id, "reports_summary", lambda: _reports_summary(user_id),
+        request=request, response=response,
+    )
 
-    response = table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id),
+
+async def _reports_summary(user_id: str) -> dict:
+    table = get_performance_snapshots_table()
+
+    response = await table.aquery(
+        KeyConditionExpression=Key("user_id").eq(await asnapshot_partition(user_id)),
         ScanIndexForward=False,
         Limit=1,
     )
@@ -806,8 +863,8 @@ async def get_last_sync(current_user: dict = Depends(get_current_user)):
     table = get_performance_snapshots_table()
     user_id = current_user["user_id"]
 
-    response = table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id),
+    response = await table.aquery(
+        KeyConditionExpression=Key("user_id").eq(await asnapshot_partition(user_id)),
         ScanIndexForward=False,
         Limit=1,
     )
@@ -829,6 +886,11 @@ async def list_all_users(admin_user: dict = Depends(get_admin_user)):
     return {"message": "Admin access granted", "admin": admin_user["username"]}
 
 
+@app.get("/admin/cache-stats")
+async def get_cache_stats(admin_user: dict = Depends(get_admin_user)):
+    return {"status": "success", "data": await run_io(cache_stats)}
+
+
 BROKER_SERVER_PREFIX_MAP: dict[str, str | None] = {
     "Exness":              "Exness",
     "XM":                  "XMGlobal",
@@ -856,7 +918,7 @@ async def get_server_names(
         return {"servers": []}
 
     table = get_server_names_table()
-    response = table.scan()
+    response = await table.ascan()
 
     servers = [
         item["server_name"]
@@ -1,38 +1,58 @@
+import os
 import MetaTrader5 as mt5
 from datetime import datetime, timedelta
 from collections import defaultdict
 import time
+from mt5_session import get_mt5_session
+from mt5_pool import pool_enabled, get_terminal_pool
 
 
-def fetch_mt5_analytics(server, login, password, days=None):
+# Incremental syncs re-read this much history before the last watermark so
+# positions closed around the previous sync (and MT5 server-time skew) are
+# never missed. Re-read positions simply overwrite their stored copy.
+INCREMENTAL_OVERLAP = timedelta(hours=24)
 
-    try:
+# Pending entry orders are placed before their first fill, so the order
+# range starts this much earlier than the earliest deal. Positions still
+# without orders fall back to a per-position lookup.
+ORDERS_LOOKBACK = timedelta(days=int(os.getenv("MT5_ORDERS_LOOKBACK_DAYS", "30")))
+
+
+def fetch_mt5_analytics(server, login, password, days=None, since=None):
+    # With MT5_TERMINAL_PATHS configured the fetch runs on a leased terminal
+    # process from the pool; otherwise on this process's own terminal.
+    if pool_enabled():
+        try:
+            return get_terminal_pool().fetch(
+                server, login, password, days=days, since=since
+            )
+        except TimeoutError as e:
+            return {"status": "error", "message": str(e)}
+    return fetch_mt5_analytics_local(server, login, password, days=days, since=since)
+
+
+def fetch_mt5_analytics_local(server, login, password, days=None, since=None):
+
+    timings = {}
+    phase_start = time.perf_counter()
+
+    # ---------------- INITIALIZE ----------------
 
-        # ---------------- INITIALIZE ----------------
-
-        if not mt5.initialize():
-            mt5.shutdown()
-            time.sleep(2)
-            if not mt5.initialize():
-                return {
-                    "status": "error",
-                    "message": f"MT5 init failed: {mt5.last_error()}"
-                }
-
-        # Only login if not already on the right account
-        account_info = mt5.account_info()
-        if account_info is None or account_info.login != login:
-            if not mt5.login(login=login, password=password, server=server):
-                mt5.shutdown()
-                return {
-                    "status": "error",
-                    "message": f"MT5 login failed: {mt5.last_error()}"
-                }
+    # The per-process session keeps the terminal initialized and logged in
+    # between tasks; it only re-logs in when the account changes.
+    session = get_mt5_session()
+    error = session.acquire(server, login, password)
+    if error:
+        return error
+
+    failed = True
+
+    try:
 
         account = mt5.account_info()
+        timings["connect"] = round(time.perf_counter() - phase_start, 3)
 
         if account is None:
-            mt5.shutdown()
             return {
                 "status": "error",
                 "message": "Account info failed"
@@ -74,19 +94,29 @@ def fetch_mt5_analytics(server, login, password, days=None):
         # to datetime.now() to ensure all recent trades are captured
         # regardless of the timezone difference between the server and MT5
         end_time = datetime.now() + timedelta(hours=6)
-        start_time = (
-            datetime.now() - timedelta(days=days)
-            if days is not None
-            else datetime(2000, 1, 1)
-        )
-
+        incremental = days is None and since is not None
+        if incremental:
+            start_time = datetime.fromtimestamp(since) - INCREMENTAL_OVERLAP
+        elif days is not None:
+            start_time = datetime.now() - timedelta(days=days)
+        else:
+            start_time = datetime(2000, 1, 1)
+
+        phase_start = time.perf_counter()
         deals = mt5.history_deals_get(
             int(start_time.timestamp()),
             int(end_time.timestamp())
         ) or []
         deals = sorted(deals, key=lambda d: d.time)
-
-        print(f"\n=== FETCHING {'ALL TIME' if days is None else f'LAST {days} DAYS'} ===")
+        timings["deals_fetch"] = round(time.perf_counter() - phase_start, 3)
+
+        if incremental:
+            label = f"SINCE {start_time.isoformat()} (INCREMENTAL)"
+        elif days is not None:
+            label = f"LAST {days} DAYS"
+        else:
+            label = "ALL TIME"
+        print(f"\n=== FETCHING {label} ===")
         print(f"From: {start_time.date()}  To: {end_time.date()}")
         print(f"Total deals fetched: {len(deals)}")
 
@@ -102,6 +132,52 @@ def fetch_mt5_analytics(server, login, password, days=None):
 
         print(f"Unique positions: {len(positions_map)}")
 
+        # Positions closed inside an incremental window may have been opened
+        # before it — pull their full deal history so entry data is intact.
+        if incremental:
+            backfilled = 0
+            for position_id, position_deals in positions_map.items():
+                has_entry = any(d.entry == mt5.DEAL_ENTRY_IN for d in position_deals)
+                has_exit = any(
+                    d.entry in (mt5.DEAL_ENTRY_OUT, mt5.DEAL_ENTRY_INOUT)
+                    for d in position_deals
+                )
+                if has_exit and not has_entry:
+                    full_history = mt5.history_deals_get(position=position_id)
+                    if full_history:
+                        positions_map[position_id] = sorted(full_history, key=lambda d: d.time)
+                        backfilled += 1
+            print(f"Backfilled positions opened before window: {backfilled}")
+
+        # ---------------- FETCH ORDERS (ONE CALL) ----------------
+
+        # Stop losses live on the orders. Fetch every order for the range
+        # once and index by position instead of one terminal round trip per
+        # position. The range starts ORDERS_LOOKBACK before the earliest deal
+        # we hold so backfilled positions and pending entries are covered.
+        phase_start = time.perf_counter()
+        orders_by_position = defaultdict(list)
+        if positions_map:
+            orders_from = min(
+                d.time for position_deals in positions_map.values() for d in position_deals
+            ) - int(ORDERS_LOOKBACK.total_seconds())
+            orders = mt5.history_orders_get(
+                int(orders_from),
+                int(end_time.timestamp())
+            ) or []
+            for order in sorted(orders, key=lambda o: o.time_setup):
+                orders_by_position[order.position_id].append(order)
+
+            # Orders placed even earlier: look those positions up directly
+            missing = [p for p in positions_map if p not in orders_by_position]
+            for position_id in missing:
+                position_orders = mt5.history_orders_get(position=position_id) or []
+                orders_by_position[position_id] = sorted(position_orders, key=lambda o: o.time_setup)
+            print(f"Orders fetched: {len(orders)} in 1 call, "
+                  f"{len(missing)} positions looked up individually")
+        timings["orders_fetch"] = round(time.perf_counter() - phase_start, 3)
+        phase_start = time.perf_counter()
+
         # ---------------- ANALYTICS ----------------
 
         trades_list = []
@@ -178,7 +254,7 @@ def fetch_mt5_analytics(server, login, password, days=None):
 
             # Risk calculation
             risk_amount = None
-            position_history = mt5.history_orders_get(position=position_id)
+            position_history = orders_by_position.get(position_id)
 
             if position_history:
                 for order in position_history:
@@ -188,7 +264,9 @@ def fetch_mt5_analytics(server, login, password, days=None):
                         ) * order.volume_initial
                         break
 
-            # Fallback risk
+            # Fallback risk. It depends on the losses in the fetched window,
+            # so the trades store never lets it overwrite a stored value.
+            risk_estimated = not risk_amount
             if not risk_amount or risk_amount == 0:
                 if losses:
                     risk_amount = sum(losses) / len(losses)
@@ -212,6 +290,7 @@ def fetch_mt5_analytics(server, login, password, days=None):
                 "volume": round(total_volume, 2),
                 "r_multiple": r_multiple,
                 "risk_amount": round(risk_amount, 2),
+                "risk_estimated": risk_estimated,
                 "timestamp": close_time,
                 "trade_id": int(position_id),
                 "entry_price": float(entry_deal.price) if entry_deal else 0,
@@ -245,10 +324,13 @@ def fetch_mt5_analytics(server, login, password, days=None):
             "avg_loss": round(avg_loss, 2)
         }
 
+        timings["processing"] = round(time.perf_counter() - phase_start, 3)
+
         print("\n=== FINAL SUMMARY ===")
         print(f"Closed positions: {len(trades_list)}")
         print(f"Wins: {len(wins)}, Losses: {len(losses)}")
         print(f"Equity points: {len(equity_curve)}")
+        print("Timings (s): " + ", ".join(f"{k}={v}" for k, v in timings.items()))
 
         if trades_list:
             print(f"\n=== SAMPLE TRADES ===")
@@ -258,9 +340,14 @@ def fetch_mt5_analytics(server, login, password, days=None):
 
         # ---------------- RETURN ----------------
 
+        failed = False
         return {
             "status": "success",
             "data": {
+                "incremental": incremental,
+                "timings": timings,
+                "deal_count": len(deals),
+                "starting_equity": account.balance - account.profit,
                 "account": account_data,
                 "open_positions": positions_data,
                 "performance_metrics": metrics,
@@ -274,4 +361,5 @@ def fetch_mt5_analytics(server, login, password, days=None):
         }
 
     finally:
-        mt5.shutdown()
\ No newline at end of file
+        # Failed syncs recycle the terminal; successful ones keep it warm
+        session.release(failed=failed)
\ No newline at end of file
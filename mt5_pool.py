@@ -0,0 +1,143 @@
+import os
+import queue
+import logging
+import threading
+import multiprocessing
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# One terminal installation per entry, separated by ";" — e.g.
+# MT5_TERMINAL_PATHS="C:\MT5-1\terminal64.exe;C:\MT5-2\terminal64.exe"
+TERMINAL_PATHS = [
+    p.strip() for p in os.getenv("MT5_TERMINAL_PATHS", "").split(";") if p.strip()
+]
+
+LEASE_TIMEOUT = int(os.getenv("MT5_POOL_LEASE_TIMEOUT", "300"))
+FETCH_TIMEOUT = int(os.getenv("MT5_POOL_FETCH_TIMEOUT", "900"))
+
+
+def pool_enabled() -> bool:
+    return len(TERMINAL_PATHS) > 0
+
+
+def pool_size() -> int:
+    return len(TERMINAL_PATHS)
+
+
+def _terminal_main(path, conn):
+    # Runs inside the pool process: bind this process's MT5 session to its
+    # own terminal installation, then serve fetch requests until told to stop.
+    from mt5_session import configure_mt5_session, shutdown_mt5_session
+    from mt5_logic import fetch_mt5_analytics_local
+
+    configure_mt5_session(path)
+    try:
+        while True:
+            job = conn.recv()
+            if job is None:
+                break
+            args, kwargs = job
+            try:
+                result = fetch_mt5_analytics_local(*args, **kwargs)
+            except Exception as e:
+                result = {"status": "error", "message": f"MT5 fetch crashed: {e}"}
+            conn.send(result)
+    finally:
+        shutdown_mt5_session()
+
+
+class _TerminalWorker:
+
+    def __init__(self, ctx, path):
+        self.path = path
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_terminal_main, args=(path, child_conn), daemon=True
+        )
+        self.process.start()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.process.join(timeout=30)
+        except Exception:
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+
+
+class MT5TerminalPool:
+    """A fixed set of processes, each bound to its own MT5 terminal.
+
+    The MetaTrader5 API can only drive one terminal per process, so parallel
+    syncs on one host need one process per terminal installation. Tasks lease
+    an idle terminal process, send it the fetch, and return it to the pool.
+    Run the worker with a thread pool whose concurrency equals pool_size()
+    so every terminal can be busy at once.
+    """
+
+    def __init__(self, paths):
+        self._ctx = multiprocessing.get_context("spawn")
+        self._paths = list(paths)
+        self._idle = queue.Queue()
+        self._workers = []
+        for path in self._paths:
+            worker = _TerminalWorker(self._ctx, path)
+            self._workers.append(worker)
+            self._idle.put(worker)
+        logger.info(f"MT5 terminal pool started with {len(self._paths)} terminals")
+
+    def _replace(self, worker):
+        worker.stop()
+        fresh = _TerminalWorker(self._ctx, worker.path)
+        self._workers[self._workers.index(worker)] = fresh
+        logger.warning(f"Restarted MT5 terminal process for {worker.path}")
+        return fresh
+
+    @contextmanager
+    def lease(self):
+        try:
+            worker = self._idle.get(timeout=LEASE_TIMEOUT)
+        except queue.Empty:
+            raise TimeoutError(f"No MT5 terminal free after {LEASE_TIMEOUT}s")
+        healthy = False
+        try:
+            if not worker.process.is_alive():
+                worker = self._replace(worker)
+            yield worker
+            healthy = True
+        finally:
+            self._idle.put(worker if healthy else self._replace(worker))
+
+    def fetch(self, *args, **kwargs):
+        with self.lease() as worker:
+            worker.conn.send((args, kwargs))
+            if not worker.conn.poll(FETCH_TIMEOUT):
+                raise TimeoutError(f"MT5 fetch timed out after {FETCH_TIMEOUT}s on {worker.path}")
+            return worker.conn.recv()
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_terminal_pool() -> MT5TerminalPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = MT5TerminalPool(TERMINAL_PATHS)
+        return _pool
+
+
+def shutdown_terminal_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
@@ -0,0 +1,135 @@
+import MetaTrader5 as mt5
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Recycle the terminal connection after this many syncs to bound any leaks
+# inside the terminal process.
+MAX_TASKS_PER_SESSION = int(os.getenv("MT5_MAX_TASKS_PER_SESSION", "50"))
+
+
+class MT5Session:
+    """Keeps one MT5 terminal initialized for the lifetime of a worker process.
+
+    The MetaTrader5 API is bound to a single terminal per process, so each
+    Celery worker process owns one session. Back-to-back syncs for the same
+    login reuse the initialized, logged-in terminal; a different login only
+    costs a re-login. The connection is recycled after MAX_TASKS_PER_SESSION
+    syncs, when the health check fails, or after any failed sync.
+    """
+
+    def __init__(self, path: str | None = None, max_tasks: int = MAX_TASKS_PER_SESSION):
+        self.path = path
+        self.max_tasks = max_tasks
+        self._initialized = False
+        self._login = None
+        self._server = None
+        self._tasks = 0
+        self._lock = threading.Lock()
+
+    # ─── Terminal lifecycle ──────────────────────────────────────────────────
+
+    def _initialize(self) -> bool:
+        kwargs = {"path": self.path} if self.path else {}
+        if not mt5.initialize(**kwargs):
+            mt5.shutdown()
+            time.sleep(2)
+            if not mt5.initialize(**kwargs):
+                return False
+        self._initialized = True
+        self._tasks = 0
+        logger.info(f"MT5 terminal initialized (path={self.path or 'default'})")
+        return True
+
+    def _healthy(self) -> bool:
+        info = mt5.terminal_info()
+        return info is not None and info.connected
+
+    def shutdown(self):
+        if self._initialized:
+            mt5.shutdown()
+            logger.info(f"MT5 terminal shut down after {self._tasks} tasks")
+        self._initialized = False
+        self._login = None
+        self._server = None
+        self._tasks = 0
+
+    # ─── Leasing ─────────────────────────────────────────────────────────────
+
+    def acquire(self, server, login, password):
+        """Make the terminal ready for this account.
+
+        Returns None on success or an error dict in the fetch_mt5_analytics
+        shape. On success the caller must call release().
+        """
+        self._lock.acquire()
+        try:
+            if self._initialized and self._tasks >= self.max_tasks:
+                logger.info(f"Recycling MT5 session after {self._tasks} tasks")
+                self.shutdown()
+            elif self._initialized and not self._healthy():
+                logger.warning("MT5 health check failed — reinitializing")
+                self.shutdown()
+
+            if not self._initialized and not self._initialize():
+                error = {
+                    "status": "error",
+                    "message": f"MT5 init failed: {mt5.last_error()}"
+                }
+                self._lock.release()
+                return error
+
+            # Only login if not already on the right account
+            account_info = mt5.account_info()
+            if account_info is None or account_info.login != login or self._server != server:
+                if not mt5.login(login=login, password=password, server=server):
+                    error = {
+                        "status": "error",
+                        "message": f"MT5 login failed: {mt5.last_error()}"
+                    }
+                    self.shutdown()
+                    self._lock.release()
+                    return error
+                self._login = login
+                self._server = server
+            else:
+                logger.info(f"MT5 session reused for login={login}")
+
+            self._tasks += 1
+            return None
+        except Exception:
+            self.shutdown()
+            self._lock.release()
+            raise
+
+    def release(self, failed: bool = False):
+        try:
+            if failed:
+                self.shutdown()
+        finally:
+            self._lock.release()
+
+
+_session = None
+
+
+def get_mt5_session() -> MT5Session:
+    global _session
+    if _session is None:
+        _session = MT5Session(path=os.getenv("MT5_TERMINAL_PATH"))
+    return _session
+
+
+def configure_mt5_session(path: str | None):
+    # Used by terminal pool processes to bind to their own installation
+    global _session
+    shutdown_mt5_session()
+    _session = MT5Session(path=path)
+
+
+def shutdown_mt5_session():
+    if _session is not None:
+        _session.shutdown()
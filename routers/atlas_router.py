@@ -4,7 +4,7 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException
 
 from auth_dependency import get_current_user
-from db.dynamodb import get_atlas_stats_table
+from db.dynamodb import get_atlas_stats_table, run_io
 from services.trading_data_compressor import TradingDataCompressor
 
 logger = logging.getLogger("atlas_router")
@@ -22,15 +22,15 @@ async def get_atlas_insights(current_user: dict = Depends(get_current_user)):
 
     try:
         atlas_table   = get_atlas_stats_table()
-        existing_item = atlas_table.get_item(Key={"user_id": user_id}).get("Item")
+        existing_item = (await atlas_table.aget_item(Key={"user_id": user_id})).get("Item")
 
         if existing_item and existing_item.get("altas_prompt_response"):
             raw_response = existing_item["altas_prompt_response"]
         else:
          
             logger.info(f"Atlas cache miss for user {user_id} — running compressor")
-            raw_response = compressor.get_or_update_atlas_stats(
-                user_id, prompt_type="universal"
+            raw_response = await run_io(
+                compressor.get_or_update_atlas_stats, user_id, prompt_type="universal"
             )
     except Exception as e:
         logger.error(f"Atlas insights failed for user {user_id}: {e}", exc_info=True)
@@ -48,7 +48,7 @@ async def get_atlas_insights(current_user: dict = Depends(get_current_user)):
         parsed = json.loads(cleaned)
     except (json.JSONDecodeError, AttributeError) as e:
         logger.error(f"Atlas response was not valid JSON for user {user_id}: {e}")
-        _clear_atlas_cache(user_id)
+        await run_io(_clear_atlas_cache, user_id)
         raise HTTPException(
             status_code=500,
             detail="Atlas response was malformed (invalid JSON). Cache cleared — please retry.",
@@ -59,7 +59,7 @@ async def get_atlas_insights(current_user: dict = Depends(get_current_user)):
             f"Atlas response missing required keys for user {user_id}. "
             f"Got keys: {list(parsed.keys())}"
         )
-        _clear_atlas_cache(user_id)
+        await run_io(_clear_atlas_cache, user_id)
         raise HTTPException(
             status_code=500,
             detail="Atlas response had unexpected structure. Cache cleared — please retry.",
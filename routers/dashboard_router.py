@@ -1,16 +1,10 @@
-from fastapi import APIRouter, Depends
-from boto3.dynamodb.conditions import Key
-from decimal import Decimal
+from fastapi import APIRouter, Depends, Request, Response
 
 from auth_dependency import get_current_user
-from db.dynamodb import (
-    get_daily_pnl_table,
-    get_dashboard_stats_table,
-    get_dashboard_session_performance_table,
-    get_dashboard_symbol_performance_table,
-    get_dashboard_daily_pnl_table,
-    get_dashboard_equity_curve_table
-)
+from services.snapshot_slots import asnapshot_partition
+from services.page_documents import aload_page_document
+from services.dashboard_page import abuild_dashboard_page
+from services.response_cache import cached_response
 
 
 router = APIRouter(
@@ -19,168 +13,25 @@ router = APIRouter(
 )
 
 
-def decimal_to_float(v):
-    if isinstance(v, Decimal):
-        return float(v)
-    return v
-
-
 @router.get("/page")
 async def get_dashboard_page(
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user)
 ):
 
     user_id = current_user["user_id"]
-
-    # ── Daily PnL ────────────────────────────────────────────────────────────
-    pnl_table = get_daily_pnl_table()
-
-    pnl_res = pnl_table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id),
-        ScanIndexForward=False,
-        Limit=30
-    )
-
-    daily_pnl = []
-
-    for item in pnl_res.get("Items", []):
-        pnl = decimal_to_float(item["pnl"])
-
-        if pnl > 0:
-            type_ = "profit"
-            value = f"+${abs(pnl):.2f}"
-        elif pnl < 0:
-            type_ = "loss"
-            value = f"-${abs(pnl):.2f}"
-        else:
-            type_ = "neutral"
-            value = "$0"
-
-        daily_pnl.append({
-            "date": item["date"],
-            "value": value,
-            "type": type_
-        })
-
-    # ── Stats Overview ────────────────────────────────────────────────────────
-    stats_table = get_dashboard_stats_table()
-
-    stats_res = stats_table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id),
-        ScanIndexForward=False,
-        Limit=1
-    )
-
-    stats_overview = None
-
-    if stats_res.get("Items"):
-        item = stats_res["Items"][0]
-        stats_overview = {
-            "net_pnl":      decimal_to_float(item["total_pnl"]),
-            "avg_rr":       decimal_to_float(item["avg_rr"]),
-            "profit_factor": decimal_to_float(item["profit_factor"]),
-            "avg_win":      decimal_to_float(item["avg_win"]),
-            "avg_loss":     decimal_to_float(item["avg_loss"]),
-            "win_rate":     decimal_to_float(item["win_rate"]),
-        }
-
-    # ── Session Performance ───────────────────────────────────────────────────
-    session_table = get_dashboard_session_performance_table()
-
-    session_res = session_table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id),
-        ScanIndexForward=True
-    )
-
-    session_performance = [
-        {
-            "session": item["session"],
-            "pnl":     decimal_to_float(item["pnl"]),
-            "trades":  int(item.get("trades", 0)),
-            "wins":    int(item.get("wins", 0)),
-            "losses":  int(item.get("losses", 0)),
-        }
-        for item in session_res.get("Items", [])
-    ]
-
-    # ── Symbol Performance ────────────────────────────────────────────────────
-    symbol_table = get_dashboard_symbol_performance_table()
-
-    symbol_res = symbol_table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id),
-        ScanIndexForward=True
+    return await cached_response(
+        user_id, "dashboard", lambda: _load_dashboard_page(user_id),
+        request=request, response=response,
     )
 
-    symbol_performance = [
-        {
-            "symbol":  item["symbol"],
-            "value":   decimal_to_float(item["net_pnl"]),
-            "percent": decimal_to_float(item["performance_percent"])
-        }
-        for item in symbol_res.get("Items", [])
-    ]
-
-    # ── Dashboard Daily PnL ───────────────────────────────────────────────────
-    dashboard_pnl_table = get_dashboard_daily_pnl_table()
-
-    dashboard_pnl_res = dashboard_pnl_table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id),
-        ScanIndexForward=True
-    )
-
-    dashboard_daily_pnl = [
-        {
-            "date":   item["date"],
-            "base":   decimal_to_float(item["base"]),
-            "profit": decimal_to_float(item["profit"]),
-            "loss":   decimal_to_float(item["loss"])
-        }
-        for item in dashboard_pnl_res.get("Items", [])
-    ]
-
-    # ── Dashboard Equity Curve ────────────────────────────────────────────────
-    equity_table = get_dashboard_equity_curve_table()
-
-    equity_res = equity_table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id),
-        ScanIndexForward=True
-    )
-
-    equity_curve = [
-        {
-            "date":   item["date"],
-            "equity": decimal_to_float(item["equity"])
-        }
-        for item in equity_res.get("Items", [])
-    ]
-
-    dashboard_equity = []
-    pivot_index = len(equity_curve) - 1
-    pivot_value = equity_curve[pivot_index]["equity"] if equity_curve else 0
 
-    for i, item in enumerate(equity_curve):
-        if i <= pivot_index:
-            dashboard_equity.append({
-                "date":       item["date"],
-                "history":    item["equity"],
-                "projection": pivot_value if i >= pivot_index else None
-            })
-        else:
-            dashboard_equity.append({
-                "date":       item["date"],
-                "history":    None,
-                "projection": pivot_value
-            })
+async def _load_dashboard_page(user_id: str) -> dict:
+    # Materialized at sync time; fall back to live queries if it is missing
+    document = await aload_page_document(user_id, "dashboard")
+    if document is not None:
+        return document
 
-    # ── Response ──────────────────────────────────────────────────────────────
-    return {
-        "status": "success",
-        "data": {
-            "daily_pnl":             daily_pnl,
-            "stats_overview":        stats_overview,
-            "session_performance":   session_performance,
-            "symbol_performance":    symbol_performance,
-            "dashboard_daily_pnl":   dashboard_daily_pnl,
-            "dashboard_equity_curve": dashboard_equity
-        }
-    }
\ No newline at end of file
+    partition = await asnapshot_partition(user_id)
+    return await abuild_dashboard_page(user_id, partition)
@@ -105,7 +105,7 @@ async def winprofx_partner_activate(
     now = datetime.utcnow().isoformat()
 
     # Find user by user_id passed in email field
-    response = table.get_item(
+    response = await table.aget_item(
         Key={"user_id": body.email}
     )
 
@@ -119,7 +119,7 @@ async def winprofx_partner_activate(
     if item.get("has_paid"):
         return {"status": "already_activated"}
 
-    table.update_item(
+    await table.aupdate_item(
         Key={"user_id": user_id},
         UpdateExpression="""
             SET has_paid = :p,
@@ -1,14 +1,32 @@
-from fastapi import APIRouter, Depends, Query
-from boto3.dynamodb.conditions import Key
+import json
+import base64
+import asyncio
+import logging
+from functools import reduce
+from fastapi import APIRouter, Depends, Query, Request, Response
+from boto3.dynamodb.conditions import Key, Attr
 from decimal import Decimal
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, List
 
 from auth_dependency import get_current_user
-from db.dynamodb import get_trades_table, get_strategies_table
+from db.dynamodb import (
+    get_trades_table,
+    get_strategies_table,
+    batch_get_items,
+    run_io,
+    TRADES_TIME_INDEX,
+)
+from services.page_documents import ainvalidate_page_document
+from services.response_cache import cached_response, abump_data_version
+from services.trade_search_index import resolve_tags, aload_search_index, refresh_search_index
+from services.unreviewed_trades import was_unreviewed, aadjust_unreviewed_count
+from services.strategy_stats import aapply_trade_change
 from fastapi import HTTPException
 from pydantic import BaseModel
 
+logger = logging.getLogger(__name__)
+
 
 router = APIRouter(
     prefix="/trades",
@@ -25,7 +43,10 @@ def decimal_to_native(v):
 
 
 class TradeTagUpdateRequest(BaseModel):
-    timestamp: int
+    # position_id is the trade's key; timestamp is a deprecated alias,
+    # resolved through the time index
+    position_id: Optional[int] = None
+    timestamp: Optional[int] = None
     strategy_ids: List[str]
 
 
@@ -33,8 +54,72 @@ class BulkTradeTagUpdateRequest(BaseModel):
     updates: List[TradeTagUpdateRequest]
 
 
+async def _strategy_map(user_id: str) -> dict:
+    return {
+        item["strategy_id"]: item["title"]
+        for item in await get_strategies_table().aquery_all(
+            Key("user_id").eq(user_id),
+            projection=["strategy_id", "title"],
+        )
+    }
+
+
+def _to_trade(item: dict, strategy_map: dict) -> dict:
+    raw_tags = item.get("tags", [])
+    resolved_tags = resolve_tags(raw_tags, strategy_map)
+
+    return {
+        "trade_id": item.get("position_id"),
+        "date": datetime.fromtimestamp(
+            decimal_to_native(item["timestamp"])
+        ).strftime("%Y-%m-%d"),
+        "symbol": item.get("symbol"),
+        "direction": item.get("direction"),
+        "entry": decimal_to_native(item.get("entry_price", 0)),
+        "exit": decimal_to_native(item.get("exit_price", 0)),
+        "size": decimal_to_native(item.get("volume", 0)),
+        "pnl": decimal_to_native(item.get("pnl", 0)),
+        "r": decimal_to_native(item.get("r_multiple", 0)),
+        "tags": resolved_tags,
+        "timestamp": decimal_to_native(item["timestamp"]),
+        "is_new": "unreviewed" in raw_tags,
+    }
+
+
+def _position_key(user_id: str, position_id: int) -> dict:
+    return {"user_id": user_id, "position_id": int(position_id)}
+
+
+async def _resolve_key(user_id: str, position_id=None, timestamp=None) -> dict:
+    """Primary key of a trade given its position_id, or its close timestamp.
+
+    Timestamps are deprecated as trade identifiers: positions closing in the
+    same second share one, and such a timestamp is rejected with 409.
+    """
+    if position_id is not None:
+        return _position_key(user_id, position_id)
+    if timestamp is None:
+        raise HTTPException(status_code=400, detail="position_id or timestamp is required")
+
+    items = await get_trades_table().aquery_all(
+        Key("user_id").eq(user_id) & Key("timestamp").eq(timestamp),
+        IndexName=TRADES_TIME_INDEX,
+        projection=["position_id"],
+    )
+    if not items:
+        raise HTTPException(status_code=404, detail="Trade not found")
+    if len(items) > 1:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{len(items)} trades closed at this timestamp; use position_id",
+        )
+    return _position_key(user_id, items[0]["position_id"])
+
+
 @router.get("/")
 async def get_trades(
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_user),
     search: Optional[str] = Query(None, description="Search by symbol, direction, or tags"),
     symbol: Optional[str] = Query(None, description="Filter by specific symbol"),
@@ -48,66 +133,56 @@ async def get_trades(
     tag: Optional[str] = Query(None, description="Filter by tag")
 ):
     user_id = current_user["user_id"]
-    table = get_trades_table()
-
-    strategies_table = get_strategies_table()
-    strategies_response = strategies_table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id)
-    )
-    strategy_map = {
-        item["strategy_id"]: item["title"]
-        for item in strategies_response.get("Items", [])
+    filters = {
+        "search": search, "symbol": symbol, "direction": direction,
+        "min_pnl": min_pnl, "max_pnl": max_pnl, "min_r": min_r, "max_r": max_r,
+        "start_date": start_date, "end_date": end_date, "tag": tag,
     }
-
-    response = table.query(
-        KeyConditionExpression=Key("user_id").eq(user_id),
-        ScanIndexForward=False
+    return await cached_response(
+        user_id, "trades", lambda: _list_trades(user_id, **filters),
+        params=filters, request=request, response=response,
     )
 
-    items = response.get("Items", [])
-    trades = []
 
-    for item in items:
-        raw_tags = item.get("tags", [])
-
-        resolved_tags = []
-        for t in raw_tags:
-            if t == "unreviewed":
-               
-                continue
-            if t.startswith("strategy#"):
-                strategy_id = t.replace("strategy#", "")
-                resolved_tags.append(strategy_map.get(strategy_id, t))
-            else:
-                resolved_tags.append(t)
-
-        trade = {
-            "trade_id": item.get("position_id"),
-            "date": datetime.fromtimestamp(
-                decimal_to_native(item["timestamp"])
-            ).strftime("%Y-%m-%d"),
-            "symbol": item.get("symbol"),
-            "direction": item.get("direction"),
-            "entry": decimal_to_native(item.get("entry_price", 0)),
-            "exit": decimal_to_native(item.get("exit_price", 0)),
-            "size": decimal_to_native(item.get("volume", 0)),
-            "pnl": decimal_to_native(item.get("pnl", 0)),
-            "r": decimal_to_native(item.get("r_multiple", 0)),
-            "tags": resolved_tags,
-            "timestamp": decimal_to_native(item["timestamp"]),
-            "is_new": "unreviewed" in raw_tags,  
-        }
+async def _each(items):
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
 
-        should_include = True
 
-        if search:
-            search_lower = search.lower()
-            symbol_match = trade["symbol"] and search_lower in trade["symbol"].lower()
-            direction_match = trade["direction"] and search_lower in trade["direction"].lower()
-            tag_match = any(search_lower in t.lower() for t in resolved_tags)
+async def _list_trades(
+    user_id: str,
+    search=None, symbol=None, direction=None,
+    min_pnl=None, max_pnl=None, min_r=None, max_r=None,
+    start_date=None, end_date=None, tag=None,
+) -> dict:
+    table = get_trades_table()
 
-            if not (symbol_match or direction_match or tag_match):
-                should_include = False
+    if search:
+        # Only the trades the search index matched are fetched, by key
+        index = await aload_search_index(user_id)
+        strategy_map = index.strategy_map
+        items = await run_io(
+            batch_get_items, table,
+            [_position_key(user_id, pid) for _, pid in index.search(search)],
+        )
+    else:
+        strategy_map = await _strategy_map(user_id)
+        # Streamed page by page; only matching trades are kept
+        items = table.aquery_items(
+            Key("user_id").eq(user_id), IndexName=TRADES_TIME_INDEX, ScanIndexForward=False
+        )
+
+    trades = []
+
+    async for item in _each(items):
+        trade = _to_trade(item, strategy_map)
+        resolved_tags = trade["tags"]
+
+        should_include = True
 
         if symbol and should_include:
             if not trade["symbol"] or trade["symbol"].upper() != symbol.upper():
@@ -157,6 +232,213 @@ async def get_trades(
     }
 
 
+TRADES_PAGE_MAX_LIMIT = 200
+
+
+def _encode_cursor(trade: dict) -> str:
+    # Timestamps can repeat, so the position breaks ties
+    raw = json.dumps({"ts": int(trade["timestamp"]), "pid": int(trade["trade_id"])}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    """(timestamp, position_id) of the last trade on the previous page."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        return int(data["ts"]), int(data["pid"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _day_bounds(start_date, end_date):
+    # Same local-time day boundaries the "date" field is rendered with
+    try:
+        start = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp()) if start_date else 0
+        end = (
+            int((datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)).timestamp()) - 1
+            if end_date else 2 ** 40
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+    return start, end
+
+
+def _page_filter(strategy_map, symbols, direction, min_pnl, max_pnl, min_r, max_r, tag):
+    conditions = []
+    if symbols:
+        conditions.append(Attr("symbol").is_in(symbols))
+    if direction:
+        conditions.append(Attr("direction").eq(direction.upper()))
+    if min_pnl is not None:
+        conditions.append(Attr("pnl").gte(Decimal(str(min_pnl))))
+    if max_pnl is not None:
+        conditions.append(Attr("pnl").lte(Decimal(str(max_pnl))))
+    if min_r is not None:
+        conditions.append(Attr("r_multiple").gte(Decimal(str(min_r))))
+    if max_r is not None:
+        conditions.append(Attr("r_multiple").lte(Decimal(str(max_r))))
+    if tag:
+        # Tags are filtered by display name; strategies are stored by id
+        stored = [f"strategy#{sid}" for sid, title in strategy_map.items() if title == tag]
+        tag_condition = Attr("tags").contains(tag)
+        for value in stored:
+            tag_condition = tag_condition | Attr("tags").contains(value)
+        conditions.append(tag_condition)
+    if not conditions:
+        return None
+    return reduce(lambda a, b: a & b, conditions)
+
+
+@router.get("/page")
+async def get_trades_page(
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=TRADES_PAGE_MAX_LIMIT, description="Trades per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    search: Optional[str] = Query(None, description="Search by symbol, direction, or tags"),
+    symbol: Optional[str] = Query(None, description="Filter by specific symbol"),
+    direction: Optional[str] = Query(None, description="Filter by LONG or SHORT"),
+    min_pnl: Optional[float] = Query(None, description="Minimum P&L"),
+    max_pnl: Optional[float] = Query(None, description="Maximum P&L"),
+    min_r: Optional[float] = Query(None, description="Minimum R multiple"),
+    max_r: Optional[float] = Query(None, description="Maximum R multiple"),
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    tag: Optional[str] = Query(None, description="Filter by tag")
+):
+    """Newest-first trades, one limit-sized page per call.
+
+    The date range is part of the key condition and the other filters run
+    in DynamoDB, so a page costs the same however long the history is.
+    """
+    user_id = current_user["user_id"]
+    params = {
+        "limit": limit, "cursor": cursor, "search": search,
+        "symbol": symbol, "direction": direction,
+        "min_pnl": min_pnl, "max_pnl": max_pnl, "min_r": min_r, "max_r": max_r,
+        "start_date": start_date, "end_date": end_date, "tag": tag,
+    }
+    return await cached_response(
+        user_id, "trades_page", lambda: _trades_page(user_id, **params),
+        params=params, request=request, response=response,
+    )
+
+
+async def _trades_page(
+    user_id: str, limit: int, cursor=None, search=None,
+    symbol=None, direction=None,
+    min_pnl=None, max_pnl=None, min_r=None, max_r=None,
+    start_date=None, end_date=None, tag=None,
+) -> dict:
+    start, end = _day_bounds(start_date, end_date)
+    after = _decode_cursor(cursor) if cursor else None
+
+    if search:
+        return await _search_trades_page(
+            user_id, limit, start, end, after, search,
+            symbol, direction, min_pnl, max_pnl, min_r, max_r, tag,
+        )
+
+    strategy_map = await _strategy_map(user_id)
+    query = {
+        "IndexName": TRADES_TIME_INDEX,
+        "KeyConditionExpression": Key("user_id").eq(user_id) & Key("timestamp").between(start, end),
+        "ScanIndexForward": False,
+        "Limit": limit,
+    }
+    if after:
+        # Newest first: resume just past the last trade returned
+        query["ExclusiveStartKey"] = {
+            "user_id": user_id, "timestamp": after[0], "position_id": after[1],
+        }
+    symbols = None
+    if symbol:
+        # DynamoDB compares case-sensitively: match every stored spelling,
+        # plus the uppercase form MT5 normally uses
+        index = await aload_search_index(user_id)
+        symbols = sorted({symbol.upper(), *index.symbol_spellings(symbol)})
+    filter_expression = _page_filter(
+        strategy_map, symbols, direction, min_pnl, max_pnl, min_r, max_r, tag
+    )
+    if filter_expression is not None:
+        query["FilterExpression"] = filter_expression
+
+    table = get_trades_table()
+    trades = []
+    more = start <= end
+    # Limit caps items read before filtering, so keep reading until the page
+    # is full or the range is exhausted
+    while more and len(trades) < limit:
+        result = await table.aquery(**query)
+        trades.extend(_to_trade(item, strategy_map) for item in result.get("Items", []))
+        more = "LastEvaluatedKey" in result
+        if more:
+            query["ExclusiveStartKey"] = result["LastEvaluatedKey"]
+
+    has_more = more or len(trades) > limit
+    trades = trades[:limit]
+
+    return {
+        "status": "success",
+        "data": trades,
+        "count": len(trades),
+        "next_cursor": _encode_cursor(trades[-1]) if has_more and trades else None,
+    }
+
+
+def _page_match(trade, symbol, direction, min_pnl, max_pnl, min_r, max_r, tag) -> bool:
+    # _page_filter, applied to an already converted trade
+    return (
+        (not symbol or (trade["symbol"] or "").upper() == symbol.upper())
+        and (not direction or trade["direction"] == direction.upper())
+        and (min_pnl is None or trade["pnl"] >= min_pnl)
+        and (max_pnl is None or trade["pnl"] <= max_pnl)
+        and (min_r is None or trade["r"] >= min_r)
+        and (max_r is None or trade["r"] <= max_r)
+        and (not tag or tag in trade["tags"])
+    )
+
+
+async def _search_trades_page(
+    user_id, limit, start, end, after, search,
+    symbol, direction, min_pnl, max_pnl, min_r, max_r, tag,
+) -> dict:
+    index = await aload_search_index(user_id)
+    candidates = [
+        (ts, pid) for ts, pid in index.search(search)
+        if start <= ts <= end and (after is None or (ts, pid) < after)
+    ]
+
+    table = get_trades_table()
+    trades = []
+    position = 0
+    # Candidates are newest first; fetch them by key a page-worth at a time
+    # until the page is full
+    while position < len(candidates) and len(trades) < limit:
+        chunk = candidates[position:position + limit]
+        position += len(chunk)
+        items = await run_io(
+            batch_get_items, table, [_position_key(user_id, pid) for _, pid in chunk]
+        )
+        items.sort(key=lambda item: (item["timestamp"], item["position_id"]), reverse=True)
+        for item in items:
+            trade = _to_trade(item, index.strategy_map)
+            if _page_match(trade, symbol, direction, min_pnl, max_pnl, min_r, max_r, tag):
+                trades.append(trade)
+
+    has_more = position < len(candidates) or len(trades) > limit
+    trades = trades[:limit]
+
+    return {
+        "status": "success",
+        "data": trades,
+        "count": len(trades),
+        "next_cursor": _encode_cursor(trades[-1]) if has_more and trades else None,
+    }
+
+
 @router.put("/tags")
 async def update_trade_tags(
     request: TradeTagUpdateRequest,
@@ -165,24 +447,33 @@ async def update_trade_tags(
     table = get_trades_table()
     user_id = current_user["user_id"]
 
+    key = await _resolve_key(user_id, request.position_id, request.timestamp)
+
     try:
         new_tags = ["MT5 Trade"]
         for sid in request.strategy_ids:
             new_tags.append(f"strategy#{sid}")
 
-        table.update_item(
-            Key={
-                "user_id": user_id,
-                "timestamp": request.timestamp
-            },
-            UpdateExpression="SET tags = :tags",
-            ExpressionAttributeNames={"#ts": "timestamp"},
+        # Tagging a trade reviews it, dropping it from the unreviewed index
+        result = await table.aupdate_item(
+            Key=key,
+            UpdateExpression="SET tags = :tags REMOVE unreviewed_at",
             ExpressionAttributeValues={":tags": new_tags},
-            ConditionExpression="attribute_exists(#ts)"
+            ConditionExpression="attribute_exists(position_id)",
+            ReturnValues="ALL_OLD",
         )
+        old = result.get("Attributes", {})
+        await aapply_trade_change(user_id, old, {**old, "tags": new_tags})
+        if was_unreviewed(old):
+            await aadjust_unreviewed_count(user_id, -1)
+        # Strategy stats on the analytics page depend on tags
+        await ainvalidate_page_document(user_id, "analytics")
+        await abump_data_version(user_id, "edits")
+        refresh_search_index(user_id)
 
         return {
             "status": "success",
+            "position_id": key["position_id"],
             "timestamp": request.timestamp,
             "tags": new_tags
         }
@@ -191,46 +482,88 @@ async def update_trade_tags(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Tag updates in flight at once for one bulk request
+BULK_TAG_CONCURRENCY = 16
+
+
+async def _apply_bulk_tag(table, user_id: str, update: TradeTagUpdateRequest) -> dict:
+    result = {"position_id": update.position_id, "timestamp": update.timestamp}
+    try:
+        key = await _resolve_key(user_id, update.position_id, update.timestamp)
+        result["position_id"] = key["position_id"]
+
+        new_tags = ["MT5 Trade"]
+        for sid in update.strategy_ids:
+            new_tags.append(f"strategy#{sid}")
+
+        response = await table.aupdate_item(
+            Key=key,
+            UpdateExpression="SET tags = :tags REMOVE unreviewed_at",
+            ExpressionAttributeValues={":tags": new_tags},
+            ConditionExpression="attribute_exists(position_id)",
+            ReturnValues="ALL_OLD",
+        )
+        old = response.get("Attributes", {})
+        await aapply_trade_change(user_id, old, {**old, "tags": new_tags})
+    except HTTPException as e:
+        return {**result, "status": "failed", "detail": e.detail}
+    except table.meta.client.exceptions.ConditionalCheckFailedException:
+        return {**result, "status": "failed", "detail": "Trade not found"}
+    except Exception as e:
+        return {**result, "status": "failed", "detail": str(e)}
+
+    return {
+        **result,
+        "status": "updated",
+        "reviewed": was_unreviewed(old),
+    }
+
+
 @router.put("/tags/bulk")
 async def bulk_update_trade_tags(
     request: BulkTradeTagUpdateRequest,
     current_user: dict = Depends(get_current_user)
 ):
+    """Apply every update independently and report each one's outcome.
+
+    Updates run concurrently (at most BULK_TAG_CONCURRENCY at a time); a
+    failed item does not stop the rest. Counters and caches are updated once
+    for whatever succeeded.
+    """
     table = get_trades_table()
     user_id = current_user["user_id"]
-    updated = []
+    semaphore = asyncio.Semaphore(BULK_TAG_CONCURRENCY)
 
-    try:
-        for update in request.updates:
-            new_tags = [""]
-            for sid in update.strategy_ids:
-                new_tags.append(f"strategy#{sid}")
-
-            table.update_item(
-                Key={
-                    "user_id": user_id,
-                    "timestamp": update.timestamp
-                },
-                UpdateExpression="SET tags = :tags",
-                ExpressionAttributeNames={"#ts": "timestamp"},
-                ExpressionAttributeValues={":tags": new_tags},
-                ConditionExpression="attribute_exists(#ts)"
-            )
-            updated.append(update.timestamp)
+    async def apply(update):
+        async with semaphore:
+            return await _apply_bulk_tag(table, user_id, update)
 
-        return {
-            "status": "success",
-            "updated_count": len(updated),
-            "timestamps": updated
-        }
+    results = await asyncio.gather(*(apply(update) for update in request.updates))
 
-    except Exception as e:
-        print(f"Bulk update error: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+    updated = [r for r in results if r["status"] == "updated"]
+    reviewed = sum(1 for r in updated if r.pop("reviewed"))
+
+    if updated:
+        await aadjust_unreviewed_count(user_id, -reviewed)
+        await ainvalidate_page_document(user_id, "analytics")
+        await abump_data_version(user_id, "edits")
+        refresh_search_index(user_id)
+
+    failed = len(results) - len(updated)
+    if failed:
+        logger.warning(f"Bulk update: {failed} of {len(results)} failed for user_id={user_id}")
+
+    return {
+        "status": "success" if not failed else ("partial" if updated else "failed"),
+        "updated_count": len(updated),
+        "failed_count": failed,
+        "timestamps": [r["timestamp"] for r in updated if r["timestamp"] is not None],
+        "results": results,
+    }
 
 
 class TradeNotesUpdateRequest(BaseModel):
-    timestamp: int
+    timestamp: Optional[int] = None
     entry_reason: Optional[str] = None
     exit_reason: Optional[str] = None
     mistakes: Optional[str] = None
@@ -238,17 +571,35 @@ class TradeNotesUpdateRequest(BaseModel):
     notes: Optional[str] = None
 
 
-@router.get("/{timestamp}/notes")
-async def get_trade_notes(
-    timestamp: int,
+NOTE_FIELDS = ("entry_reason", "exit_reason", "mistakes", "lessons_learned", "notes")
+
+
+@router.get("/position/{position_id}")
+async def get_trade(
+    position_id: int,
     current_user: dict = Depends(get_current_user)
 ):
     user_id = current_user["user_id"]
-    table = get_trades_table()
 
-    response = table.get_item(
-        Key={"user_id": user_id, "timestamp": timestamp}
+    item, strategy_map = await asyncio.gather(
+        get_trades_table().aget_item(Key=_position_key(user_id, position_id)),
+        _strategy_map(user_id),
     )
+    item = item.get("Item")
+    if not item:
+        raise HTTPException(status_code=404, detail="Trade not found")
+
+    return {
+        "status": "success",
+        "data": {
+            **_to_trade(item, strategy_map),
+            **{field: item.get(field, "") for field in NOTE_FIELDS},
+        }
+    }
+
+
+async def _read_notes(key: dict) -> dict:
+    response = await get_trades_table().aget_item(Key=key)
     item = response.get("Item")
     if not item:
         raise HTTPException(status_code=404, detail="Trade not found")
@@ -256,7 +607,8 @@ async def get_trade_notes(
     return {
         "status": "success",
         "data": {
-            "timestamp": timestamp,
+            "position_id": key["position_id"],
+            "timestamp": decimal_to_native(item["timestamp"]),
             "entry_reason":    item.get("entry_reason", ""),
             "exit_reason":     item.get("exit_reason", ""),
             "mistakes":        item.get("mistakes", ""),
@@ -266,31 +618,16 @@ async def get_trade_notes(
     }
 
 
-
-@router.put("/{timestamp}/notes")
-async def update_trade_notes(
-    timestamp: int,
-    request: TradeNotesUpdateRequest,
-    current_user: dict = Depends(get_current_user)
-):
-    user_id = current_user["user_id"]
+async def _write_notes(key: dict, request: TradeNotesUpdateRequest) -> dict:
     table = get_trades_table()
 
-    
     update_parts = []
-    expr_names = {"#ts": "timestamp"}
     expr_values = {}
 
-    fields = {
-        "entry_reason":    request.entry_reason,
-        "exit_reason":     request.exit_reason,
-        "mistakes":        request.mistakes,
-        "lessons_learned": request.lessons_learned,
-        "notes":           request.notes,
-    }
+    fields = {field: getattr(request, field) for field in NOTE_FIELDS}
 
     for field, value in fields.items():
-        if value is not None:              
+        if value is not None:
             placeholder = f":{field}"
             update_parts.append(f"{field} = {placeholder}")
             expr_values[placeholder] = value
@@ -301,30 +638,58 @@ async def update_trade_notes(
     update_expression = "SET " + ", ".join(update_parts)
 
     try:
-        table.update_item(
-            Key={"user_id": user_id, "timestamp": timestamp},
+        await table.aupdate_item(
+            Key=key,
             UpdateExpression=update_expression,
-            ExpressionAttributeNames=expr_names,
             ExpressionAttributeValues=expr_values,
-            ConditionExpression="attribute_exists(#ts)"
+            ConditionExpression="attribute_exists(position_id)"
         )
     except table.meta.client.exceptions.ConditionalCheckFailedException:
         raise HTTPException(status_code=404, detail="Trade not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    await abump_data_version(key["user_id"], "edits")
+    refresh_search_index(key["user_id"])
+
     return {
         "status": "success",
-        "timestamp": timestamp,
+        "position_id": key["position_id"],
         "updated_fields": list(fields.keys())
     }
 
 
+@router.get("/position/{position_id}/notes")
+async def get_position_notes(
+    position_id: int,
+    current_user: dict = Depends(get_current_user)
+):
+    return await _read_notes(_position_key(current_user["user_id"], position_id))
 
 
+@router.put("/position/{position_id}/notes")
+async def update_position_notes(
+    position_id: int,
+    request: TradeNotesUpdateRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    return await _write_notes(_position_key(current_user["user_id"], position_id), request)
 
 
+@router.get("/{timestamp}/notes", deprecated=True)
+async def get_trade_notes(
+    timestamp: int,
+    current_user: dict = Depends(get_current_user)
+):
+    key = await _resolve_key(current_user["user_id"], timestamp=timestamp)
+    return await _read_notes(key)
 
 
-
-
+@router.put("/{timestamp}/notes", deprecated=True)
+async def update_trade_notes(
+    timestamp: int,
+    request: TradeNotesUpdateRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    key = await _resolve_key(current_user["user_id"], timestamp=timestamp)
+    return {**await _write_notes(key, request), "timestamp": timestamp}
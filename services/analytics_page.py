@@ -0,0 +1,292 @@
+import asyncio
+from boto3.dynamodb.conditions import Key
+from decimal import Decimal
+from db.dynamodb import get_r_multiple_table
+from db.dynamodb import get_drawdown_curve_table
+from db.dynamodb import get_session_performance_table
+from db.dynamodb import get_strategies_table
+from db.dynamodb import get_strategy_stats_table
+from db.dynamodb import query_all
+from db.dynamodb import (
+    get_analytics_stats_table,
+    get_equity_curve_table,
+    get_pnl_weekly_table
+)
+
+
+def decimal_to_float(v):
+
+    if isinstance(v, Decimal):
+        return float(v)
+
+    return v
+
+
+def _page_queries(user_id: str, partition: str) -> list:
+    # (table, key condition, query options) for every query the page reads
+    return [
+        (get_analytics_stats_table(), Key("user_id").eq(partition), {"ScanIndexForward": False, "max_items": 1}),
+        (get_equity_curve_table(), Key("user_id").eq(partition), {"ScanIndexForward": True}),
+        (get_pnl_weekly_table(), Key("user_id").eq(partition), {"ScanIndexForward": True}),
+        (get_r_multiple_table(), Key("user_id").eq(partition), {"ScanIndexForward": True}),
+        (get_drawdown_curve_table(), Key("user_id").eq(partition), {"ScanIndexForward": True}),
+        (get_session_performance_table(), Key("user_id").eq(partition), {"ScanIndexForward": True}),
+        (get_strategies_table(), Key("user_id").eq(user_id), {}),
+        (get_strategy_stats_table(), Key("user_id").eq(user_id), {"projection": ["strategy_id", "trades"]}),
+    ]
+
+
+def _render_analytics_page(analytics_items, equity_items, pnl_items, r_items, drawdown_items, session_items, strategies, strategy_stats):
+    stats = None
+    behavior = None
+
+    if analytics_items:
+
+        item = analytics_items[0]
+
+        stats = {
+
+            "total_pnl":
+                decimal_to_float(item.get("total_pnl", 0)),
+
+            "total_trades":
+                decimal_to_float(item.get("total_trades", 0)),
+
+            "wins":
+                decimal_to_float(item.get("wins", 0)),
+
+            "losses":
+                decimal_to_float(item.get("losses", 0)),
+
+            "win_rate":
+                decimal_to_float(item.get("win_rate", 0)),
+
+            "profit_factor":
+                decimal_to_float(item.get("profit_factor", 0)),
+
+            "expectancy":
+                decimal_to_float(item.get("expectancy", 0)),
+
+            "avg_win":
+                decimal_to_float(item.get("avg_win", 0)),
+
+            "avg_loss":
+                decimal_to_float(item.get("avg_loss", 0)),
+
+            "snapshot_date":
+                item.get("snapshot_date"),
+        }
+
+        behavior = {
+
+            "avg_hold_time_minutes":
+                decimal_to_float(
+                    item.get("avg_hold_time_minutes", 0)
+                ),
+
+            "max_consecutive_losses":
+                decimal_to_float(
+                    item.get("max_consecutive_losses", 0)
+                ),
+
+            "best_trading_hour":
+                item.get("best_trading_hour"),
+
+            "overtrading_signals":
+                item.get("overtrading_signals"),
+
+            "revenge_trading_count":
+                decimal_to_float(
+                    item.get("revenge_trading_count", 0)
+                ),
+
+            "avg_volume":
+                decimal_to_float(
+                    item.get("avg_volume", 0)
+                ),
+        }
+
+    symbols_raw = item.get("symbols", {})
+
+    performance_by_symbol = []
+
+    for symbol, data in symbols_raw.items():
+
+        pnl = decimal_to_float(data.get("pnl", 0))
+
+        performance_by_symbol.append({
+
+            "symbol": symbol,
+
+            "profit": pnl if pnl > 0 else 0,
+
+            "loss": pnl if pnl < 0 else 0,
+
+            "trades":
+                decimal_to_float(
+                    data.get("trades", 0)
+                ),
+
+            "wins":
+                decimal_to_float(
+                    data.get("wins", 0)
+                ),
+
+            "losses":
+                decimal_to_float(
+                    data.get("losses", 0)
+                )
+        })
+
+
+    equity_curve = [
+
+        {
+
+            "timestamp": item["timestamp"],
+
+            "equity": decimal_to_float(item["equity"])
+        }
+
+        for item in equity_items
+    ]
+
+
+    pnl_by_week = [
+
+        {
+
+            "week": item["week_start"],
+
+            "pnl": decimal_to_float(item["pnl"])
+        }
+
+        for item in pnl_items
+    ]
+
+
+    r_multiple_distribution = [
+
+        {
+
+            "timestamp": item["timestamp"],
+
+            "value": float(item["r_multiple"]),
+
+            "baseline": 0
+        }
+
+        for item in r_items
+    ]
+
+
+    drawdown_curve = [
+
+        {
+
+            "timestamp": item["timestamp"],
+
+            "value":
+                decimal_to_float(item["drawdown"])
+        }
+
+        for item in drawdown_items
+    ]
+
+    
+
+
+    performance_by_session = [
+
+        {
+
+            "session": item["session"],
+
+            "pnl":
+                decimal_to_float(item["total_pnl"]),
+
+            "dd":
+                decimal_to_float(item["total_drawdown"]),
+
+            "trades":
+                item["trade_count"]
+        }
+
+        for item in session_items
+    ]
+
+
+    # Trade counts per strategy, maintained in UserStrategyStats
+    strategy_trade_counts = {
+        item["strategy_id"]: int(item.get("trades", 0))
+        for item in strategy_stats
+    }
+
+    strategy_distribution = []
+    total_trades_count = 0
+
+    for strategy in strategies:
+
+        sid = strategy["strategy_id"]
+
+        count = strategy_trade_counts.get(sid, 0)
+
+        total_trades_count += count
+
+        strategy_distribution.append({
+            "strategy_id": sid,
+            "name": strategy.get("title") or "Unnamed",
+            "trades": count
+        })
+
+   
+    for s in strategy_distribution:
+ 
+        s["percentage"] = (
+            round((s["trades"] / total_trades_count) * 100, 2)
+            if total_trades_count else 0
+        )
+
+    strategy_distribution.sort(
+        key=lambda x: x["trades"],
+        reverse=True
+    )
+
+
+    return {
+
+        "status": "success",
+
+        "data": {
+
+            "stats": stats,
+
+            "behavior": behavior,
+
+            "equity_curve": equity_curve,
+
+            "pnl_by_week": pnl_by_week,
+            "performance_by_symbol": performance_by_symbol,
+            "r_multiple_distribution": r_multiple_distribution,
+             "drawdown_curve": drawdown_curve,
+            "performance_by_session": performance_by_session,
+            "strategy_distribution": strategy_distribution
+        }
+    }
+
+
+def build_analytics_page(user_id: str, partition: str) -> dict:
+    """Build the page from the given snapshot partition (blocking)."""
+    return _render_analytics_page(*[
+        query_all(table, key, **options)
+        for table, key, options in _page_queries(user_id, partition)
+    ])
+
+
+async def abuild_analytics_page(user_id: str, partition: str) -> dict:
+    """Build the page with its independent queries run concurrently on the I/O pool."""
+    results = await asyncio.gather(*(
+        table.aquery_all(key, **options)
+        for table, key, options in _page_queries(user_id, partition)
+    ))
+    return _render_analytics_page(*results)
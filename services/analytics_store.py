@@ -1,33 +1,12 @@
 from datetime import datetime
 from decimal import Decimal
-from boto3.dynamodb.conditions import Key
 from db.dynamodb import get_analytics_stats_table
+from services.diff_writer import write_user_rows
 
 
 def save_user_analytics_stats(user_id: str, snapshot_date: str, analytics: dict):
     table = get_analytics_stats_table()
 
-    # Delete all existing rows for this user
-    items_to_delete = []
-    last_key = None
-    while True:
-        kwargs = {
-            "KeyConditionExpression": Key("user_id").eq(user_id),
-            "ProjectionExpression": "user_id, snapshot_date",
-        }
-        if last_key:
-            kwargs["ExclusiveStartKey"] = last_key
-        response = table.query(**kwargs)
-        items_to_delete.extend(response.get("Items", []))
-        last_key = response.get("LastEvaluatedKey")
-        if not last_key:
-            break
-
-    with table.batch_writer() as batch:
-        for item in items_to_delete:
-            batch.delete_item(
-                Key={"user_id": item["user_id"], "snapshot_date": item["snapshot_date"]})
-
     symbols_decimal = {
         symbol: {
             "pnl": Decimal(str(data.get("pnl", 0))),
@@ -38,7 +17,8 @@ def save_user_analytics_stats(user_id: str, snapshot_date: str, analytics: dict)
         for symbol, data in analytics.get("symbols", {}).items()
     }
 
-    table.put_item(Item={
+    # Replaces every other snapshot for this user
+    return write_user_rows(table, user_id, "snapshot_date", [{
         "user_id": user_id,
         "snapshot_date": snapshot_date,
         "total_pnl": Decimal(str(analytics.get("total_pnl", 0))),
@@ -58,4 +38,4 @@ def save_user_analytics_stats(user_id: str, snapshot_date: str, analytics: dict)
         "avg_volume": Decimal(str(analytics.get("avg_volume", 0))),
         "symbols": symbols_decimal,
         "created_at": datetime.utcnow().isoformat()
-    })
+    }])
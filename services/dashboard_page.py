@@ -0,0 +1,164 @@
+import asyncio
+from boto3.dynamodb.conditions import Key
+from decimal import Decimal
+from db.dynamodb import query_all
+from db.dynamodb import (
+    get_daily_pnl_table,
+    get_dashboard_stats_table,
+    get_dashboard_session_performance_table,
+    get_dashboard_symbol_performance_table,
+    get_dashboard_daily_pnl_table,
+    get_dashboard_equity_curve_table,
+)
+
+
+def decimal_to_float(v):
+    if isinstance(v, Decimal):
+        return float(v)
+    return v
+
+
+def _page_queries(user_id: str, partition: str) -> list:
+    # (table, key condition, query options) for every query the page reads
+    return [
+        (get_daily_pnl_table(), Key("user_id").eq(partition), {"ScanIndexForward": False, "max_items": 30}),
+        (get_dashboard_stats_table(), Key("user_id").eq(partition), {"ScanIndexForward": False, "max_items": 1}),
+        (get_dashboard_session_performance_table(), Key("user_id").eq(partition), {"ScanIndexForward": True}),
+        (get_dashboard_symbol_performance_table(), Key("user_id").eq(partition), {"ScanIndexForward": True}),
+        (get_dashboard_daily_pnl_table(), Key("user_id").eq(partition), {"ScanIndexForward": True}),
+        (get_dashboard_equity_curve_table(), Key("user_id").eq(partition), {"ScanIndexForward": True}),
+    ]
+
+
+def _render_dashboard_page(pnl_items, stats_items, session_items, symbol_items, dashboard_pnl_items, equity_items):
+    # ── Daily PnL ────────────────────────────────────────────────────────────
+
+    daily_pnl = []
+
+    for item in pnl_items:
+        pnl = decimal_to_float(item["pnl"])
+
+        if pnl > 0:
+            type_ = "profit"
+            value = f"+${abs(pnl):.2f}"
+        elif pnl < 0:
+            type_ = "loss"
+            value = f"-${abs(pnl):.2f}"
+        else:
+            type_ = "neutral"
+            value = "$0"
+
+        daily_pnl.append({
+            "date": item["date"],
+            "value": value,
+            "type": type_
+        })
+
+    # ── Stats Overview ────────────────────────────────────────────────────────
+
+    stats_overview = None
+
+    if stats_items:
+        item = stats_items[0]
+        stats_overview = {
+            "net_pnl":      decimal_to_float(item["total_pnl"]),
+            "avg_rr":       decimal_to_float(item["avg_rr"]),
+            "profit_factor": decimal_to_float(item["profit_factor"]),
+            "avg_win":      decimal_to_float(item["avg_win"]),
+            "avg_loss":     decimal_to_float(item["avg_loss"]),
+            "win_rate":     decimal_to_float(item["win_rate"]),
+        }
+
+    # ── Session Performance ───────────────────────────────────────────────────
+
+    session_performance = [
+        {
+            "session": item["session"],
+            "pnl":     decimal_to_float(item["pnl"]),
+            "trades":  int(item.get("trades", 0)),
+            "wins":    int(item.get("wins", 0)),
+            "losses":  int(item.get("losses", 0)),
+        }
+        for item in session_items
+    ]
+
+    # ── Symbol Performance ────────────────────────────────────────────────────
+
+    symbol_performance = [
+        {
+            "symbol":  item["symbol"],
+            "value":   decimal_to_float(item["net_pnl"]),
+            "percent": decimal_to_float(item["performance_percent"])
+        }
+        for item in symbol_items
+    ]
+
+    # ── Dashboard Daily PnL ───────────────────────────────────────────────────
+
+    dashboard_daily_pnl = [
+        {
+            "date":   item["date"],
+            "base":   decimal_to_float(item["base"]),
+            "profit": decimal_to_float(item["profit"]),
+            "loss":   decimal_to_float(item["loss"])
+        }
+        for item in dashboard_pnl_items
+    ]
+
+    # ── Dashboard Equity Curve ────────────────────────────────────────────────
+
+    equity_curve = [
+        {
+            "date":   item["date"],
+            "equity": decimal_to_float(item["equity"])
+        }
+        for item in equity_items
+    ]
+
+    dashboard_equity = []
+    pivot_index = len(equity_curve) - 1
+    pivot_value = equity_curve[pivot_index]["equity"] if equity_curve else 0
+
+    for i, item in enumerate(equity_curve):
+        if i <= pivot_index:
+            dashboard_equity.append({
+                "date":       item["date"],
+                "history":    item["equity"],
+                "projection": pivot_value if i >= pivot_index else None
+            })
+        else:
+            dashboard_equity.append({
+                "date":       item["date"],
+                "history":    None,
+                "projection": pivot_value
+            })
+
+    # ── Response ──────────────────────────────────────────────────────────────
+    return {
+        "status": "success",
+        "data": {
+            "daily_pnl":             daily_pnl,
+            "stats_overview":        stats_overview,
+            "session_performance":   session_performance,
+            "symbol_performance":    symbol_performance,
+            "dashboard_daily_pnl":   dashboard_daily_pnl,
+            "dashboard_equity_curve": dashboard_equity
+        }
+    }
+
+
+def build_dashboard_page(user_id: str, partition: str) -> dict:
+    """Build the page from the given snapshot partition (blocking)."""
+    return _render_dashboard_page(*[
+        query_all(table, key, **options)
+        for table, key, options in _page_queries(user_id, partition)
+    ])
+
+
+async def abuild_dashboard_page(user_id: str, partition: str) -> dict:
+    """Build the page with its independent queries run concurrently on the I/O pool."""
+    results = await asyncio.gather(*(
+        table.aquery_all(key, **options)
+        for table, key, options in _page_queries(user_id, partition)
+    ))
+    return _render_dashboard_page(*results)
@@ -1,7 +1,7 @@
 from decimal import Decimal
 from datetime import datetime
-from boto3.dynamodb.conditions import Key
 from db.dynamodb import get_dashboard_stats_table
+from services.diff_writer import write_user_rows
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,29 +10,6 @@ logger = logging.getLogger(__name__)
 def save_dashboard_stats(user_id: str, snapshot_date: str, analytics: dict):
     table = get_dashboard_stats_table()
 
-    # Delete all existing snapshots for this user
-    items_to_delete = []
-    last_key = None
-    while True:
-        kwargs = {
-            "KeyConditionExpression": Key("user_id").eq(user_id),
-            "ProjectionExpression": "user_id, snapshot_date",
-        }
-        if last_key:
-            kwargs["ExclusiveStartKey"] = last_key
-        response = table.query(**kwargs)
-        items_to_delete.extend(response.get("Items", []))
-        last_key = response.get("LastEvaluatedKey")
-        if not last_key:
-            break
-
-    with table.batch_writer() as batch:
-        for item in items_to_delete:
-            batch.delete_item(Key={
-                "user_id": item["user_id"],
-                "snapshot_date": item["snapshot_date"]
-            })
-
     wins = analytics.get("wins", 0)
     losses = analytics.get("losses", 0)
     avg_rr = round(analytics["avg_win"] / analytics["avg_loss"], 2) if losses > 0 else 0
@@ -51,5 +28,7 @@ def save_dashboard_stats(user_id: str, snapshot_date: str, analytics: dict):
         "updated_at": current_time,
     }
 
-    table.put_item(Item=item)
-    logger.info(f"Saved dashboard stats for user_id={user_id}, snapshot={snapshot_date}")
\ No newline at end of file
+    # Replaces every other snapshot for this user
+    stats = write_user_rows(table, user_id, "snapshot_date", [item])
+    logger.info(f"Saved dashboard stats for user_id={user_id}, snapshot={snapshot_date}")
+    return stats
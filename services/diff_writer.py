@@ -0,0 +1,76 @@
+import logging
+from boto3.dynamodb.conditions import Key
+from db.dynamodb import query_items
+from services.write_scheduler import get_write_scheduler
+from services.sync_write_batch import active_write_batch
+
+logger = logging.getLogger(__name__)
+
+# Attributes that change on every sync without the row's data changing
+VOLATILE_FIELDS = ("created_at", "updated_at")
+
+
+def _comparable(item: dict) -> dict:
+    return {k: v for k, v in item.items() if k not in VOLATILE_FIELDS}
+
+
+def _load_existing(table, user_id: str, sort_key: str) -> dict:
+    return {
+        item[sort_key]: item
+        for item in query_items(table, Key("user_id").eq(user_id))
+    }
+
+
+def write_user_rows(table, user_id: str, sort_key: str, rows: list) -> dict:
+    """Replace a user's rows in a derived table, writing only the difference.
+
+    Existing rows are read once and compared to the freshly computed ones
+    (ignoring VOLATILE_FIELDS). New or changed keys are put, keys that no
+    longer exist are deleted and identical rows are left alone.
+
+    Returns write stats, including how many writes were saved compared to
+    deleting every existing row and re-putting every new one.
+    """
+    existing = _load_existing(table, user_id, sort_key)
+
+    puts = []
+    new_keys = set()
+    for row in rows:
+        key = row[sort_key]
+        new_keys.add(key)
+        current = existing.get(key)
+        if current is None or _comparable(current) != _comparable(row):
+            puts.append(row)
+
+    deletes = [key for key in existing if key not in new_keys]
+
+    # Inside a sync the writes join the sync-wide batch and are sent when it
+    # is flushed; otherwise they go out now.
+    batch = active_write_batch()
+    if batch is not None:
+        for key in deletes:
+            batch.delete(table.name, {"user_id": user_id, sort_key: key})
+        for row in puts:
+            batch.put(table.name, {"user_id": user_id, sort_key: row[sort_key]}, row)
+    elif puts or deletes:
+        get_write_scheduler().write_batch(
+            table,
+            puts=puts,
+            delete_keys=[{"user_id": user_id, sort_key: key} for key in deletes],
+        )
+
+    full_rewrite_cost = len(existing) + len(rows)
+    stats = {
+        "table": table.name,
+        "rows": len(rows),
+        "puts": len(puts),
+        "deletes": len(deletes),
+        "unchanged": len(rows) - len(puts),
+        "writes_saved": full_rewrite_cost - len(puts) - len(deletes),
+    }
+
+    logger.info(
+        f"{table.name} user_id={user_id}: {stats['puts']} puts, {stats['deletes']} deletes, "
+        f"{stats['unchanged']} unchanged ({stats['writes_saved']} writes saved)"
+    )
+    return stats
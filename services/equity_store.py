@@ -1,67 +1,33 @@
 from decimal import Decimal
 import logging
-from boto3.dynamodb.conditions import Key
 from db.dynamodb import get_equity_curve_table
+from services.diff_writer import write_user_rows
 
 logger = logging.getLogger(__name__)
 
 
-def save_equity_curve(user_id: str, equity_curve: list):
-    if not equity_curve:
+def save_equity_curve(user_id: str, equity_points: list):
+    # An empty curve is still written: it clears the inactive snapshot slot,
+    # which would otherwise publish the rows from two syncs ago
+    if not equity_points:
         logger.warning(f"No equity curve data to save for user_id={user_id}")
-        return
 
     table = get_equity_curve_table()
 
-    # Delete all existing rows for this user
-    items_to_delete = []
-    last_key = None
-    while True:
-        kwargs = {
-            "KeyConditionExpression": Key("user_id").eq(user_id),
-            "ProjectionExpression": "user_id, #ts",
-            "ExpressionAttributeNames": {"#ts": "timestamp"},
+    # equity_points are already validated and de-duplicated by timestamp
+    rows = [
+        {
+            "user_id": user_id,
+            "timestamp": timestamp,
+            "equity": Decimal(str(equity)),
         }
-        if last_key:
-            kwargs["ExclusiveStartKey"] = last_key
-        response = table.query(**kwargs)
-        items_to_delete.extend(response.get("Items", []))
-        last_key = response.get("LastEvaluatedKey")
-        if not last_key:
-            break
-
-    with table.batch_writer() as batch:
-        for item in items_to_delete:
-            batch.delete_item(Key={"user_id": item["user_id"], "timestamp": item["timestamp"]})
-
-    seen_timestamps = set()
-    duplicate_count = 0
+        for timestamp, equity in equity_points
+    ]
 
     try:
-        with table.batch_writer() as batch:
-            for point in equity_curve:
-                try:
-                    timestamp = int(point["timestamp"])
-                    equity = Decimal(str(point["equity"]))
-                except (KeyError, ValueError, TypeError) as e:
-                    logger.error(f"Invalid equity point for user_id={user_id}: {point}, error={e}")
-                    continue
-
-                if timestamp in seen_timestamps:
-                    duplicate_count += 1
-                    continue
-
-                seen_timestamps.add(timestamp)
-                batch.put_item(Item={
-                    "user_id": user_id,
-                    "timestamp": timestamp,
-                    "equity": equity,
-                })
-
-        if duplicate_count > 0:
-            logger.warning(f"Removed {duplicate_count} duplicate equity points for user_id={user_id}")
-
-        logger.info(f"Successfully saved {len(seen_timestamps)} equity points for user_id={user_id}")
+        stats = write_user_rows(table, user_id, "timestamp", rows)
+        logger.info(f"Successfully saved {len(equity_points)} equity points for user_id={user_id}")
+        return stats
     except Exception as e:
         logger.exception(f"Failed to save equity curve for user_id={user_id}: {str(e)}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,46 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def merge_trades(stored_trades: list, fresh_trades: list) -> list:
+    """Merge freshly fetched closed positions into the stored trade history.
+
+    Positions are keyed on position_id; a fresh copy always wins, so trades
+    re-read through the overlap window replace their stored version. The
+    exception is a fallback risk estimate: it comes from the window's
+    losses only, so the stored risk_amount and r_multiple are kept.
+    """
+    merged = {int(t["position_id"]): t for t in stored_trades}
+
+    replaced = 0
+    for trade in fresh_trades:
+        position_id = int(trade["position_id"])
+        stored = merged.get(position_id)
+        if stored is not None:
+            replaced += 1
+            if trade.get("risk_estimated"):
+                trade = {**trade, "risk_amount": stored["risk_amount"], "r_multiple": stored["r_multiple"]}
+        merged[position_id] = trade
+
+    logger.info(
+        f"Merged {len(fresh_trades)} fresh trades into {len(stored_trades)} stored "
+        f"({replaced} replaced, {len(fresh_trades) - replaced} new)"
+    )
+
+    return sorted(merged.values(), key=lambda t: t["close_time"])
+
+
+def build_equity_curve(trades: list, starting_equity: float) -> list:
+    # Same running-equity walk as mt5_logic, seeded from the current account
+    current_equity = starting_equity
+    equity_curve = []
+
+    for trade in trades:
+        current_equity += float(trade["pnl"])
+        equity_curve.append({
+            "timestamp": trade["close_time"],
+            "equity": round(current_equity, 2)
+        })
+
+    return equity_curve
@@ -0,0 +1,80 @@
+import json
+import zlib
+import logging
+from decimal import Decimal
+from datetime import datetime
+from db.dynamodb import get_page_documents_table, run_io
+from services.response_cache import get_edits_version
+
+logger = logging.getLogger(__name__)
+
+# Pages materialized at sync time, one document per page per user
+PAGES = ("dashboard", "analytics", "reports")
+
+# Pages that also read user edits (strategy tags). Every document carries the
+# edits version it was built under, and these are only served while it is
+# still current: a sync could otherwise save one just after an edit's
+# invalidation, built from data read before the edit.
+EDIT_DEPENDENT_PAGES = ("analytics",)
+
+
+def _json_default(v):
+    if isinstance(v, Decimal):
+        return int(v) if v % 1 == 0 else float(v)
+    raise TypeError(f"Cannot serialize {type(v).__name__}")
+
+
+def _encode(body: dict) -> bytes:
+    raw = json.dumps(body, separators=(",", ":"), default=_json_default).encode()
+    return zlib.compress(raw, 6)
+
+
+def _decode(blob) -> dict:
+    # boto3 returns Binary attributes wrapped; .value is the raw bytes
+    return json.loads(zlib.decompress(getattr(blob, "value", blob)))
+
+
+def save_page_document(user_id: str, page: str, body: dict, version: str = None):
+    """Store a page built from data read after get_edits_version returned version."""
+    blob = _encode(body)
+    get_page_documents_table().put_item(Item={
+        "user_id": user_id,
+        "page": page,
+        "body": blob,
+        "version": version,
+        "built_at": datetime.utcnow().isoformat(),
+    })
+    logger.info(f"Saved {page} page document for user_id={user_id} ({len(blob)} bytes)")
+
+
+def load_page_document(user_id: str, page: str):
+    """Return the stored page response, or None when there is none or it is outdated."""
+    try:
+        item = get_page_documents_table().get_item(
+            Key={"user_id": user_id, "page": page}
+        ).get("Item")
+        if not item:
+            return None
+        if page in EDIT_DEPENDENT_PAGES and item.get("version") != get_edits_version(user_id):
+            logger.info(f"Outdated {page} page document for user_id={user_id}")
+            return None
+        return _decode(item["body"])
+    except Exception as e:
+        logger.warning(f"Could not load {page} page document for user_id={user_id}: {e}")
+        return None
+
+
+async def aload_page_document(user_id: str, page: str):
+    return await run_io(load_page_document, user_id, page)
+
+
+def invalidate_page_document(user_id: str, page: str):
+    # The page falls back to live queries until the next sync rebuilds it
+    try:
+        get_page_documents_table().delete_item(Key={"user_id": user_id, "page": page})
+    except Exception as e:
+        logger.warning(f"Could not invalidate {page} page document for user_id={user_id}: {e}")
+
+
+async def ainvalidate_page_document(user_id: str, page: str):
+    await run_io(invalidate_page_document, user_id, page)
@@ -1,33 +1,14 @@
 from datetime import datetime
 from decimal import Decimal
-from boto3.dynamodb.conditions import Key
 from db.dynamodb import get_performance_snapshots_table
+from services.diff_writer import write_user_rows
 
 
 def save_user_performance_snapshot(user_id: str, snapshot_date: str, data: dict):
     table = get_performance_snapshots_table()
 
-    # Delete all existing rows for this user
-    items_to_delete = []
-    last_key = None
-    while True:
-        kwargs = {
-            "KeyConditionExpression": Key("user_id").eq(user_id),
-            "ProjectionExpression": "user_id, snapshot_date",
-        }
-        if last_key:
-            kwargs["ExclusiveStartKey"] = last_key
-        response = table.query(**kwargs)
-        items_to_delete.extend(response.get("Items", []))
-        last_key = response.get("LastEvaluatedKey")
-        if not last_key:
-            break
-
-    with table.batch_writer() as batch:
-        for item in items_to_delete:
-            batch.delete_item(Key={"user_id": item["user_id"], "snapshot_date": item["snapshot_date"]})
-
-    table.put_item(Item={
+    # Replaces every other snapshot for this user
+    return write_user_rows(table, user_id, "snapshot_date", [{
         "user_id": user_id,
         "snapshot_date": snapshot_date,
         "symbols": {
@@ -42,4 +23,4 @@ def save_user_performance_snapshot(user_id: str, snapshot_date: str, data: dict)
         "total_trades": Decimal(data["total_trades"]),
         "total_pnl": Decimal(str(data["total_pnl"])),
         "created_at": datetime.utcnow().isoformat()
-    })
\ No newline at end of file
+    }])
@@ -1,36 +1,36 @@
 from decimal import Decimal
 from db.dynamodb import get_r_multiple_table
+from services.diff_writer import write_user_rows
 
 
 def save_r_multiples(user_id: str, trades: list):
 
     table = get_r_multiple_table()
 
-    with table.batch_writer(
-        overwrite_by_pkeys=["user_id", "timestamp"]  
-    ) as batch:
+    # Keyed on timestamp — the last trade closing at a given second wins,
+    # matching the old overwrite_by_pkeys batch behaviour
+    rows = {}
 
-        for trade in trades:
+    for trade in trades:
 
-            batch.put_item(
+        rows[trade["timestamp"]] = {
 
-                Item={
+            "user_id": user_id,
 
-                    "user_id": user_id,
+            "timestamp": trade["timestamp"],
 
-                    "timestamp": trade["timestamp"], 
+            "position_id": trade["position_id"],
 
-                    "position_id": trade["position_id"], 
+            "symbol": trade["symbol"],
 
-                    "symbol": trade["symbol"],
+            "r_multiple":
+                Decimal(str(trade["r_multiple"])),
 
-                    "r_multiple":
-                        Decimal(str(trade["r_multiple"])),
+            "pnl":
+                Decimal(str(trade["pnl"])),
 
-                    "pnl":
-                        Decimal(str(trade["pnl"])),
+            "risk_amount":
+                Decimal(str(trade["risk_amount"])),
+        }
 
-                    "risk_amount":
-                        Decimal(str(trade["risk_amount"])),
-                }
-            )
\ No newline at end of file
+    return write_user_rows(table, user_id, "timestamp", list(rows.values()))
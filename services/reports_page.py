@@ -0,0 +1,208 @@
+import asyncio
+from boto3.dynamodb.conditions import Key
+from decimal import Decimal
+from db.dynamodb import query_all
+from db.dynamodb import get_report_stats_table
+from db.dynamodb import get_report_symbol_summary_table
+from db.dynamodb import get_report_win_rate_table
+from db.dynamodb import get_report_overview_table
+
+
+def decimal_to_float(v):
+
+    if isinstance(v, Decimal):
+        return float(v)
+
+    return v
+
+
+def _page_queries(user_id: str, partition: str) -> list:
+    # (table, key condition, query options) for every query the page reads
+    return [
+        (get_report_stats_table(), Key("user_id").eq(partition), {"ScanIndexForward": False, "max_items": 1}),
+        (get_report_symbol_summary_table(), Key("user_id").eq(partition), {"ScanIndexForward": True}),
+        (get_report_win_rate_table(), Key("user_id").eq(partition), {"ScanIndexForward": True}),
+        (get_report_overview_table(), Key("user_id").eq(partition), {"ScanIndexForward": True}),
+    ]
+
+
+def _render_reports_page(items, summary_items, winrate_items, overview_items):
+    if not items:
+
+        return {
+            "status": "success",
+            "data": []
+        }
+
+    item = items[0]
+
+    total_pnl = decimal_to_float(item.get("total_pnl", 0))
+
+    total_trades =decimal_to_float(item.get("total_trades", 0))
+
+    win_rate = decimal_to_float(item.get("win_rate", 0))
+
+    profit_factor = decimal_to_float(item.get("profit_factor", 0))
+
+    expectancy = decimal_to_float(item.get("expectancy", 0))
+
+    data = [
+
+        {
+            "label": "Net PnL",
+
+            "value":
+                f"+${total_pnl:.2f}"
+                if total_pnl >= 0
+                else f"-${abs(total_pnl):.2f}",
+
+            "subLabel":
+                "Profitable"
+                if total_pnl >= 0
+                else "Loss",
+
+            "accent":
+                "green"
+                if total_pnl >= 0
+                else "red"
+        },
+
+        {
+            "label": "Win Rate",
+
+            "value":
+                f"{win_rate:.2f}%",
+
+            "subLabel":
+                f"{int(total_trades)} trades",
+
+            "accent":
+                "blue"
+        },
+
+        {
+            "label": "Profit Factor",
+
+            "value":
+                f"{profit_factor:.2f}",
+
+            "subLabel":
+                "Strong"
+                if profit_factor > 1
+                else "Weak",
+
+            "accent":
+                "green"
+                if profit_factor > 1
+                else "red"
+        },
+
+        {
+            "label": "Expectancy",
+
+            "value":
+                f"${expectancy:.2f}",
+
+            "subLabel":
+                "Per trade avg",
+
+            "accent":
+                "blue"
+        }
+    ]
+
+
+    summary = [
+
+        {
+
+            "symbol": item["symbol"],
+
+            "avg_volume":
+                decimal_to_float(item.get("avg_volume", 0)),
+
+            "avg_loss":
+                decimal_to_float(item.get("avg_loss", 0)),
+
+            "avg_win":
+                decimal_to_float(item.get("avg_win", 0)),
+
+            "net_pnl":
+                decimal_to_float(item.get("net_pnl", 0)),
+
+            "trades":
+                int(item.get("trades", 0)),
+
+            "win_rate":
+                decimal_to_float(item.get("win_rate", 0))
+        }
+
+        for item in summary_items
+    ]
+
+
+    win_rate_chart = [
+
+        {
+
+            "symbol": item["symbol"],
+
+            "period_start": item["period_start"],
+
+            "win_rate":
+                decimal_to_float(item["win_rate"]),
+
+            "trades":
+                item["trades"]
+        }
+
+        for item in winrate_items
+    ]
+    
+
+
+    overview_chart = [
+
+        {
+
+            "week": item["week_start"],
+
+            "pnl":
+                decimal_to_float(item["net_pnl"]),
+
+            "trades":
+                item["trade_count"]
+        }
+
+        for item in overview_items
+    ]
+
+
+    return {
+
+        "status": "success",
+
+        "data": {
+            "stats":data,
+            "summary":summary,
+            "win_rate_chart":win_rate_chart,
+            "overview_chart": overview_chart
+        }
+    }
+
+
+def build_reports_page(user_id: str, partition: str) -> dict:
+    """Build the page from the given snapshot partition (blocking)."""
+    return _render_reports_page(*[
+        query_all(table, key, **options)
+        for table, key, options in _page_queries(user_id, partition)
+    ])
+
+
+async def abuild_reports_page(user_id: str, partition: str) -> dict:
+    """Build the page with its independent queries run concurrently on the I/O pool."""
+    results = await asyncio.gather(*(
+        table.aquery_all(key, **options)
+        for table, key, options in _page_queries(user_id, partition)
+    ))
+    return _render_reports_page(*results)
@@ -1,8 +1,8 @@
 from decimal import Decimal
 from datetime import datetime
 import logging
-from boto3.dynamodb.conditions import Key
 from db.dynamodb import get_report_stats_table
+from services.diff_writer import write_user_rows
 
 logger = logging.getLogger(__name__)
 
@@ -10,29 +10,9 @@ logger = logging.getLogger(__name__)
 def save_user_report_stats(user_id: str, snapshot_date: str, analytics: dict):
     table = get_report_stats_table()
 
-    # Delete all existing rows for this user
-    items_to_delete = []
-    last_key = None
-    while True:
-        kwargs = {
-            "KeyConditionExpression": Key("user_id").eq(user_id),
-            "ProjectionExpression": "user_id, snapshot_date",
-        }
-        if last_key:
-            kwargs["ExclusiveStartKey"] = last_key
-        response = table.query(**kwargs)
-        items_to_delete.extend(response.get("Items", []))
-        last_key = response.get("LastEvaluatedKey")
-        if not last_key:
-            break
-
-    with table.batch_writer() as batch:
-        for item in items_to_delete:
-            batch.delete_item(
-                Key={"user_id": item["user_id"], "snapshot_date": item["snapshot_date"]})
-
     try:
-        table.put_item(Item={
+        # Replaces every other snapshot for this user
+        stats = write_user_rows(table, user_id, "snapshot_date", [{
             "user_id": user_id,
             "snapshot_date": snapshot_date,
             "total_pnl": Decimal(str(analytics.get("total_pnl", 0))),
@@ -41,10 +21,11 @@ def save_user_report_stats(user_id: str, snapshot_date: str, analytics: dict):
             "profit_factor": Decimal(str(analytics.get("profit_factor", 0))),
             "expectancy": Decimal(str(analytics.get("expectancy", 0))),
             "created_at": datetime.utcnow().isoformat()
-        })
+        }])
 
         logger.info(
             f"Report stats saved for user_id={user_id}, snapshot={snapshot_date}")
+        return stats
     except Exception as e:
         logger.exception(
             f"Failed to save report stats for user_id={user_id}: {str(e)}")
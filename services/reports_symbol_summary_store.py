@@ -1,8 +1,8 @@
 from decimal import Decimal
 from datetime import datetime
 import logging
-from boto3.dynamodb.conditions import Key
 from db.dynamodb import get_report_symbol_summary_table
+from services.diff_writer import write_user_rows
 
 logger = logging.getLogger(__name__)
 
@@ -10,58 +10,38 @@ logger = logging.getLogger(__name__)
 def save_user_report_symbol_summary(user_id: str, snapshot_date: str, analytics: dict):
     table = get_report_symbol_summary_table()
 
-    # Delete all existing rows for this user
-    items_to_delete = []
-    last_key = None
-    while True:
-        kwargs = {
-            "KeyConditionExpression": Key("user_id").eq(user_id),
-            "ProjectionExpression": "user_id, symbol",
-        }
-        if last_key:
-            kwargs["ExclusiveStartKey"] = last_key
-        response = table.query(**kwargs)
-        items_to_delete.extend(response.get("Items", []))
-        last_key = response.get("LastEvaluatedKey")
-        if not last_key:
-            break
-
-    with table.batch_writer() as batch:
-        for item in items_to_delete:
-            batch.delete_item(
-                Key={"user_id": item["user_id"], "symbol": item["symbol"]})
-
     symbols = analytics.get("symbols", {})
     if not symbols:
         logger.warning(f"No symbol summary for user_id={user_id}")
-        return
-
-    try:
-        with table.batch_writer() as batch:
-            for symbol, data in symbols.items():
-                trades = data.get("trades", 0)
-                wins = data.get("wins", 0)
-                losses = data.get("losses", 0)
-                pnl = data.get("pnl", 0)
-
-                avg_win = pnl / wins if wins > 0 else 0
-                avg_loss = pnl / losses if losses > 0 else 0
-                win_rate = (wins / trades) * 100 if trades > 0 else 0
 
-                batch.put_item(Item={
-                    "user_id": user_id,
-                    "symbol": symbol,
-                    "avg_volume": Decimal(str(analytics.get("avg_volume", 0))),
-                    "avg_loss": Decimal(str(avg_loss)),
-                    "avg_win": Decimal(str(avg_win)),
-                    "net_pnl": Decimal(str(pnl)),
-                    "trades": int(trades),
-                    "win_rate": Decimal(str(round(win_rate, 2))),
-                    "snapshot_date": snapshot_date,
-                    "created_at": datetime.utcnow().isoformat()
-                })
+    rows = []
+    for symbol, data in symbols.items():
+        trades = data.get("trades", 0)
+        wins = data.get("wins", 0)
+        losses = data.get("losses", 0)
+        pnl = data.get("pnl", 0)
+
+        avg_win = pnl / wins if wins > 0 else 0
+        avg_loss = pnl / losses if losses > 0 else 0
+        win_rate = (wins / trades) * 100 if trades > 0 else 0
+
+        rows.append({
+            "user_id": user_id,
+            "symbol": symbol,
+            "avg_volume": Decimal(str(analytics.get("avg_volume", 0))),
+            "avg_loss": Decimal(str(avg_loss)),
+            "avg_win": Decimal(str(avg_win)),
+            "net_pnl": Decimal(str(pnl)),
+            "trades": int(trades),
+            "win_rate": Decimal(str(round(win_rate, 2))),
+            "snapshot_date": snapshot_date,
+            "created_at": datetime.utcnow().isoformat()
+        })
 
+    try:
+        stats = write_user_rows(table, user_id, "symbol", rows)
         logger.info(f"Saved report symbol summary for user_id={user_id}")
+        return stats
     except Exception as e:
         logger.exception(
             f"Failed saving symbol summary for user_id={user_id}: {str(e)}")
@@ -0,0 +1,216 @@
+import json
+import uuid
+import hashlib
+import logging
+from decimal import Decimal
+from db.redis_client import get_redis
+from db.dynamodb import run_io
+
+logger = logging.getLogger(__name__)
+
+# Cached responses are keyed on a per-user data version instead of a TTL.
+# The version is a Redis hash with one counter per kind of change: "sync" is
+# bumped when a sync publishes new data, "edits" when the user changes tags,
+# notes or strategies. An entry built under an older version is never served
+# as fresh, so invalidation is exact; ENTRY_TTL only bounds memory.
+VERSION_FIELDS = ("sync", "edits")
+
+# Random per-hash epoch, set when the hash is (re)created. Counters restart
+# at 0 after an eviction or flush; the new epoch keeps those versions (and
+# the ETags built from them) distinct from every one issued before.
+EPOCH_FIELD = "epoch"
+ENTRY_TTL = 7 * 24 * 60 * 60
+
+# Only one request rebuilds an outdated entry; requests arriving while it runs
+# get the outdated body (stale-while-revalidate) instead of piling onto DynamoDB
+REBUILD_LOCK_TTL = 30
+
+STATS_KEY = "cache:stats"
+STATS_OUTCOMES = ("hit", "stale", "miss", "not_modified")
+
+
+def _version_key(user_id: str) -> str:
+    return f"cache:ver:{user_id}"
+
+
+def _entry_key(user_id: str, route: str, params=None) -> str:
+    key = f"cache:resp:{user_id}:{route}"
+    params = {k: v for k, v in (params or {}).items() if v is not None}
+    if params:
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+        key = f"{key}:{digest}"
+    return key
+
+
+def _json_default(v):
+    if isinstance(v, Decimal):
+        return int(v) if v % 1 == 0 else float(v)
+    raise TypeError(f"Cannot serialize {type(v).__name__}")
+
+
+def _format_version(counters) -> str:
+    return ".".join(str(c or 0) for c in counters)
+
+
+def _with_epoch(user_id: str, values) -> list:
+    # values is (epoch, *counters) as read from the hash
+    if values[0] is None:
+        redis = get_redis()
+        redis.hsetnx(_version_key(user_id), EPOCH_FIELD, uuid.uuid4().hex[:12])
+        values = redis.hmget(_version_key(user_id), EPOCH_FIELD, *VERSION_FIELDS)
+    return values
+
+
+def get_data_version(user_id: str) -> str:
+    values = get_redis().hmget(_version_key(user_id), EPOCH_FIELD, *VERSION_FIELDS)
+    return _format_version(_with_epoch(user_id, values))
+
+
+def get_edits_version(user_id: str) -> str:
+    """The epoch and edits counter: the part of the version user edits move."""
+    epoch, _, edits = get_data_version(user_id).split(".")
+    return f"{epoch}.{edits}"
+
+
+def bump_data_version(user_id: str, field: str):
+    """Invalidate every cached response for the user."""
+    if field not in VERSION_FIELDS:
+        raise ValueError(f"Unknown data version field: {field}")
+    try:
+        get_redis().hincrby(_version_key(user_id), field, 1)
+    except Exception as e:
+        # Cached responses would outlive the change — worth shouting about
+        logger.error(f"Could not bump {field} version for user_id={user_id}: {e}")
+
+
+async def abump_data_version(user_id: str, field: str):
+    await run_io(bump_data_version, user_id, field)
+
+
+def etag_for(version: str) -> str:
+    # Strong validator: a body is only ever tagged with the version it was
+    # built under (or an older one), never a newer one
+    return f'"v{version}"'
+
+
+def _etag_matches(if_none_match, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _lookup(user_id: str, key: str):
+    pipe = get_redis().pipeline()
+    pipe.hmget(_version_key(user_id), EPOCH_FIELD, *VERSION_FIELDS)
+    pipe.get(key)
+    values, raw = pipe.execute()
+    return _format_version(_with_epoch(user_id, values)), (json.loads(raw) if raw else None)
+
+
+def _store(key: str, version: str, body):
+    get_redis().set(
+        key,
+        json.dumps({"version": version, "body": body}, default=_json_default),
+        ex=ENTRY_TTL,
+    )
+
+
+def _claim_rebuild(key: str) -> bool:
+    return bool(get_redis().set(f"{key}:rebuild", 1, nx=True, ex=REBUILD_LOCK_TTL))
+
+
+def _release_rebuild(key: str):
+    get_redis().delete(f"{key}:rebuild")
+
+
+def _record(route: str, outcome: str):
+    try:
+        get_redis().hincrby(STATS_KEY, f"{route}:{outcome}", 1)
+    except Exception:
+        pass
+
+
+async def cached_response(user_id: str, route: str, build, params=None, request=None, response=None):
+    """Return the cached body for (user, route, params), or await build().
+
+    build is a zero-argument coroutine function producing the response
+    body. Redis errors never fail the request — the body is built directly.
+
+    Given the route's request and response, the body is sent with an ETag
+    for the data version it was built under, and a request whose
+    If-None-Match still matches the current version gets a 304 without the
+    body being loaded or built.
+    """
+    # Imported here: Celery workers use this module for the version helpers
+    from fastapi import Response
+
+    key = _entry_key(user_id, route, params)
+    if_none_match = request.headers.get("if-none-match") if request is not None else None
+    try:
+        if if_none_match:
+            version = await run_io(get_data_version, user_id)
+            if _etag_matches(if_none_match, etag_for(version)):
+                await run_io(_record, route, "not_modified")
+                return Response(status_code=304, headers=_validator_headers(version))
+        version, entry = await run_io(_lookup, user_id, key)
+    except Exception as e:
+        logger.warning(f"Response cache unavailable for {route}: {e}")
+        return await build()
+
+    if entry is not None and entry["version"] == version:
+        await run_io(_record, route, "hit")
+        _tag(response, entry["version"])
+        return entry["body"]
+
+    try:
+        claimed = await run_io(_claim_rebuild, key)
+    except Exception:
+        claimed = False
+    if entry is not None and not claimed:
+        await run_io(_record, route, "stale")
+        _tag(response, entry["version"])
+        return entry["body"]
+
+    await run_io(_record, route, "miss")
+    try:
+        body = await build()
+    finally:
+        if claimed:
+            await run_io(_release_rebuild, key)
+
+    # Stored under the version read before building: if it moved in the
+    # meantime, the next request sees a mismatch and rebuilds
+    try:
+        await run_io(_store, key, version, body)
+    except Exception as e:
+        logger.warning(f"Could not cache {route} response: {e}")
+    _tag(response, version)
+    return body
+
+
+def _validator_headers(version: str) -> dict:
+    # no-cache: browsers keep the body but revalidate on every use
+    return {"ETag": etag_for(version), "Cache-Control": "private, no-cache"}
+
+
+def _tag(response, version: str):
+    if response is not None:
+        response.headers.update(_validator_headers(version))
+
+
+def cache_stats() -> dict:
+    """Outcome counts and hit rate per route, across all API workers.
+
+    not_modified (304) answers count as hits — nothing was built or sent.
+    """
+    raw = get_redis().hgetall(STATS_KEY)
+    routes = {}
+    for field, count in raw.items():
+        route, outcome = field.rsplit(":", 1)
+        routes.setdefault(route, dict.fromkeys(STATS_OUTCOMES, 0))[outcome] = int(count)
+    for counts in routes.values():
+        total = sum(counts.values())
+        served = counts["hit"] + counts["stale"] + counts["not_modified"]
+        counts["hit_rate"] = round(served / total, 4) if total else 0
+    return routes
@@ -0,0 +1,56 @@
+import logging
+from db.dynamodb import get_onboarding_table, run_io
+
+logger = logging.getLogger(__name__)
+
+# Derived tables (everything a sync rebuilds — not trades, journals or
+# strategies) hold two copies of each user's rows. Slot "a" is the original
+# user_id partition, slot "b" lives under "<user_id>#b". UserOnboarding's
+# snapshot_slot names the one readers use; a sync rewrites the other one and
+# flips the pointer only after every store succeeded, so pages never see a
+# half-written snapshot.
+SNAPSHOT_SLOTS = ("a", "b")
+DEFAULT_SLOT = "a"
+
+
+def slot_partition(user_id: str, slot: str) -> str:
+    return user_id if slot == DEFAULT_SLOT else f"{user_id}#{slot}"
+
+
+def active_snapshot_slot(user_id: str) -> str:
+    item = get_onboarding_table().get_item(
+        Key={"user_id": user_id},
+        ProjectionExpression="snapshot_slot",
+    ).get("Item") or {}
+    return item.get("snapshot_slot", DEFAULT_SLOT)
+
+
+def other_slot(slot: str) -> str:
+    return SNAPSHOT_SLOTS[1 - SNAPSHOT_SLOTS.index(slot)]
+
+
+def snapshot_partition(user_id: str) -> str:
+    """Partition key readers should query derived tables with."""
+    try:
+        return slot_partition(user_id, active_snapshot_slot(user_id))
+    except Exception as e:
+        logger.warning(f"Could not read snapshot slot for user_id={user_id}, using default: {e}")
+        return user_id
+
+
+async def asnapshot_partition(user_id: str) -> str:
+    return await run_io(snapshot_partition, user_id)
+
+
+def publish_condition(current_slot: str) -> tuple:
+    """ConditionExpression and values for flipping away from current_slot.
+
+    Added to the sync's final onboarding update, so the pointer only moves
+    if no other sync flipped it in the meantime.
+    """
+    if current_slot == DEFAULT_SLOT:
+        return (
+            "attribute_not_exists(snapshot_slot) OR snapshot_slot = :cur_slot",
+            {":cur_slot": current_slot},
+        )
+    return "snapshot_slot = :cur_slot", {":cur_slot": current_slot}
@@ -0,0 +1,304 @@
+import logging
+import time
+from decimal import Decimal
+from collections import defaultdict
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from db.dynamodb import (
+    get_strategy_stats_table,
+    get_strategy_points_table,
+    get_trades_table,
+    get_onboarding_table,
+    get_dynamodb_client,
+    query_all,
+    run_io,
+)
+from services.write_scheduler import get_write_scheduler
+
+logger = logging.getLogger(__name__)
+
+# One UserStrategyStats row per (user_id, strategy_id): trade count, wins,
+# losses, pnl and r_sum. The [timestamp, pnl] points the equity curve is
+# built from are separate UserStrategyPoints items (user_id, point_id =
+# "<strategy_id>#<position_id>"), so a row stays small however many trades
+# the strategy has. Tag edits and syncs move single trades in and out of a
+# strategy: the point and the row change in one transaction that is
+# conditional on the point being absent (or present), so repeating a move
+# never double-counts.
+STRATEGY_TAG = "strategy#"
+
+SUMMARY_FIELDS = ["strategy_id", "trades", "wins", "losses", "pnl", "r_sum"]
+
+# Bumped when the stored layout changes; users below it get a rebuild.
+# 2: points moved out of the stats rows into UserStrategyPoints.
+STRATEGY_STATS_VERSION = 2
+
+# UserOnboarding counter bumped before every move. A rebuild that sees it
+# change between its snapshot and the end of its writes may have
+# overwritten that move, so it starts over.
+GENERATION_FIELD = "strategy_stats_gen"
+REBUILD_ATTEMPTS = 3
+
+
+def strategy_ids(tags) -> set:
+    return {t[len(STRATEGY_TAG):] for t in tags or [] if t.startswith(STRATEGY_TAG)}
+
+
+def _point_id(strategy_id: str, position_id) -> str:
+    return f"{strategy_id}#{int(position_id)}"
+
+
+def _point_item(user_id: str, strategy_id: str, trade: dict) -> dict:
+    return {
+        "user_id": user_id,
+        "point_id": _point_id(strategy_id, trade["position_id"]),
+        "strategy_id": strategy_id,
+        "timestamp": int(trade["timestamp"]),
+        "pnl": Decimal(str(trade.get("pnl", 0))),
+    }
+
+
+def _contribution(trade: dict, sign: int) -> dict:
+    pnl = Decimal(str(trade.get("pnl", 0)))
+    return {
+        ":n": sign,
+        ":w": sign if pnl > 0 else 0,
+        ":l": sign if pnl < 0 else 0,
+        ":p": sign * pnl,
+        ":r": sign * Decimal(str(trade.get("r_multiple", 0))),
+    }
+
+
+def _stats_update(user_id: str, strategy_id: str, trade: dict, sign: int) -> dict:
+    return {"Update": {
+        "TableName": get_strategy_stats_table().name,
+        "Key": {"user_id": user_id, "strategy_id": strategy_id},
+        "UpdateExpression": "ADD trades :n, wins :w, losses :l, pnl :p, r_sum :r",
+        "ExpressionAttributeValues": _contribution(trade, sign),
+    }}
+
+
+def _transact(items: list):
+    # A failed point condition means the move already happened. Concurrent
+    # moves into one strategy (bulk tagging) contend on its row and are retried.
+    for attempt in range(5):
+        try:
+            get_dynamodb_client().transact_write_items(TransactItems=items)
+            return
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            reasons = [r.get("Code") for r in e.response.get("CancellationReasons", [])]
+            if "ConditionalCheckFailed" in reasons:
+                return
+            if "TransactionConflict" not in reasons or attempt == 4:
+                raise
+            time.sleep(0.05 * 2 ** attempt)
+
+
+def _bump_generation(user_id: str):
+    get_onboarding_table().update_item(
+        Key={"user_id": user_id},
+        UpdateExpression=f"ADD {GENERATION_FIELD} :one",
+        ExpressionAttributeValues={":one": 1},
+    )
+
+
+def _generation(user_id: str) -> int:
+    item = get_onboarding_table().get_item(
+        Key={"user_id": user_id},
+        ProjectionExpression=GENERATION_FIELD,
+        ConsistentRead=True,
+    ).get("Item", {})
+    return int(item.get(GENERATION_FIELD, 0))
+
+
+def _add(user_id: str, strategy_id: str, trade: dict):
+    _transact([
+        {"Put": {
+            "TableName": get_strategy_points_table().name,
+            "Item": _point_item(user_id, strategy_id, trade),
+            "ConditionExpression": "attribute_not_exists(point_id)",
+        }},
+        _stats_update(user_id, strategy_id, trade, 1),
+    ])
+
+
+def _remove(user_id: str, strategy_id: str, trade: dict):
+    _transact([
+        {"Delete": {
+            "TableName": get_strategy_points_table().name,
+            "Key": {"user_id": user_id, "point_id": _point_id(strategy_id, trade["position_id"])},
+            "ConditionExpression": "attribute_exists(point_id)",
+        }},
+        _stats_update(user_id, strategy_id, trade, -1),
+    ])
+
+
+def apply_trade_change(user_id: str, old: dict = None, new: dict = None):
+    """Move one trade between strategy rows after its tags or numbers changed.
+
+    old and new are the trade before and after (tags, position_id,
+    timestamp, pnl, r_multiple); either may be None. Rows for strategies
+    the trade left lose its contribution, rows it joined gain it; when its
+    numbers changed it is re-added everywhere.
+    """
+    old_ids = strategy_ids(old.get("tags")) if old else set()
+    new_ids = strategy_ids(new.get("tags")) if new else set()
+    changed = bool(old and new) and any(
+        Decimal(str(old.get(f, 0))) != Decimal(str(new.get(f, 0)))
+        for f in ("timestamp", "pnl", "r_multiple")
+    )
+    keep = set() if changed else old_ids & new_ids
+    if not (old_ids - keep or new_ids - keep):
+        return
+
+    # Before the moves, so a rebuild still writing when they land notices
+    _bump_generation(user_id)
+    for strategy_id in old_ids - keep:
+        _remove(user_id, strategy_id, old)
+    for strategy_id in new_ids - keep:
+        _add(user_id, strategy_id, new)
+
+
+async def aapply_trade_change(user_id: str, old: dict = None, new: dict = None):
+    # For request handlers: the edit itself already succeeded, and a missed
+    # stats move is corrected by the next rebuild
+    try:
+        await run_io(apply_trade_change, user_id, old, new)
+    except Exception as e:
+        logger.warning(f"Strategy stats update failed for user_id={user_id}: {e}")
+
+
+def rebuild_strategy_stats(user_id: str) -> int:
+    """Recompute every strategy row and point from the user's trades. Returns the row count.
+
+    Tag edits are not blocked meanwhile: when one lands between the
+    snapshot and the last write, the rebuild runs again from a fresh
+    snapshot, and raises after REBUILD_ATTEMPTS.
+    """
+    for attempt in range(REBUILD_ATTEMPTS):
+        generation = _generation(user_id)
+        count = _rebuild_once(user_id)
+        if _generation(user_id) == generation:
+            logger.info(f"Rebuilt {count} strategy stats rows for user_id={user_id}")
+            return count
+        logger.info(f"Strategy stats changed during rebuild for user_id={user_id}, retrying")
+    raise RuntimeError(f"Strategy stats kept changing during rebuild for user_id={user_id}")
+
+
+def _rebuild_once(user_id: str) -> int:
+    rows = defaultdict(lambda: {
+        "trades": 0, "wins": 0, "losses": 0,
+        "pnl": Decimal(0), "r_sum": Decimal(0),
+    })
+    points = {}
+    for trade in query_all(
+        get_trades_table(), Key("user_id").eq(user_id),
+        projection=["position_id", "timestamp", "pnl", "r_multiple", "tags"],
+    ):
+        contribution = _contribution(trade, 1)
+        for strategy_id in strategy_ids(trade.get("tags")):
+            row = rows[strategy_id]
+            row["trades"] += 1
+            row["wins"] += contribution[":w"]
+            row["losses"] += contribution[":l"]
+            row["pnl"] += contribution[":p"]
+            row["r_sum"] += contribution[":r"]
+            point = _point_item(user_id, strategy_id, trade)
+            points[point["point_id"]] = point
+
+    scheduler = get_write_scheduler()
+    table = get_strategy_stats_table()
+    stale = [
+        {"user_id": user_id, "strategy_id": item["strategy_id"]}
+        for item in query_all(table, Key("user_id").eq(user_id), projection=["strategy_id"])
+        if item["strategy_id"] not in rows
+    ]
+    # Full puts, which also drop the points map older rows carried
+    scheduler.write_batch(
+        table,
+        puts=[{"user_id": user_id, "strategy_id": sid, **row} for sid, row in rows.items()],
+        delete_keys=stale,
+    )
+
+    points_table = get_strategy_points_table()
+    stale_points = [
+        {"user_id": user_id, "point_id": item["point_id"]}
+        for item in query_all(points_table, Key("user_id").eq(user_id), projection=["point_id"])
+        if item["point_id"] not in points
+    ]
+    scheduler.write_batch(points_table, puts=list(points.values()), delete_keys=stale_points)
+    return len(rows)
+
+
+def equity_curve(points: list) -> list:
+    """[timestamp, cumulative pnl] per trade, oldest first."""
+    curve = []
+    total = 0.0
+    for timestamp, pnl in sorted((int(ts), float(pnl)) for ts, pnl in points or []):
+        total += pnl
+        curve.append([timestamp, round(total, 2)])
+    return curve
+
+
+def summarize(row: dict) -> dict:
+    """The per-strategy numbers /strategies has always returned."""
+    total = int(row.get("trades", 0))
+    return {
+        "trades":    total,
+        "wins":      int(row.get("wins", 0)),
+        "losses":    int(row.get("losses", 0)),
+        "win_rate":  round((int(row.get("wins", 0)) / total) * 100, 2) if total else 0,
+        "avg_rr":    round(float(row.get("r_sum", 0)) / total, 2) if total else 0,
+        "total_pnl": round(float(row.get("pnl", 0)), 2),
+    }
+
+
+def load_strategy_stats(user_id: str) -> dict:
+    """strategy_id -> stats row."""
+    return {
+        item["strategy_id"]: item
+        for item in query_all(
+            get_strategy_stats_table(), Key("user_id").eq(user_id),
+            projection=SUMMARY_FIELDS,
+        )
+    }
+
+
+def load_strategy_points(user_id: str, strategy_id: str) -> list:
+    """[timestamp, pnl] per trade in one strategy; reads only that strategy's points."""
+    return [
+        [item["timestamp"], item["pnl"]]
+        for item in query_all(
+            get_strategy_points_table(),
+            Key("user_id").eq(user_id) & Key("point_id").begins_with(f"{strategy_id}#"),
+            projection=["timestamp", "pnl"],
+        )
+    ]
+
+
+def rebuild_all_users():
+    """One-off backfill for every onboarded user."""
+    table = get_onboarding_table()
+    kwargs = {"ProjectionExpression": "user_id"}
+    while True:
+        response = table.scan(**kwargs)
+        for item in response.get("Items", []):
+            try:
+                rebuild_strategy_stats(item["user_id"])
+                table.update_item(
+                    Key={"user_id": item["user_id"]},
+                    UpdateExpression="SET strategy_stats_version = :v",
+                    ExpressionAttributeValues={":v": STRATEGY_STATS_VERSION},
+                )
+            except Exception as e:
+                logger.error(f"Strategy stats rebuild failed for user_id={item['user_id']}: {e}")
+        if not response.get("LastEvaluatedKey"):
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    rebuild_all_users()
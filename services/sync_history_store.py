@@ -0,0 +1,41 @@
+from decimal import Decimal
+from datetime import datetime
+import logging
+from db.dynamodb import get_sync_history_table
+
+logger = logging.getLogger(__name__)
+
+
+def _to_dynamo(value):
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {k: _to_dynamo(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [_to_dynamo(v) for v in value]
+    return value
+
+
+def save_sync_history(user_id: str, task_id: str, status: str, telemetry: dict | None,
+                      sync_mode: str | None = None, message: str | None = None):
+    """Record one finished sync (successful or not) with its telemetry."""
+    table = get_sync_history_table()
+
+    item = {
+        "user_id": user_id,
+        "synced_at": datetime.utcnow().isoformat(),
+        "task_id": task_id,
+        "status": status,
+        "telemetry": telemetry or {},
+    }
+    if sync_mode:
+        item["sync_mode"] = sync_mode
+    if message:
+        item["message"] = message
+
+    try:
+        table.put_item(Item=_to_dynamo(item))
+        logger.info(f"Saved sync history for user_id={user_id} task_id={task_id}")
+    except Exception as e:
+        # History is diagnostics only; never fail a sync over it
+        logger.error(f"Failed to save sync history for user_id={user_id}: {e}")
@@ -0,0 +1,65 @@
+import json
+import logging
+from db.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Safety net: a crashed worker can never hold a user's sync slot longer than this
+INFLIGHT_TTL = 60 * 60
+
+# Delete the in-flight key only if it still belongs to the finishing task
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _inflight_key(user_id: str) -> str:
+    return f"sync:inflight:{user_id}"
+
+
+def _rerun_key(user_id: str) -> str:
+    return f"sync:rerun:{user_id}"
+
+
+def claim_sync(user_id: str, task_id: str):
+    """Register task_id as the user's in-flight sync.
+
+    Returns None when the claim succeeded, or the task_id of the sync that
+    is already running for this user.
+    """
+    r = get_redis()
+    key = _inflight_key(user_id)
+    while True:
+        if r.set(key, task_id, nx=True, ex=INFLIGHT_TTL):
+            return None
+        existing = r.get(key)
+        if existing:
+            return existing
+        # Released between SET and GET — try to claim again
+
+
+def get_inflight_sync(user_id: str):
+    return get_redis().get(_inflight_key(user_id))
+
+
+def request_rerun(user_id: str, days=None, full_sync=False):
+    # Latest request wins; the finishing sync picks it up and re-dispatches
+    get_redis().set(
+        _rerun_key(user_id),
+        json.dumps({"days": days, "full_sync": full_sync}),
+        ex=INFLIGHT_TTL,
+    )
+
+
+def release_sync(user_id: str, task_id: str):
+    """Free the user's sync slot and return any pending re-run request."""
+    r = get_redis()
+    r.eval(_RELEASE_SCRIPT, 1, _inflight_key(user_id), task_id)
+    pipe = r.pipeline()
+    pipe.get(_rerun_key(user_id))
+    pipe.delete(_rerun_key(user_id))
+    pending, _ = pipe.execute()
+    return json.loads(pending) if pending else None
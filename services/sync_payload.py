@@ -0,0 +1,52 @@
+# Compact encoding for the data handed from the MT5 fetch stage to the
+# persist stage. Trades travel column-wise (field names once, then value
+# rows) and fields the persist stage can derive are dropped, which keeps
+# the broker message small for accounts with tens of thousands of trades.
+
+TRADE_FIELDS = (
+    "position_id", "symbol", "direction", "pnl", "open_time", "close_time",
+    "hold_time_minutes", "volume", "r_multiple", "risk_amount", "risk_estimated",
+    "entry_price", "exit_price",
+)
+
+
+def pack_trades(trades: list) -> dict:
+    return {
+        "fields": list(TRADE_FIELDS),
+        "rows": [[trade.get(f) for f in TRADE_FIELDS] for trade in trades],
+    }
+
+
+def unpack_trades(packed: dict) -> list:
+    fields = packed["fields"]
+    trades = []
+    for row in packed["rows"]:
+        trade = dict(zip(fields, row))
+        # Dropped in transit: both always mirror another field
+        trade["timestamp"] = trade["close_time"]
+        trade["trade_id"] = trade["position_id"]
+        trades.append(trade)
+    return trades
+
+
+def pack_fetch_result(result: dict) -> dict:
+    """Reduce a fetch_mt5_analytics result to what the persist stage reads."""
+    if result["status"] != "success":
+        return result
+
+    data = result["data"]
+    return {
+        "status": "success",
+        "incremental": data.get("incremental", False),
+        "starting_equity": data["starting_equity"],
+        "timings": data.get("timings", {}),
+        "deal_count": data.get("deal_count", 0),
+        "trades": pack_trades(data["trades"]),
+        "equity_vs_time": [
+            [point["timestamp"], point["equity"]] for point in data["equity_vs_time"]
+        ],
+    }
+
+
+def unpack_equity_curve(points: list) -> list:
+    return [{"timestamp": ts, "equity": equity} for ts, equity in points]
@@ -0,0 +1,167 @@
+import sys
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from db.dynamodb import get_dynamodb_client
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:  # Windows MT5 hosts
+    resource = None
+
+# The store save currently running; a ContextVar so writes the store hands
+# to the write scheduler's pool are still credited to it.
+_recorder = contextvars.ContextVar("sync_telemetry_recorder", default=None)
+_recorder_lock = threading.Lock()
+_hooks_installed = False
+_hooks_lock = threading.Lock()
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process so far, in MB."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    if sys.platform == "win32":
+        peak = _windows_peak_working_set()
+        return round(peak / (1024 * 1024), 1) if peak else None
+    return None
+
+
+def _windows_peak_working_set() -> int | None:
+    # GetProcessMemoryInfo via ctypes, so the MT5 hosts need no extra package
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        logger.warning(f"GetProcessMemoryInfo failed: {ctypes.WinError()}")
+        return None
+    return counters.PeakWorkingSetSize
+
+
+def _count_dynamodb_retries(parsed=None, **kwargs):
+    if not parsed:
+        return
+    retries = parsed.get("ResponseMetadata", {}).get("RetryAttempts", 0)
+    if retries:
+        record_retry(retries)
+
+
+def record_retry(count: int = 1):
+    """Credit retries to the store save running in this context."""
+    recorder = _recorder.get()
+    if recorder is not None:
+        with _recorder_lock:
+            recorder["retries"] += count
+
+
+def _install_hooks():
+    # botocore reports how often it retried each call (throttling included);
+    # credit those to whichever store save issued the call.
+    global _hooks_installed
+    with _hooks_lock:
+        if not _hooks_installed:
+            get_dynamodb_client().meta.events.register(
+                "after-call.dynamodb", _count_dynamodb_retries
+            )
+            _hooks_installed = True
+
+
+class SyncTelemetry:
+    """Timings and resource counters for one account sync.
+
+    Travels with the pipeline from stage to stage as a plain dict (see
+    as_dict/from_dict), so every stage adds to the same record.
+    """
+
+    def __init__(self, data: dict | None = None):
+        data = data or {}
+        self.stages = dict(data.get("stages", {}))
+        self.stores = dict(data.get("stores", {}))
+        self.counts = dict(data.get("counts", {}))
+        self.retries = data.get("retries", 0)
+        self.peak_rss_mb = data.get("peak_rss_mb")
+        self._lock = threading.Lock()
+        _install_hooks()
+
+    @classmethod
+    def from_dict(cls, data: dict | None):
+        return cls(data)
+
+    def as_dict(self) -> dict:
+        return {
+            "stages": self.stages,
+            "stores": self.stores,
+            "counts": self.counts,
+            "retries": self.retries,
+            "peak_rss_mb": self.peak_rss_mb,
+        }
+
+    def count(self, name: str, value: int):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + value
+
+    def add_retries(self, value: int):
+        if value:
+            with self._lock:
+                self.retries += value
+
+    def _sample_rss(self):
+        rss = peak_rss_mb()
+        if rss is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0, rss)
+
+    @contextmanager
+    def stage(self, name: str, **details):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = {"seconds": round(time.perf_counter() - start, 3)}
+            entry.update(details)
+            self.stages[name] = entry
+            self._sample_rss()
+
+    def run_store(self, name: str, fn, *args):
+        """Call a store's save function and record its time, writes and retries."""
+        recorder = {"retries": 0}
+        token = _recorder.set(recorder)
+        start = time.perf_counter()
+        try:
+            stats = fn(*args)
+        finally:
+            _recorder.reset(token)
+            entry = {
+                "seconds": round(time.perf_counter() - start, 3),
+                "retries": recorder["retries"],
+            }
+            with self._lock:
+                self.stores[name] = entry
+                self.retries += recorder["retries"]
+
+        if stats and "puts" in stats:
+            entry["items_written"] = stats["puts"] + stats["deletes"]
+            self.count("items_written", entry["items_written"])
+        return stats
@@ -0,0 +1,77 @@
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from services.write_scheduler import get_write_scheduler, BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+_active_batch = contextvars.ContextVar("sync_write_batch", default=None)
+
+
+class SyncWriteBatch:
+    """Collects the puts and deletes of every store in one sync.
+
+    Most derived tables only change by a handful of rows per sync, so writing
+    them table by table sends many part-filled BatchWriteItem calls. Queued
+    writes are instead flushed as full 25-item requests spanning tables.
+    A later write to the same key replaces an earlier one, since one request
+    may not touch a key twice.
+    """
+
+    def __init__(self):
+        self._requests = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._requests)
+
+    @staticmethod
+    def _slot(table_name: str, key: dict):
+        return table_name, tuple(sorted(key.items()))
+
+    def put(self, table_name: str, key: dict, item: dict):
+        with self._lock:
+            self._requests[self._slot(table_name, key)] = (
+                table_name, {"PutRequest": {"Item": item}}
+            )
+
+    def delete(self, table_name: str, key: dict):
+        with self._lock:
+            self._requests[self._slot(table_name, key)] = (
+                table_name, {"DeleteRequest": {"Key": key}}
+            )
+
+    def flush(self) -> dict:
+        """Send every queued write and return {"items", "requests"}."""
+        with self._lock:
+            requests = list(self._requests.values())
+            self._requests.clear()
+
+        if not requests:
+            return {"items": 0, "requests": 0}
+
+        scheduler = get_write_scheduler()
+        futures = [
+            scheduler.submit_store(scheduler.write_requests, requests[start:start + BATCH_SIZE])
+            for start in range(0, len(requests), BATCH_SIZE)
+        ]
+        calls = sum(future.result() for future in futures)
+
+        tables = len({table_name for table_name, _ in requests})
+        logger.info(f"Flushed {len(requests)} writes across {tables} tables in {calls} BatchWriteItem calls")
+        return {"items": len(requests), "requests": calls}
+
+
+def active_write_batch():
+    return _active_batch.get()
+
+
+@contextmanager
+def collect_writes(batch: SyncWriteBatch):
+    """Queue writes made in this context (and in store jobs it submits) on batch."""
+    token = _active_batch.set(batch)
+    try:
+        yield batch
+    finally:
+        _active_batch.reset(token)
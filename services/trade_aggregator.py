@@ -0,0 +1,212 @@
+from datetime import datetime, timedelta
+from collections import defaultdict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def session_for_hour(hour: int) -> str:
+    if 0 <= hour < 8:
+        return "Asia"
+    elif 8 <= hour < 16:
+        return "London"
+    else:
+        return "New York"
+
+
+def _calendar_keys(close_time, cache: dict):
+    """Decompose a close timestamp into (date, week_start, week_number, hour).
+
+    Date-derived strings are cached per calendar day, so each distinct day is
+    only formatted once no matter how many trades closed on it.
+    """
+    dt = datetime.fromtimestamp(close_time)
+    day = dt.date()
+    keys = cache.get(day)
+    if keys is None:
+        keys = (
+            day.strftime("%Y-%m-%d"),
+            (day - timedelta(days=day.weekday())).strftime("%Y-%m-%d"),
+            day.strftime("%Y-W%U"),
+        )
+        cache[day] = keys
+    return keys[0], keys[1], keys[2], dt.hour
+
+
+def aggregate_sync_data(mt5_data: dict) -> dict:
+    """Build every derived rollup for a sync in a single pass over the trades.
+
+    Returns a dict with:
+      summary      – account-level stats (the normalize_mt5_data output)
+      daily        – date -> pnl/trades/wins/losses
+      weekly       – Monday week_start -> pnl/trades
+      week_symbol  – "%Y-W%U#symbol" -> symbol/period_start/trades/wins/losses
+      sessions     – session -> pnl/trades/wins/losses/drawdown
+      symbols      – symbol -> pnl/trades/wins/losses
+      equity       – [(timestamp, equity)] de-duplicated by timestamp
+      drawdown     – [(timestamp, equity, peak, drawdown)]
+      equity_daily – date -> last equity of the day
+    """
+    trades = mt5_data.get("trades", [])
+    equity_curve = mt5_data.get("equity_vs_time", [])
+
+    symbols = defaultdict(lambda: {"pnl": 0.0, "trades": 0, "wins": 0, "losses": 0})
+    daily = defaultdict(lambda: {"pnl": 0.0, "trades": 0, "wins": 0, "losses": 0})
+    weekly = defaultdict(lambda: {"pnl": 0.0, "trades": 0})
+    week_symbol = {}
+    sessions = defaultdict(lambda: {
+        "pnl": 0.0, "trades": 0, "wins": 0, "losses": 0,
+        "equity": 0.0, "peak": 0.0, "drawdown": 0.0,
+    })
+    trading_hours = defaultdict(int)
+    calendar_cache = {}
+
+    total_pnl = 0.0
+    sum_wins = 0.0
+    sum_losses = 0.0
+    win_count = 0
+    loss_count = 0
+    total_hold = 0.0
+    total_volume = 0.0
+    consecutive_losses = 0
+    max_consecutive_losses = 0
+    revenge_trades = 0
+    last_trade_loss = False
+
+    # ---------------- TRADES (single pass) ----------------
+
+    for trade in trades:
+        pnl = float(trade["pnl"])
+        symbol = trade["symbol"]
+        is_win = pnl > 0
+
+        total_pnl += pnl
+        total_volume += trade.get("volume", 0)
+        total_hold += trade.get("hold_time_minutes", 0)
+
+        sym = symbols[symbol]
+        sym["pnl"] += pnl
+        sym["trades"] += 1
+
+        if is_win:
+            sym["wins"] += 1
+            win_count += 1
+            sum_wins += pnl
+            consecutive_losses = 0
+            last_trade_loss = False
+        else:
+            sym["losses"] += 1
+            loss_count += 1
+            sum_losses += abs(pnl)
+            consecutive_losses += 1
+            max_consecutive_losses = max(max_consecutive_losses, consecutive_losses)
+            if last_trade_loss:
+                revenge_trades += 1
+            last_trade_loss = True
+
+        close_time = trade.get("close_time")
+        if not close_time:
+            continue
+
+        date, week_start, week_number, hour = _calendar_keys(close_time, calendar_cache)
+
+        trading_hours[hour] += 1
+
+        day = daily[date]
+        day["pnl"] += pnl
+        day["trades"] += 1
+        day["wins" if is_win else "losses"] += 1
+
+        week = weekly[week_start]
+        week["pnl"] += pnl
+        week["trades"] += 1
+
+        period_key = f"{week_number}#{symbol}"
+        bucket = week_symbol.get(period_key)
+        if bucket is None:
+            bucket = {"symbol": symbol, "period_start": week_number,
+                      "trades": 0, "wins": 0, "losses": 0}
+            week_symbol[period_key] = bucket
+        bucket["trades"] += 1
+        bucket["wins" if is_win else "losses"] += 1
+
+        sess = sessions[session_for_hour(hour)]
+        sess["pnl"] += pnl
+        sess["trades"] += 1
+        sess["wins" if is_win else "losses"] += 1
+        sess["equity"] += pnl
+        if sess["equity"] > sess["peak"]:
+            sess["peak"] = sess["equity"]
+        if sess["peak"] - sess["equity"] > sess["drawdown"]:
+            sess["drawdown"] = sess["peak"] - sess["equity"]
+
+    # ---------------- EQUITY / DRAWDOWN (single pass) ----------------
+
+    equity = []
+    drawdown = []
+    equity_daily = {}
+    seen_timestamps = set()
+    duplicate_count = 0
+    peak = 0
+
+    for point in equity_curve:
+        try:
+            timestamp = int(point["timestamp"])
+            value = float(point["equity"])
+        except (KeyError, ValueError, TypeError) as e:
+            logger.error(f"Invalid equity point {point}: {e}")
+            continue
+
+        # Later points of the same day overwrite earlier ones
+        equity_daily[_calendar_keys(timestamp, calendar_cache)[0]] = value
+
+        if timestamp in seen_timestamps:
+            duplicate_count += 1
+            continue
+        seen_timestamps.add(timestamp)
+
+        if value > peak:
+            peak = value
+
+        equity.append((timestamp, point["equity"]))
+        drawdown.append((timestamp, value, peak, peak - value))
+
+    if duplicate_count > 0:
+        logger.warning(f"Removed {duplicate_count} duplicate equity points")
+
+    # ---------------- SUMMARY ----------------
+
+    total_trades = len(trades)
+    best_hour = max(trading_hours.items(), key=lambda x: x[1])[0] if trading_hours else None
+
+    summary = {
+        "total_trades": total_trades,
+        "total_pnl": round(total_pnl, 2),
+        "wins": win_count,
+        "losses": loss_count,
+        "win_rate": round((win_count / total_trades) * 100 if total_trades > 0 else 0, 2),
+        "profit_factor": round(sum_wins / sum_losses if sum_losses > 0 else 0, 2),
+        "expectancy": round(total_pnl / total_trades if total_trades > 0 else 0, 2),
+        "avg_win": round(sum_wins / win_count if win_count else 0, 2),
+        "avg_loss": round(sum_losses / loss_count if loss_count else 0, 2),
+        "avg_hold_time_minutes": round(total_hold / total_trades if total_trades else 0, 2),
+        "max_consecutive_losses": max_consecutive_losses,
+        "best_trading_hour": best_hour,
+        "overtrading_signals": "Detected" if total_trades > 20 else "None Detected",
+        "revenge_trading_count": revenge_trades,
+        "avg_volume": round(total_volume / total_trades if total_trades else 0, 2),
+        "symbols": dict(symbols),
+        "weekly_pnl": {week_start: data["pnl"] for week_start, data in weekly.items()},
+    }
+
+    return {
+        "summary": summary,
+        "daily": dict(daily),
+        "weekly": dict(weekly),
+        "week_symbol": week_symbol,
+        "sessions": dict(sessions),
+        "symbols": summary["symbols"],
+        "equity": equity,
+        "drawdown": drawdown,
+        "equity_daily": equity_daily,
+    }
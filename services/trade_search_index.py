@@ -0,0 +1,184 @@
+import os
+import json
+import zlib
+import base64
+import bisect
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Key
+from db.redis_client import get_redis
+from db.dynamodb import get_trades_table, get_strategies_table, query_all, run_io
+from services.response_cache import get_data_version
+
+logger = logging.getLogger(__name__)
+
+# Per-user index of the terms the trades search matches against (symbol,
+# direction and resolved tag names). Built at sync time and after tag edits,
+# stored in Redis and kept in a small LRU in each API worker. An index is
+# only used while the data version it was built under is current.
+INDEX_TTL = 7 * 24 * 60 * 60
+LOCAL_CACHE_SIZE = int(os.getenv("SEARCH_INDEX_CACHE_SIZE", "256"))
+
+# Rebuilds after tag edits run here, off the request
+_rebuild_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-index")
+
+
+def resolve_tags(raw_tags, strategy_map: dict) -> list:
+    """Display names for a trade's tags ("strategy#<id>" → strategy title)."""
+    resolved = []
+    for t in raw_tags:
+        if t == "unreviewed":
+            continue
+        if t.startswith("strategy#"):
+            strategy_id = t.replace("strategy#", "")
+            resolved.append(strategy_map.get(strategy_id, t))
+        else:
+            resolved.append(t)
+    return resolved
+
+
+class TradeSearchIndex:
+    """Inverted index from lowercased term to (timestamp, position_id) pairs.
+
+    Search is a substring match, like the original scan. Every suffix of
+    every term is kept sorted, so the terms containing a query are the ones
+    with a suffix starting with it — one bisect plus a short walk. Journals
+    have few distinct terms even with many trades, so this stays small.
+    """
+
+    def __init__(self, version: str, terms: dict, strategy_map: dict, symbols=()):
+        self.version = version
+        self.terms = terms
+        self.strategy_map = strategy_map
+        # Stored spellings, so filters can match symbols case-insensitively
+        self.symbols = sorted(symbols)
+        self._suffixes = sorted(
+            (term[i:], term) for term in terms for i in range(len(term))
+        )
+        self._suffix_keys = [suffix for suffix, _ in self._suffixes]
+
+    def matching_terms(self, query: str) -> set:
+        query = query.lower()
+        matched = set()
+        for i in range(bisect.bisect_left(self._suffix_keys, query), len(self._suffixes)):
+            suffix, term = self._suffixes[i]
+            if not suffix.startswith(query):
+                break
+            matched.add(term)
+        return matched
+
+    def search(self, query: str) -> list:
+        """(timestamp, position_id) of matching trades, newest first."""
+        trades = set()
+        for term in self.matching_terms(query):
+            trades.update(tuple(pair) for pair in self.terms[term])
+        return sorted(trades, reverse=True)
+
+    def symbol_spellings(self, symbol: str) -> list:
+        """Every stored spelling of symbol, ignoring case."""
+        return [s for s in self.symbols if s.upper() == symbol.upper()]
+
+    def dumps(self) -> str:
+        raw = json.dumps({
+            "version": self.version,
+            "terms": self.terms,
+            "strategies": self.strategy_map,
+            "symbols": self.symbols,
+        }, separators=(",", ":")).encode()
+        return base64.b64encode(zlib.compress(raw, 6)).decode()
+
+    @classmethod
+    def loads(cls, blob: str) -> "TradeSearchIndex":
+        data = json.loads(zlib.decompress(base64.b64decode(blob)))
+        return cls(data["version"], data["terms"], data["strategies"], data["symbols"])
+
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _remember(user_id: str, index: TradeSearchIndex):
+    with _local_lock:
+        _local[user_id] = index
+        _local.move_to_end(user_id)
+        while len(_local) > LOCAL_CACHE_SIZE:
+            _local.popitem(last=False)
+
+
+def _index_key(user_id: str) -> str:
+    # v2: postings are (timestamp, position_id) pairs; v3: stored symbols
+    return f"search:index:v3:{user_id}"
+
+
+def build_search_index(user_id: str) -> TradeSearchIndex:
+    # Version read first: edits landing mid-build make the index look outdated
+    version = get_data_version(user_id)
+    strategy_map = {
+        item["strategy_id"]: item["title"]
+        for item in query_all(
+            get_strategies_table(), Key("user_id").eq(user_id),
+            projection=["strategy_id", "title"],
+        )
+    }
+
+    terms = defaultdict(list)
+    symbols = set()
+    for item in query_all(
+        get_trades_table(), Key("user_id").eq(user_id),
+        projection=["position_id", "timestamp", "symbol", "direction", "tags"],
+    ):
+        trade = [int(item["timestamp"]), int(item["position_id"])]
+        if item.get("symbol"):
+            symbols.add(item["symbol"])
+        values = {item.get("symbol"), item.get("direction")}
+        values.update(resolve_tags(item.get("tags", []), strategy_map))
+        for value in values:
+            if value:
+                terms[value.lower()].append(trade)
+
+    index = TradeSearchIndex(version, dict(terms), strategy_map, symbols)
+    try:
+        get_redis().set(_index_key(user_id), index.dumps(), ex=INDEX_TTL)
+    except Exception as e:
+        logger.warning(f"Could not store search index for user_id={user_id}: {e}")
+    _remember(user_id, index)
+    logger.info(f"Built search index for user_id={user_id}: {len(terms)} terms")
+    return index
+
+
+def load_search_index(user_id: str) -> TradeSearchIndex:
+    """The user's current index: worker LRU, then Redis, else a fresh build."""
+    version = get_data_version(user_id)
+
+    with _local_lock:
+        index = _local.get(user_id)
+        if index is not None and index.version == version:
+            _local.move_to_end(user_id)
+            return index
+
+    blob = get_redis().get(_index_key(user_id))
+    if blob:
+        index = TradeSearchIndex.loads(blob)
+        if index.version == version:
+            _remember(user_id, index)
+            return index
+
+    return build_search_index(user_id)
+
+
+async def aload_search_index(user_id: str) -> TradeSearchIndex:
+    return await run_io(load_search_index, user_id)
+
+
+def _rebuild_quietly(user_id: str):
+    try:
+        build_search_index(user_id)
+    except Exception as e:
+        logger.warning(f"Search index rebuild failed for user_id={user_id}: {e}")
+
+
+def refresh_search_index(user_id: str):
+    """Rebuild in the background so the next search finds it ready."""
+    _rebuild_executor.submit(_rebuild_quietly, user_id)
@@ -0,0 +1,76 @@
+import logging
+from boto3.dynamodb.conditions import Key
+from db.dynamodb import (
+    get_trades_table,
+    get_legacy_trades_table,
+    get_onboarding_table,
+    query_all,
+)
+from services.write_scheduler import get_write_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_user_trades(user_id: str) -> int:
+    """Copy the user's UserTrades rows into the position-keyed trades table.
+
+    Idempotent: positions already in the new table are skipped, so edits
+    made there are never overwritten. Rows carrying the unreviewed tag get
+    unreviewed_at on the way. Returns the number of rows copied.
+    """
+    legacy = query_all(get_legacy_trades_table(), Key("user_id").eq(user_id))
+    if not legacy:
+        return 0
+
+    table = get_trades_table()
+    migrated = {
+        int(item["position_id"])
+        for item in query_all(table, Key("user_id").eq(user_id), projection=["position_id"])
+    }
+
+    copies = {}
+    skipped = 0
+    for item in legacy:
+        if "position_id" not in item:
+            skipped += 1
+            continue
+        position_id = int(item["position_id"])
+        # Duplicate legacy rows of one position: the first wins, as in the
+        # old merge
+        if position_id in migrated or position_id in copies:
+            continue
+        copy = {**item, "position_id": position_id}
+        if "unreviewed" in copy.get("tags", []) and "unreviewed_at" not in copy:
+            copy["unreviewed_at"] = copy["timestamp"]
+        copies[position_id] = copy
+
+    if copies:
+        get_write_scheduler().write_batch(table, puts=list(copies.values()))
+    if skipped:
+        logger.warning(f"Skipped {skipped} legacy trade rows without position_id for user_id={user_id}")
+    logger.info(f"Migrated {len(copies)} trades to position keys for user_id={user_id}")
+    return len(copies)
+
+
+def migrate_all_users():
+    """One-off backfill for every onboarded user; run before readers switch."""
+    table = get_onboarding_table()
+    kwargs = {"ProjectionExpression": "user_id"}
+    total = 0
+    while True:
+        response = table.scan(**kwargs)
+        for item in response.get("Items", []):
+            try:
+                total += migrate_user_trades(item["user_id"])
+            except Exception as e:
+                logger.error(f"Trade migration failed for user_id={item['user_id']}: {e}")
+        if not response.get("LastEvaluatedKey"):
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    logger.info(f"Trade migration finished: {total} rows copied")
+    return total
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    migrate_all_users()
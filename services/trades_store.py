@@ -1,108 +1,235 @@
 from decimal import Decimal
 import logging
 from boto3.dynamodb.conditions import Key
-from db.dynamodb import get_trades_table
+from db.dynamodb import get_trades_table, query_all, batch_get_items
+from services.write_scheduler import get_write_scheduler
+from services.sync_write_batch import active_write_batch
+from services.strategy_stats import strategy_ids, apply_trade_change
 
 logger = logging.getLogger(__name__)
 
 MIN_VALID_TIMESTAMP = 1577836800
 
-
-def save_user_trades(user_id: str, trades: list):
+# Attributes the sync owns. Everything else on a trade row (tags, notes,
+# entry_reason, strategy fields...) belongs to the user and is never written
+# by a sync.
+SYNC_FIELDS = (
+    "position_id", "timestamp", "symbol", "direction", "entry_price", "exit_price", "volume",
+    "pnl", "r_multiple", "risk_amount", "open_time", "close_time", "hold_time_minutes",
+)
+
+# Set once: when mt5_logic had to estimate the risk (no stop loss), the
+# estimate depends on the fetched window, so stored rows keep their value
+RISK_FIELDS = ("risk_amount", "r_multiple")
+
+
+def _to_native(v):
+    if isinstance(v, Decimal):
+        return int(v) if v % 1 == 0 else float(v)
+    return v
+
+
+def _load_trade_items(user_id: str, projection=None) -> list:
+    return query_all(get_trades_table(), Key("user_id").eq(user_id), projection=projection)
+
+
+def load_user_trades(user_id: str):
+    """Return the stored trades in the shape produced by mt5_logic.
+
+    Returns None when any stored row predates the close_time/open_time
+    attributes — those users need one full sync before incremental merges
+    can be trusted.
+    """
+    trades = []
+    for item in _load_trade_items(user_id):
+        if "close_time" not in item:
+            logger.info(f"Legacy trade rows found for user_id={user_id}, incremental merge unavailable")
+            return None
+
+        trades.append({
+            "position_id": int(item["position_id"]),
+            "trade_id": int(item["position_id"]),
+            "symbol": item.get("symbol"),
+            "direction": item.get("direction", "UNKNOWN"),
+            "pnl": float(item.get("pnl", 0)),
+            "open_time": _to_native(item.get("open_time")),
+            "close_time": int(item["close_time"]),
+            "timestamp": int(item["close_time"]),
+            "hold_time_minutes": float(item.get("hold_time_minutes", 0)),
+            "volume": float(item.get("volume", 0)),
+            "r_multiple": float(item.get("r_multiple", 0)),
+            "risk_amount": float(item.get("risk_amount", 0)),
+            "entry_price": float(item.get("entry_price", 0)),
+            "exit_price": float(item.get("exit_price", 0)),
+        })
+
+    return trades
+
+
+def _sync_attributes(trade: dict) -> dict:
+    return {
+        "position_id": int(trade["position_id"]),
+        # Close time; only the time index's sort key now, so positions closing
+        # in the same second no longer need distinct values
+        "timestamp": int(trade["timestamp"]),
+        "symbol": trade["symbol"],
+        "direction": trade.get("direction", "LONG"),
+        "entry_price": Decimal(str(trade.get("entry_price") or trade.get("entry") or 0)),
+        "exit_price": Decimal(str(trade.get("exit_price") or trade.get("exit") or 0)),
+        "volume": Decimal(str(trade["volume"])),
+        "pnl": Decimal(str(trade["pnl"])),
+        "r_multiple": Decimal(str(trade["r_multiple"])),
+        "risk_amount": Decimal(str(trade["risk_amount"])),
+        "open_time": int(trade["open_time"]) if trade.get("open_time") else None,
+        "close_time": int(trade.get("close_time") or trade["timestamp"]),
+        "hold_time_minutes": Decimal(str(trade.get("hold_time_minutes", 0))),
+    }
+
+
+def save_user_trades(user_id: str, trades: list, prune: bool = False):
+    """Upsert fetched trades into the user's stored trades by position_id.
+
+    Rows are keyed on position_id, so only the fetched positions are read
+    (by key). New positions are batch-written with default tags. Known
+    positions are updated only when a sync-owned attribute changed, and only
+    those attributes are set, so tags, notes and entry reasons survive every
+    sync. Stored positions missing from `trades` are left alone — incremental
+    syncs only carry recently closed positions, and a full fetch may be
+    cut short by the broker's history window. prune is only set for the
+    first full sync after the linked account changed: rows missing from it
+    belong to the old account and are deleted.
+
+    The returned stats also carry "unreviewed_delta", how much these writes
+    change the user's unreviewed trade count.
+    """
     table = get_trades_table()
 
-    # Step 1: Delete all existing trades for this user
-    try:
-        existing = table.query(
-            KeyConditionExpression=Key("user_id").eq(user_id),
-            ProjectionExpression="user_id, #ts",
-            ExpressionAttributeNames={"#ts": "timestamp"},
-        )
-
-        with table.batch_writer() as batch:
-            for item in existing.get("Items", []):
-                batch.delete_item(Key={
-                    "user_id": item["user_id"],
-                    "timestamp": item["timestamp"],
-                })
-
-        logger.info(f"Deleted {len(existing.get('Items', []))} existing trades for user_id={user_id}")
-
-    except Exception as e:
-        logger.error(f"Failed to delete existing trades for user_id={user_id}: {e}")
-        raise
-
-    # Step 2: If no new trades, stop here
     if not trades:
+        # Never prune on an empty fetch: a broker hiccup must not wipe the journal
         logger.warning(f"No trades to save for user_id={user_id}")
-        return
+        return {**_write_stats(table, 0, 0, 0), "unreviewed_delta": 0}
 
-    # Step 3: Write the fresh trades
-    seen_timestamps = {}
-    saved_count = 0
+    fetched = {}
+    estimated = set()
     skipped_invalid = 0
 
     for trade in trades:
         try:
-            timestamp = int(trade["timestamp"])
-            position_id = int(trade["position_id"])
-
-            if timestamp < MIN_VALID_TIMESTAMP:
-                logger.error(
-                    f"Skipping trade with suspicious timestamp {timestamp} "
-                    f"(position_id={position_id}) for user_id={user_id}"
-                )
-                skipped_invalid += 1
-                continue
-
-            if timestamp in seen_timestamps:
-                seen_timestamps[timestamp] += 1
-                timestamp = timestamp + seen_timestamps[timestamp]
-            else:
-                seen_timestamps[timestamp] = 0
-
-            table.update_item(
-                Key={
-                    "user_id": user_id,
-                    "timestamp": timestamp,
-                },
-                UpdateExpression="""
-                    SET position_id = :pid,
-                        symbol = :sym,
-                        direction = :dir,
-                        entry_price = :entry,
-                        exit_price = :exit,
-                        volume = :vol,
-                        pnl = :pnl,
-                        r_multiple = :r,
-                        risk_amount = :risk,
-                        tags = if_not_exists(tags, :default_tags)
-                """,
-                ExpressionAttributeValues={
-                    ":pid": position_id,
-                    ":sym": trade["symbol"],
-                    ":dir": trade.get("direction", "LONG"),
-                    ":entry": Decimal(str(
-                        trade.get("entry_price") or trade.get("entry") or 0
-                    )),
-                    ":exit": Decimal(str(
-                        trade.get("exit_price") or trade.get("exit") or 0
-                    )),
-                    ":vol": Decimal(str(trade["volume"])),
-                    ":pnl": Decimal(str(trade["pnl"])),
-                    ":r": Decimal(str(trade["r_multiple"])),
-                    ":risk": Decimal(str(trade["risk_amount"])),
-                    ":default_tags": ["unreviewed"],
-                }
-            )
-            saved_count += 1
-
+            attributes = _sync_attributes(trade)
         except Exception as e:
+            logger.error(f"Invalid trade data for user_id={user_id}, trade={trade}, error={e}")
+            skipped_invalid += 1
+            continue
+
+        if attributes["timestamp"] < MIN_VALID_TIMESTAMP:
             logger.error(
-                f"Invalid trade data for user_id={user_id}, trade={trade}, error={e}"
+                f"Skipping trade with suspicious timestamp {attributes['timestamp']} "
+                f"(position_id={attributes['position_id']}) for user_id={user_id}"
             )
+            skipped_invalid += 1
+            continue
+
+        fetched[attributes["position_id"]] = attributes
+        if trade.get("risk_estimated"):
+            estimated.add(attributes["position_id"])
+
+    existing = {
+        int(item["position_id"]): item
+        for item in batch_get_items(
+            table,
+            [{"user_id": user_id, "position_id": position_id} for position_id in fetched],
+            projection=SYNC_FIELDS + ("tags",),
+        )
+    }
+
+    new_items = []
+    updates = []
+
+    for position_id, attributes in fetched.items():
+        current = existing.get(position_id)
+        if current is None:
+            new_items.append({
+                "user_id": user_id,
+                **attributes,
+                "tags": ["unreviewed"],
+                "unreviewed_at": attributes["timestamp"],
+            })
+        else:
+            fields = [
+                f for f in SYNC_FIELDS
+                if f != "position_id" and not (position_id in estimated and f in RISK_FIELDS)
+            ]
+            if any(current.get(f) != attributes[f] for f in fields):
+                updates.append((current, {f: attributes[f] for f in fields}))
+
+    stale = _stale_trade_items(user_id, trades) if prune else []
+
+    batch = active_write_batch()
+    if batch is not None:
+        for item in new_items:
+            batch.put(table.name, {"user_id": user_id, "position_id": item["position_id"]}, item)
+        for item in stale:
+            batch.delete(table.name, {"user_id": user_id, "position_id": item["position_id"]})
+    elif new_items or stale:
+        get_write_scheduler().write_batch(
+            table,
+            puts=new_items,
+            delete_keys=[{"user_id": user_id, "position_id": item["position_id"]} for item in stale],
+        )
 
-    if skipped_invalid > 0:
-        logger.warning(f"Skipped {skipped_invalid} trades with invalid timestamps for user_id={user_id}")
+    for item in stale:
+        if strategy_ids(item.get("tags")):
+            apply_trade_change(user_id, item, None)
+
+    scheduler = get_write_scheduler()
+    for current, attributes in updates:
+        scheduler.run_write(
+            table.name,
+            table.update_item,
+            Key={"user_id": user_id, "position_id": int(current["position_id"])},
+            UpdateExpression="SET " + ", ".join(f"#{f} = :{f}" for f in attributes),
+            ExpressionAttributeNames={f"#{f}": f for f in attributes},
+            ExpressionAttributeValues={f":{f}": v for f, v in attributes.items()},
+        )
+
+        # Tagged trades whose numbers moved shift their strategies' stats
+        if strategy_ids(current.get("tags")):
+            apply_trade_change(user_id, current, {**current, **attributes})
 
-    logger.info(f"Successfully saved {saved_count} trades for user_id={user_id}")
\ No newline at end of file
+    if skipped_invalid > 0:
+        logger.warning(f"Skipped {skipped_invalid} invalid trades for user_id={user_id}")
+
+    logger.info(
+        f"Trades for user_id={user_id}: {len(new_items)} new, {len(updates)} updated, "
+        f"{len(trades) - len(new_items) - len(updates) - skipped_invalid} unchanged, "
+        f"{len(stale)} pruned"
+    )
+    return {
+        **_write_stats(table, len(trades), len(new_items) + len(updates), len(stale)),
+        "unreviewed_delta": len(new_items) - sum(1 for item in stale if "unreviewed_at" in item),
+    }
+
+
+def _stale_trade_items(user_id: str, trades: list) -> list:
+    """Stored rows whose position is not among the fetched trades."""
+    fetched = {int(trade["position_id"]) for trade in trades if trade.get("position_id") is not None}
+    return [
+        item
+        for item in _load_trade_items(
+            user_id,
+            projection=["position_id", "timestamp", "pnl", "r_multiple", "tags", "unreviewed_at"],
+        )
+        if int(item["position_id"]) not in fetched
+    ]
+
+
+def _write_stats(table, rows, puts, deletes):
+    # Same shape as diff_writer.write_user_rows
+    return {
+        "table": table.name,
+        "rows": rows,
+        "puts": puts,
+        "deletes": deletes,
+        "unchanged": rows - puts,
+        "writes_saved": rows - puts,
+    }
@@ -13,10 +13,12 @@ from db.dynamodb import (
     get_pnl_weekly_table,
     get_session_performance_table,
     get_strategies_table,
-    get_trades_table,
+    get_strategy_stats_table,
     get_atlas_stats_table,
     get_atlas_prompts_table,
+    query_all,
 )
+from services.snapshot_slots import snapshot_partition
 
 import logging
 logger = logging.getLogger("trading_data_compressor")
@@ -85,16 +87,12 @@ class TradingDataCompressor:
 
     # ─── DynamoDB helper ──────────────────────────────────────────────────────
 
-    def _q(self, get_table_fn, uid, limit=None, forward=True):
+    def _q(self, get_table_fn, uid, limit=None, forward=True, projection=None):
         try:
-            table = get_table_fn()
-            args = {
-                "KeyConditionExpression": Key("user_id").eq(uid),
-                "ScanIndexForward": forward,
-            }
-            if limit:
-                args["Limit"] = limit
-            return table.query(**args).get("Items", [])
+            return query_all(
+                get_table_fn(), Key("user_id").eq(uid),
+                max_items=limit, ScanIndexForward=forward, projection=projection,
+            )
         except Exception as e:
             logger.warning(f"DynamoDB query failed for {get_table_fn.__name__}: {e}")
             return []
@@ -130,7 +128,9 @@ class TradingDataCompressor:
     # ─── Payload builder ──────────────────────────────────────────────────────
 
     def get_llm_payload(self, user_id: str) -> dict:
-        stats_items = self._q(get_analytics_stats_table, user_id, limit=1, forward=False)
+        # Derived tables are read from the published snapshot slot
+        snapshot_uid = snapshot_partition(user_id)
+        stats_items = self._q(get_analytics_stats_table, snapshot_uid, limit=1, forward=False)
         s = stats_items[0] if stats_items else {}
 
         sym_raw = s.get("symbols", {})
@@ -140,25 +140,21 @@ class TradingDataCompressor:
             if v.get("pnl", 0) != 0
         }
 
-        eq_raw  = self._q(get_equity_curve_table,  user_id)
-        dd_raw  = self._q(get_drawdown_curve_table, user_id)
-        wk_raw  = [i["pnl"] for i in self._q(get_pnl_weekly_table, user_id)]
+        eq_raw  = self._q(get_equity_curve_table,  snapshot_uid)
+        dd_raw  = self._q(get_drawdown_curve_table, snapshot_uid)
+        wk_raw  = [i["pnl"] for i in self._q(get_pnl_weekly_table, snapshot_uid)]
 
-        sessions = self._q(get_session_performance_table, user_id)
+        sessions = self._q(get_session_performance_table, snapshot_uid)
         sess_compressed = {
             i["session"]: [i["total_pnl"], i.get("trade_count", 0)]
             for i in sessions
         }
 
         strats = self._q(get_strategies_table, user_id)
-        trades = self._q(get_trades_table,     user_id)
-
-        strat_counts: dict = {}
-        for t in trades:
-            for tag in t.get("tags", []):
-                if tag.startswith("strategy#"):
-                    sid = tag.split("#")[1]
-                    strat_counts[sid] = strat_counts.get(sid, 0) + 1
+        strat_counts = {
+            i["strategy_id"]: int(i.get("trades", 0))
+            for i in self._q(get_strategy_stats_table, user_id, projection=["strategy_id", "trades"])
+        }
 
         strat_dist = {
             st.get("title", "NA"): strat_counts.get(st["strategy_id"], 0)
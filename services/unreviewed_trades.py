@@ -0,0 +1,107 @@
+import logging
+from boto3.dynamodb.conditions import Key, Attr
+from botocore.exceptions import ClientError
+from db.dynamodb import get_trades_table, get_onboarding_table, query_all, run_io
+
+logger = logging.getLogger(__name__)
+
+# New trades carry unreviewed_at (= their timestamp) next to the "unreviewed"
+# tag. Only those rows appear in this sparse GSI on the trades table
+# (partition user_id, sort unreviewed_at, INCLUDE timestamp/symbol/pnl/volume/tags),
+# so listing them reads just the unreviewed rows. UserOnboarding keeps the
+# per-user unreviewed_count for the badge.
+UNREVIEWED_INDEX = "unreviewed-index"
+UNREVIEWED_FIELDS = ["position_id", "timestamp", "symbol", "pnl", "volume"]
+
+
+def list_unreviewed_trades(user_id: str) -> list:
+    """Unreviewed trades, newest first."""
+    return query_all(
+        get_trades_table(),
+        Key("user_id").eq(user_id),
+        IndexName=UNREVIEWED_INDEX,
+        ScanIndexForward=False,
+        projection=UNREVIEWED_FIELDS,
+    )
+
+
+def count_unreviewed_trades(user_id: str) -> int:
+    """Count unreviewed rows with a consistent read of the base table.
+
+    Reads the whole partition, so it only seeds a missing counter; the
+    sparse index would be cheaper but can lag writes made moments before.
+    """
+    kwargs = {
+        "KeyConditionExpression": Key("user_id").eq(user_id),
+        "FilterExpression": Attr("unreviewed_at").exists(),
+        "Select": "COUNT",
+        "ConsistentRead": True,
+    }
+    table = get_trades_table()
+    total = 0
+    while True:
+        response = table.query(**kwargs)
+        total += response.get("Count", 0)
+        if not response.get("LastEvaluatedKey"):
+            return total
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def seed_unreviewed_count(user_id: str) -> int:
+    """Create a missing unreviewed_count from the stored rows; returns the count.
+
+    Stored right away rather than with the sync's final update, so tag edits
+    made while the sync runs adjust it instead of being skipped.
+    """
+    count = count_unreviewed_trades(user_id)
+    try:
+        get_onboarding_table().update_item(
+            Key={"user_id": user_id},
+            UpdateExpression="SET unreviewed_count = :c",
+            ConditionExpression="attribute_not_exists(unreviewed_count)",
+            ExpressionAttributeValues={":c": count},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+    return count
+
+
+def get_unreviewed_count(user_id: str) -> int:
+    item = get_onboarding_table().get_item(
+        Key={"user_id": user_id},
+        ProjectionExpression="unreviewed_count",
+    ).get("Item") or {}
+    return max(int(item.get("unreviewed_count", 0)), 0)
+
+
+def adjust_unreviewed_count(user_id: str, delta: int):
+    if not delta:
+        return
+    try:
+        # Only once seeded: the first sync counts a user without a counter,
+        # and would skip seeding one an edit had already created
+        get_onboarding_table().update_item(
+            Key={"user_id": user_id},
+            UpdateExpression="ADD unreviewed_count :d",
+            ConditionExpression="attribute_exists(unreviewed_count)",
+            ExpressionAttributeValues={":d": delta},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            # Not seeded yet: the seeding count already sees this edit
+            return
+        logger.warning(f"Could not adjust unreviewed count for user_id={user_id}: {e}")
+    except Exception as e:
+        # The badge is off by delta until unreviewed_count is removed,
+        # which makes the next sync seed it again
+        logger.warning(f"Could not adjust unreviewed count for user_id={user_id}: {e}")
+
+
+async def aadjust_unreviewed_count(user_id: str, delta: int):
+    await run_io(adjust_unreviewed_count, user_id, delta)
+
+
+def was_unreviewed(old_attributes: dict) -> bool:
+    """Given the pre-update attributes of a tag edit, whether it cleared a review flag."""
+    return "unreviewed_at" in old_attributes or "unreviewed" in old_attributes.get("tags", [])
@@ -0,0 +1,270 @@
+import os
+import time
+import random
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+from db.dynamodb import get_dynamodb_client
+from services.sync_telemetry import record_retry
+
+logger = logging.getLogger(__name__)
+
+# Store save functions running at once across every sync in this process
+STORE_WORKERS = int(os.getenv("WRITE_SCHEDULER_WORKERS", "8"))
+
+# DynamoDB write requests in flight at once across every table
+MAX_INFLIGHT_WRITES = int(os.getenv("WRITE_SCHEDULER_MAX_INFLIGHT", "16"))
+
+# Items per second each table may absorb; override per table with
+# DYNAMO_TABLE_WRITE_RATES="UserTrades=200;UserEquityCurve=100"
+DEFAULT_TABLE_RATE = float(os.getenv("DYNAMO_TABLE_WRITE_RATE", "400"))
+TABLE_RATES = {
+    name.strip(): float(rate)
+    for name, _, rate in (
+        entry.partition("=") for entry in os.getenv("DYNAMO_TABLE_WRITE_RATES", "").split(";")
+    )
+    if name.strip() and rate
+}
+
+MAX_ATTEMPTS = int(os.getenv("WRITE_SCHEDULER_MAX_ATTEMPTS", "8"))
+BASE_BACKOFF = 0.05
+MAX_BACKOFF = 5.0
+
+# DynamoDB's limit for one BatchWriteItem call
+BATCH_SIZE = 25
+
+THROTTLE_ERRORS = (
+    "ProvisionedThroughputExceededException",
+    "ThrottlingException",
+    "RequestLimitExceeded",
+)
+
+
+class TokenBucket:
+    """Per-table write budget with additive-increase, multiplicative-decrease.
+
+    A throttled write halves the rate (never below a tenth of the configured
+    rate); every successful write wins a little of it back.
+    """
+
+    def __init__(self, rate: float):
+        self.max_rate = rate
+        self.min_rate = max(rate / 10, 1.0)
+        self.rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.throttles = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, cost: float):
+        # A batch costing more than the whole bucket waits for a full one
+        cost = min(cost, self.rate)
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                with self._lock:
+                    self._refill()
+                    if self._tokens >= cost:
+                        self._tokens -= cost
+                        return
+                    wait = (cost - self._tokens) / self.rate
+                time.sleep(wait)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def on_throttle(self):
+        with self._lock:
+            self.throttles += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, self.rate)
+
+    def on_success(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 50)
+
+
+def _is_throttle(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in THROTTLE_ERRORS
+
+
+def _backoff(attempt: int) -> float:
+    # Full jitter keeps concurrent syncs from retrying in lockstep
+    return random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * (2 ** attempt)))
+
+
+class WriteScheduler:
+    """Process-wide gate for sync-time DynamoDB writes.
+
+    Store save functions run on one fixed pool shared by every sync in the
+    process (submit_store), and the writes they issue go through run_write /
+    write_batch, which share a global in-flight limit and a token bucket per
+    table. Throttling slows only the table that is throttled.
+    """
+
+    def __init__(self, store_workers: int = STORE_WORKERS, max_inflight: int = MAX_INFLIGHT_WRITES):
+        self._executor = ThreadPoolExecutor(
+            max_workers=store_workers, thread_name_prefix="store-writer"
+        )
+        self._inflight = threading.BoundedSemaphore(max_inflight)
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._pending_jobs = 0
+        self._running_jobs = 0
+        self._inflight_writes = 0
+
+    # ─── Store jobs ──────────────────────────────────────────────────────────
+
+    def submit_store(self, fn, *args, **kwargs):
+        with self._lock:
+            self._pending_jobs += 1
+
+        def run():
+            with self._lock:
+                self._pending_jobs -= 1
+                self._running_jobs += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running_jobs -= 1
+
+        # Carry the caller's context (e.g. the sync's active write batch)
+        # into the pool thread
+        return self._executor.submit(contextvars.copy_context().run, run)
+
+    # ─── Writes ──────────────────────────────────────────────────────────────
+
+    def _bucket(self, table_name: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(table_name)
+            if bucket is None:
+                bucket = TokenBucket(TABLE_RATES.get(table_name, DEFAULT_TABLE_RATE))
+                self._buckets[table_name] = bucket
+            return bucket
+
+    def _call(self, fn, **kwargs):
+        with self._inflight:
+            with self._lock:
+                self._inflight_writes += 1
+            try:
+                return fn(**kwargs)
+            finally:
+                with self._lock:
+                    self._inflight_writes -= 1
+
+    def run_write(self, table_name: str, fn, units: int = 1, **kwargs):
+        """Issue one write call (put_item, update_item, ...) against a table."""
+        bucket = self._bucket(table_name)
+        for attempt in range(MAX_ATTEMPTS):
+            bucket.acquire(units)
+            try:
+                result = self._call(fn, **kwargs)
+            except ClientError as e:
+                if not _is_throttle(e) or attempt == MAX_ATTEMPTS - 1:
+                    raise
+                bucket.on_throttle()
+                record_retry()
+                time.sleep(_backoff(attempt))
+                continue
+            bucket.on_success()
+            return result
+
+    def write_batch(self, table, puts=(), delete_keys=()):
+        """Write puts and deletes to one table in BatchWriteItem calls."""
+        requests = [(table.name, {"DeleteRequest": {"Key": key}}) for key in delete_keys]
+        requests += [(table.name, {"PutRequest": {"Item": item}}) for item in puts]
+        for start in range(0, len(requests), BATCH_SIZE):
+            self.write_requests(requests[start:start + BATCH_SIZE])
+
+    def write_requests(self, requests: list) -> int:
+        """Send up to 25 (table_name, write request) pairs as one BatchWriteItem.
+
+        The pairs may span tables. Unprocessed items are retried with backoff
+        and count as throttling for their table's bucket. Returns the number
+        of BatchWriteItem calls made.
+        """
+        client = get_dynamodb_client()
+        pending = list(requests)
+        calls = 0
+
+        for attempt in range(MAX_ATTEMPTS):
+            request_items = {}
+            for table_name, request in pending:
+                request_items.setdefault(table_name, []).append(request)
+            for table_name, table_requests in request_items.items():
+                self._bucket(table_name).acquire(len(table_requests))
+
+            try:
+                calls += 1
+                response = self._call(client.batch_write_item, RequestItems=request_items)
+            except ClientError as e:
+                if not _is_throttle(e) or attempt == MAX_ATTEMPTS - 1:
+                    raise
+                for table_name in request_items:
+                    self._bucket(table_name).on_throttle()
+                record_retry()
+                time.sleep(_backoff(attempt))
+                continue
+
+            unprocessed = response.get("UnprocessedItems", {})
+            for table_name in request_items:
+                if unprocessed.get(table_name):
+                    self._bucket(table_name).on_throttle()
+                else:
+                    self._bucket(table_name).on_success()
+            pending = [
+                (table_name, request)
+                for table_name, table_requests in unprocessed.items()
+                for request in table_requests
+            ]
+            if not pending:
+                return calls
+            record_retry()
+            time.sleep(_backoff(attempt))
+
+        raise RuntimeError(
+            f"{len(pending)} write requests still unprocessed after {MAX_ATTEMPTS} attempts"
+        )
+
+    # ─── Metrics ─────────────────────────────────────────────────────────────
+
+    def metrics(self) -> dict:
+        with self._lock:
+            buckets = dict(self._buckets)
+            snapshot = {
+                "pending_jobs": self._pending_jobs,
+                "running_jobs": self._running_jobs,
+                "inflight_writes": self._inflight_writes,
+            }
+        snapshot["tables"] = {
+            name: {
+                "rate": round(bucket.rate, 1),
+                "waiting": bucket.waiting,
+                "throttles": bucket.throttles,
+            }
+            for name, bucket in buckets.items()
+        }
+        return snapshot
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_write_scheduler() -> WriteScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = WriteScheduler()
+        return _scheduler
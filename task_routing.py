@@ -0,0 +1,47 @@
+import os
+import hashlib
+import logging
+from celery_app import celery_app
+from db.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Number of login-affinity queues (mt5.0 … mt5.N-1). Each MT5 worker consumes
+# its own affinity queue plus the shared mt5 queue, e.g. -Q mt5.2,mt5.
+# 0 disables affinity routing.
+AFFINITY_QUEUES = int(os.getenv("MT5_AFFINITY_QUEUES", "0"))
+
+# A preferred queue holding this many waiting tasks counts as saturated and
+# the fetch falls back to the shared mt5 queue.
+AFFINITY_MAX_BACKLOG = int(os.getenv("MT5_AFFINITY_MAX_BACKLOG", "2"))
+
+
+def affinity_queue(server: str, login) -> str:
+    # Stable across processes, unlike hash()
+    digest = hashlib.sha1(f"{server}:{login}".encode()).hexdigest()
+    return f"mt5.{int(digest, 16) % AFFINITY_QUEUES}"
+
+
+def route_account_sync(server: str, login) -> str:
+    """Pick the queue for an MT5 fetch of this account.
+
+    Repeat syncs for the same server/login land on the same queue, and so on
+    a worker whose terminal is already logged into that account.
+    """
+    default_queue = celery_app.conf.task_default_queue
+    if AFFINITY_QUEUES <= 0:
+        return default_queue
+
+    queue = affinity_queue(server, login)
+    try:
+        # With the Redis broker each queue is a list named after the queue
+        backlog = get_redis().llen(queue)
+    except Exception as e:
+        logger.warning(f"Affinity backlog check failed, using {default_queue}: {e}")
+        return default_queue
+
+    if backlog >= AFFINITY_MAX_BACKLOG:
+        logger.info(f"{queue} saturated ({backlog} waiting) — routing to {default_queue}")
+        return default_queue
+
+    return queue
@@ -1,15 +1,23 @@
-from celery_app import celery_app
-from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from uuid import uuid4
+from celery import chain
+from celery_app import celery_app, MT5_QUEUE, PERSIST_QUEUE, ATLAS_QUEUE
+from celery.signals import worker_process_shutdown
+from concurrent.futures import as_completed
 from mt5_logic import fetch_mt5_analytics
-from services.mt5_normalizer import normalize_mt5_data
+from mt5_session import shutdown_mt5_session
+from mt5_pool import shutdown_terminal_pool
+from services.trade_aggregator import aggregate_sync_data
 from services.performance_store import save_user_performance_snapshot
 from services.analytics_store import save_user_analytics_stats
 from db.dynamodb import get_onboarding_table
 from services.equity_store import save_equity_curve
 from services.pnl_weekly_store import save_weekly_pnl
 from services.r_multiple_store import save_r_multiples
-from services.trades_store import save_user_trades
+from services.trades_store import save_user_trades, load_user_trades
+from services.trades_migration import migrate_user_trades
+from services.strategy_stats import rebuild_strategy_stats, STRATEGY_STATS_VERSION
+from services.unreviewed_trades import seed_unreviewed_count
+from services.incremental_sync import merge_trades, build_equity_curve
 from services.daily_pnl_store import save_daily_pnl
 from services.dashboard_stats_store import save_dashboard_stats
 from services.reports_stats_store import save_user_report_stats
@@ -22,35 +30,265 @@ from services.dashboard_session_performance_store import save_dashboard_session_
 from services.dashboard_symbol_performance_store import save_dashboard_symbol_performance
 from services.dashboard_daily_pnl_store import save_dashboard_daily_pnl
 from services.dashboard_equity_curve_store import save_dashboard_equity_curve
+from services.sync_payload import pack_fetch_result, unpack_trades, unpack_equity_curve
+from services.sync_telemetry import SyncTelemetry
+from services.sync_history_store import save_sync_history
+from services.write_scheduler import get_write_scheduler
+from services.sync_write_batch import SyncWriteBatch, collect_writes
+from services.snapshot_slots import active_snapshot_slot, other_slot, slot_partition, publish_condition
 from datetime import datetime, timedelta, timezone
 from db.dynamodb import get_atlas_stats_table
 from services.trading_data_compressor import TradingDataCompressor
+from services.sync_lock import claim_sync, request_rerun, release_sync
+from task_routing import route_account_sync
+from services.page_documents import save_page_document, invalidate_page_document
+from services.response_cache import bump_data_version, get_edits_version
+from services.trade_search_index import build_search_index
+from services.dashboard_page import build_dashboard_page
+from services.analytics_page import build_analytics_page
+from services.reports_page import build_reports_page
 _atlas_compressor = TradingDataCompressor()
 
-@celery_app.task(name="tasks.get_account_summary", bind=True)
-def get_account_summary(self, user_id, server, login, password, days=None):
+PAGE_BUILDERS = {
+    "dashboard": build_dashboard_page,
+    "analytics": build_analytics_page,
+    "reports": build_reports_page,
+}
+
+# Bumped when the stored trade rows gain attributes incremental merges rely
+# on; users below it get one full sync first.
+# 2: trades keyed by position_id (legacy rows are copied over on that sync)
+TRADES_SCHEMA_VERSION = 2
+
+
+@worker_process_shutdown.connect
+def _close_mt5_session(**kwargs):
+    # The MT5 terminal stays initialized between tasks; close it with the process
+    shutdown_mt5_session()
+    shutdown_terminal_pool()
+
+
+# ─── Dispatch ─────────────────────────────────────────────────────────────────
+#
+# A sync runs as a chain of three stages on dedicated queues:
+#
+#   fetch_account_data      (mt5)     MT5 fetch only; frees the terminal fast
+#   persist_account_data    (persist) merge, aggregate, DynamoDB writes
+#   refresh_atlas_insights  (atlas)   OpenAI insights, releases the sync slot
+#
+# The last stage runs under the pipeline's task_id, which is the id handed to
+# the client. Earlier stages report progress against that same id.
+
+def dispatch_account_sync(user_id, server, login, password, days=None, full_sync=False, rerun=False):
+    """Start a sync for the user unless one is already in flight.
+
+    Returns (task_id, coalesced). A coalesced request gets the running
+    sync's task_id; with rerun=True a fresh sync is queued once it finishes.
+    """
+    pipeline_id = str(uuid4())
+    existing = claim_sync(user_id, pipeline_id)
+    if existing:
+        if rerun:
+            request_rerun(user_id, days=days, full_sync=full_sync)
+        print(f"Sync already in flight for {user_id}: {existing} (rerun={rerun})")
+        return existing, True
+
+    pipeline = chain(
+        fetch_account_data.s(
+            user_id, server, login, password, days, full_sync, pipeline_id
+        ).set(queue=route_account_sync(server, login)),
+        persist_account_data.s(user_id, pipeline_id).set(queue=PERSIST_QUEUE),
+        refresh_atlas_insights.s(user_id).set(queue=ATLAS_QUEUE, task_id=pipeline_id),
+    )
+
+    try:
+        pipeline.apply_async(link_error=sync_pipeline_failed.s(user_id, pipeline_id))
+    except Exception:
+        release_sync(user_id, pipeline_id)
+        raise
+    return pipeline_id, False
+
+
+def _dispatch_rerun(user_id, rerun_options):
+    # Credentials are re-read so a re-link during the sync is honoured
+    item = get_onboarding_table().get_item(Key={"user_id": user_id}).get("Item") or {}
+    if not all(item.get(k) for k in ("server", "login", "password")):
+        print(f"  ⚠ Re-run skipped for {user_id}: broker credentials missing")
+        return
+    task_id, _ = dispatch_account_sync(
+        user_id, item["server"], int(item["login"]), str(item["password"]),
+        days=rerun_options.get("days"), full_sync=rerun_options.get("full_sync", False),
+    )
+    print(f"  ↻ Re-run sync queued for {user_id}: {task_id}")
+
+
+def _finish_sync(user_id, pipeline_id):
+    rerun_options = release_sync(user_id, pipeline_id)
+    if rerun_options is not None:
+        _dispatch_rerun(user_id, rerun_options)
+
+
+def _account_key(server, login):
+    return f"{server}:{login}"
+
+
+def _report_progress(task, pipeline_id, step, telemetry=None):
+    meta = {"step": step}
+    if telemetry is not None:
+        meta["telemetry"] = telemetry.as_dict()
+    task.update_state(task_id=pipeline_id, state="PROGRESS", meta=meta)
+
+
+@celery_app.task(name="tasks.sync_pipeline_failed")
+def sync_pipeline_failed(request, exc, traceback, user_id, pipeline_id):
+    # A stage raised, so the final stage will never run: publish the failure
+    # under the client's task_id and free the user's sync slot.
+    print(f"✗ Sync pipeline {pipeline_id} failed in {request.task}: {exc}")
+    celery_app.backend.store_result(
+        pipeline_id,
+        {"status": "error", "message": f"Sync failed: {exc}"},
+        "SUCCESS",
+    )
+    save_sync_history(user_id, pipeline_id, "error", None, message=f"{request.task}: {exc}")
+    _finish_sync(user_id, pipeline_id)
+
+
+# ─── Stage 1: MT5 fetch ───────────────────────────────────────────────────────
+
+@celery_app.task(name="tasks.fetch_account_data", bind=True, queue=MT5_QUEUE)
+def fetch_account_data(self, user_id, server, login, password, days, full_sync, pipeline_id):
 
     print(f"\n{'='*60}")
-    print(f"STARTING TASK FOR USER: {user_id}")
+    print(f"STARTING SYNC FOR USER: {user_id} ({pipeline_id})")
     print(f"{'='*60}\n")
 
     # ---------------- STEP 1: Connect to MT5 ----------------
     print("STEP 1: Connecting to MT5...")
-    self.update_state(state="PROGRESS", meta={"step": "connecting_to_mt5"})
+    telemetry = SyncTelemetry()
+    telemetry.add_retries(self.request.retries)
+    _report_progress(self, pipeline_id, "connecting_to_mt5", telemetry)
     print(f"Connecting with server={server}, login={login}, password=***")
 
-    result = fetch_mt5_analytics(server, login, password,days=days)
+    # Incremental mode: only pull deals after the last successful sync of
+    # this same account. Rows synced before last_sync_account existed are
+    # trusted to match.
+    account = _account_key(server, login)
+    since = None
+    account_changed = False
+    try:
+        onboarding_item = get_onboarding_table().get_item(
+            Key={"user_id": user_id}
+        ).get("Item") or {}
+        account_changed = onboarding_item.get("last_sync_account", account) != account
+        if (days is None and not full_sync
+                and onboarding_item.get("last_sync_at")
+                and int(onboarding_item.get("trades_schema", 0)) >= TRADES_SCHEMA_VERSION
+                and not account_changed):
+            since = int(onboarding_item["last_sync_at"])
+    except Exception as e:
+        print(f"  ⚠ Could not read sync watermark, running full sync: {e}")
+
+    print(f"  Sync mode: {'incremental since ' + str(since) if since is not None else 'full'}")
+
+    with telemetry.stage("mt5_fetch"):
+        result = fetch_mt5_analytics(server, login, password, days=days, since=since)
+
     if result["status"] == "success":
+        data = result["data"]
         print(f"✓ MT5 connected successfully")
+        print(f"  MT5 timings: {data.get('timings')}")
+        telemetry.stages["mt5_fetch"]["phases"] = data.get("timings", {})
+        telemetry.count("deals", data.get("deal_count", 0))
+        telemetry.count("trades_fetched", len(data["trades"]))
     else:
         print(f"✗ MT5 connection failed: {result}")
-        return result
+
+    payload = pack_fetch_result(result)
+    payload["account"] = account
+    # Stored positions are only dropped when they belong to the previously
+    # linked account, and only against the new account's whole history.
+    # Otherwise a truncated broker history would delete journaled trades.
+    payload["prune"] = account_changed and days is None
+    payload["telemetry"] = telemetry.as_dict()
+    return payload
+
+
+# ─── Stage 2: Aggregate and persist ───────────────────────────────────────────
+
+@celery_app.task(name="tasks.persist_account_data", bind=True, queue=PERSIST_QUEUE)
+def persist_account_data(self, payload, user_id, pipeline_id):
+
+    telemetry = SyncTelemetry.from_dict(payload.pop("telemetry", None))
+    telemetry.add_retries(self.request.retries)
+
+    if payload["status"] != "success":
+        payload["telemetry"] = telemetry.as_dict()
+        return payload
+
+    incremental = payload["incremental"]
+    fresh_trades = unpack_trades(payload["trades"])
+
+    onboarding_item = get_onboarding_table().get_item(
+        Key={"user_id": user_id},
+        ProjectionExpression="trades_schema, strategy_stats_version, unreviewed_count",
+    ).get("Item") or {}
+
+    # Incremental syncs only run at the current schema, so only a full sync
+    # can find the user's trades still in the timestamp-keyed table
+    if not incremental and int(onboarding_item.get("trades_schema", 0)) < TRADES_SCHEMA_VERSION:
+        with telemetry.stage("migrate_trades"):
+            migrated = migrate_user_trades(user_id)
+        print(f"  Migrated {migrated} trades to position keys")
+
+    # Strategy stats are kept up to date incrementally once they exist
+    strategy_stats_version = int(onboarding_item.get("strategy_stats_version", 0))
+    if strategy_stats_version < STRATEGY_STATS_VERSION:
+        try:
+            with telemetry.stage("strategy_stats"):
+                rows = rebuild_strategy_stats(user_id)
+            strategy_stats_version = STRATEGY_STATS_VERSION
+            print(f"  Built stats for {rows} strategies")
+        except Exception as e:
+            # Non-fatal — retried on the next sync
+            print(f"  ⚠ Strategy stats rebuild failed (non-fatal): {e}")
+
+    # The unreviewed counter is maintained by deltas; a user without one gets
+    # it seeded from the rows stored before this sync's writes
+    if "unreviewed_count" not in onboarding_item:
+        with telemetry.stage("count_unreviewed"):
+            seeded = seed_unreviewed_count(user_id)
+        print(f"  Seeded unreviewed count: {seeded}")
+
+    if incremental:
+        with telemetry.stage("load_stored_trades"):
+            stored_trades = load_user_trades(user_id)
+        if stored_trades is None:
+            # Should not happen once trades_schema is set; force a full sync next time
+            get_onboarding_table().update_item(
+                Key={"user_id": user_id},
+                UpdateExpression="REMOVE trades_schema",
+            )
+            return {
+                "status": "error",
+                "message": "Stored trades are incomplete — please sync again to run a full sync",
+                "telemetry": telemetry.as_dict(),
+            }
+        trades = merge_trades(stored_trades, fresh_trades)
+        equity_curve = build_equity_curve(trades, payload["starting_equity"])
+        print(f"  Incremental merge: {len(fresh_trades)} fetched, {len(trades)} total")
+    else:
+        trades = fresh_trades
+        equity_curve = unpack_equity_curve(payload["equity_vs_time"])
 
     # ---------------- STEP 2: Normalize Data ----------------
     print("\nSTEP 2: Normalizing data...")
-    self.update_state(state="PROGRESS", meta={"step": "normalizing_data"})
+    telemetry.count("trades", len(trades))
+    _report_progress(self, pipeline_id, "normalizing_data", telemetry)
 
-    normalized = normalize_mt5_data(result["data"])
+    # One pass over the trades builds every rollup the stores need
+    with telemetry.stage("normalize"):
+        aggregates = aggregate_sync_data({"trades": trades, "equity_vs_time": equity_curve})
+    normalized = aggregates["summary"]
     print(f"✓ Data normalized")
     print(f"  Total trades: {normalized.get('total_trades')}")
     print(f"  Total PnL: {normalized.get('total_pnl')}")
@@ -58,102 +296,215 @@ def get_account_summary(self, user_id, server, login, password, days=None):
     snapshot_date = datetime.utcnow().date().isoformat()
     print(f"  Snapshot date: {snapshot_date}")
 
-    trades = result["data"]["trades"]
-    equity_curve = result["data"]["equity_vs_time"]
     weekly_pnl = normalized.get("weekly_pnl", {})
 
     # ---------------- STEP 3: Save All Data in Parallel (Batch 1) ----------------
     print("\nSTEP 3-10: Saving all data in parallel (batch 1)...")
-    self.update_state(state="PROGRESS", meta={"step": "saving_snapshot"})
-
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        futures = {
-            executor.submit(save_user_analytics_stats, user_id, snapshot_date, normalized): "analytics",
-            executor.submit(save_user_performance_snapshot, user_id, snapshot_date, normalized): "performance",
-            executor.submit(save_equity_curve, user_id, equity_curve): "equity",
-            executor.submit(save_user_trades, user_id, trades): "trades",
-            executor.submit(save_daily_pnl, user_id, trades): "daily_pnl",
-            executor.submit(save_dashboard_stats, user_id, snapshot_date, normalized): "dashboard_stats",
-        }
-        for future in as_completed(futures):
-            name = futures[future]
-            try:
-                future.result()
-                print(f"  ✓ {name} saved")
-            except Exception as e:
-                print(f"  ✗ {name} failed: {e}")
-                raise
+    _report_progress(self, pipeline_id, "saving_snapshot", telemetry)
+
+    write_stats = []
+
+    # Derived rows go to the snapshot slot readers are not using; the
+    # onboarding update below publishes it
+    current_slot = active_snapshot_slot(user_id)
+    target_slot = other_slot(current_slot)
+    partition = slot_partition(user_id, target_slot)
+    print(f"  Writing snapshot slot {target_slot} (active: {current_slot})")
+
+    # Derived-table writes from every store are queued here and sent as
+    # full cross-table BatchWriteItem requests once all stores have run
+    write_batch = SyncWriteBatch()
+
+    with telemetry.stage("save_batch_1"), collect_writes(write_batch):
+        write_stats += _run_store_batch(telemetry, {
+            "analytics": (save_user_analytics_stats, partition, snapshot_date, normalized),
+            "performance": (save_user_performance_snapshot, partition, snapshot_date, normalized),
+            "equity": (save_equity_curve, partition, aggregates["equity"]),
+            # Merged by position_id, so only the fetched trades are needed
+            "trades": (save_user_trades, user_id, fresh_trades, payload.get("prune", False)),
+            "daily_pnl": (save_daily_pnl, partition, aggregates["daily"]),
+            "dashboard_stats": (save_dashboard_stats, partition, snapshot_date, normalized),
+        })
 
     # ---------------- STEP 4: Save Remaining Data in Parallel (Batch 2) ----------------
     print("\nSaving remaining data in parallel (batch 2)...")
-    self.update_state(state="PROGRESS", meta={"step": "finalizing_onboarding"})
+    _report_progress(self, pipeline_id, "finalizing_onboarding", telemetry)
 
-    def save_weekly_pnl_if_exists(user_id, weekly_pnl):
-        if weekly_pnl:
-            save_weekly_pnl(user_id=user_id, weekly_pnl=weekly_pnl)
-            print(f"  ✓ weekly_pnl saved ({len(weekly_pnl)} weeks)")
-        else:
-            print(f"  (No weekly PnL data to save)")
-
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        futures = {
-            executor.submit(save_weekly_pnl_if_exists, user_id, weekly_pnl): "weekly_pnl",
-            executor.submit(save_r_multiples, user_id, trades): "r_multiples",
-            executor.submit(save_user_report_stats, user_id, snapshot_date, normalized): "report_stats",
-            executor.submit(save_user_report_symbol_summary, user_id, snapshot_date, normalized): "report_symbol",
-            executor.submit(save_user_report_win_rate, user_id, trades): "report_win_rate",
-            executor.submit(save_user_report_overview, user_id, trades): "report_overview",
-            executor.submit(save_drawdown_curve, user_id, equity_curve): "drawdown",
-            executor.submit(save_session_performance, user_id, trades): "session",
-            executor.submit(save_dashboard_session_performance, user_id, trades): "dash_session",
-            executor.submit(save_dashboard_symbol_performance, user_id, trades): "dash_symbol",
-            executor.submit(save_dashboard_daily_pnl, user_id, trades): "dash_daily_pnl",
-            executor.submit(save_dashboard_equity_curve, user_id, equity_curve): "dash_equity",
-        }
-        for future in as_completed(futures):
-            name = futures[future]
-            try:
-                future.result()
-                print(f"  ✓ {name} saved")
-            except Exception as e:
-                print(f"  ✗ {name} failed: {e}")
-                raise
+    with telemetry.stage("save_batch_2"), collect_writes(write_batch):
+        write_stats += _run_store_batch(telemetry, {
+            "weekly_pnl": (save_weekly_pnl, partition, weekly_pnl),
+            "r_multiples": (save_r_multiples, partition, trades),
+            "report_stats": (save_user_report_stats, partition, snapshot_date, normalized),
+            "report_symbol": (save_user_report_symbol_summary, partition, snapshot_date, normalized),
+            "report_win_rate": (save_user_report_win_rate, partition, aggregates["week_symbol"]),
+            "report_overview": (save_user_report_overview, partition, aggregates["weekly"]),
+            "drawdown": (save_drawdown_curve, partition, aggregates["drawdown"]),
+            "session": (save_session_performance, partition, aggregates["sessions"]),
+            "dash_session": (save_dashboard_session_performance, partition, aggregates["sessions"]),
+            "dash_symbol": (save_dashboard_symbol_performance, partition, aggregates["symbols"]),
+            "dash_daily_pnl": (save_dashboard_daily_pnl, partition, aggregates["daily"]),
+            "dash_equity": (save_dashboard_equity_curve, partition, aggregates["equity_daily"]),
+        })
+
+    with telemetry.stage("flush_writes"):
+        flushed = telemetry.run_store("batched_writes", write_batch.flush)
+    telemetry.stages["flush_writes"].update(flushed)
+    telemetry.stages["flush_writes"]["scheduler"] = get_write_scheduler().metrics()
+    print(f"  Batched writes: {flushed['items']} items in {flushed['requests']} requests")
+
+    writes_saved = sum(s["writes_saved"] for s in write_stats)
+    writes_done = sum(s["puts"] + s["deletes"] for s in write_stats)
+    print(f"\n  Writes: {writes_done} performed, {writes_saved} saved by diffing")
+
+    # Applied as a delta so tag edits made during the sync are kept
+    unreviewed_delta = next(s["unreviewed_delta"] for s in write_stats if "unreviewed_delta" in s)
 
     # ---------------- STEP 5: Finalize Onboarding ----------------
     print("\nFinalizing onboarding...")
+    condition, condition_values = publish_condition(current_slot)
     try:
-        onboarding_table = get_onboarding_table()
-        onboarding_table.update_item(
-            Key={"user_id": user_id},
-            UpdateExpression="SET broker_linked = :bl, updated_at = :u, last_sync_at = :ls",
-            ExpressionAttributeValues={
-                ":bl": True,
-                ":u": datetime.utcnow().isoformat(),
-                ":ls": int(datetime.utcnow().timestamp())
-            }
-        )
-        print("✓ Onboarding finalized")
+        with telemetry.stage("finalize_onboarding"):
+            get_onboarding_table().update_item(
+                Key={"user_id": user_id},
+                UpdateExpression="SET broker_linked = :bl, updated_at = :u, last_sync_at = :ls, last_sync_account = :acct, trades_schema = :ts, snapshot_slot = :slot, unreviewed_count = if_not_exists(unreviewed_count, :zero) + :unrev, strategy_stats_version = :ssv",
+                ConditionExpression=condition,
+                ExpressionAttributeValues={
+                    ":bl": True,
+                    ":u": datetime.utcnow().isoformat(),
+                    ":ls": int(datetime.utcnow().timestamp()),
+                    ":acct": payload.get("account"),
+                    ":ts": TRADES_SCHEMA_VERSION,
+                    ":slot": target_slot,
+                    ":zero": 0,
+                    ":unrev": unreviewed_delta,
+                    ":ssv": strategy_stats_version,
+                    **condition_values,
+                }
+            )
+        print(f"✓ Onboarding finalized, snapshot slot {target_slot} published")
     except Exception as e:
         print(f"ERROR in finalizing onboarding: {e}")
         raise
 
-      # ── STEP 6: Regenerate Atlas AI insights ─────────────────────────────────
+    # ---------------- STEP 6: Materialize Page Documents ----------------
+    print("\nMaterializing page documents...")
+    with telemetry.stage("page_documents"):
+        _materialize_page_documents(user_id, partition)
+
+    # Cached API responses were built from the previous slot
+    bump_data_version(user_id, "sync")
+
+    # ---------------- STEP 7: Rebuild Trade Search Index ----------------
+    try:
+        with telemetry.stage("search_index"):
+            build_search_index(user_id)
+        print("✓ Trade search index rebuilt")
+    except Exception as e:
+        # Non-fatal — the first search rebuilds it
+        print(f"⚠ Search index rebuild failed (non-fatal): {e}")
+
+    return {
+        "status": "success",
+        "message": "Analytics stats saved",
+        "sync_mode": "incremental" if incremental else "full",
+        "new_trades": len(fresh_trades),
+        "writes": {"performed": writes_done, "saved": writes_saved},
+        "telemetry": telemetry.as_dict(),
+        "summary": {
+            "total_trades": normalized["total_trades"],
+            "total_pnl": normalized["total_pnl"],
+            "win_rate": normalized["win_rate"],
+            "profit_factor": normalized["profit_factor"],
+            "expectancy": normalized["expectancy"],
+        }
+    }
+
+
+def _materialize_page_documents(user_id, partition):
+    # Built from the snapshot just published, after the flip, so a document
+    # never runs ahead of the slot the live fallback reads. The edits version
+    # is read first: an edit landing mid-build makes the document outdated.
+    try:
+        version = get_edits_version(user_id)
+    except Exception as e:
+        version = None
+        print(f"  ⚠ Could not read edits version: {e}")
+    for page, build in PAGE_BUILDERS.items():
+        try:
+            save_page_document(user_id, page, build(user_id, partition), version)
+            print(f"  ✓ {page} page document saved")
+        except Exception as e:
+            # Non-fatal — drop the old document so the page serves live data
+            invalidate_page_document(user_id, page)
+            print(f"  ⚠ {page} page document failed (non-fatal): {e}")
+
+
+def _run_store_batch(telemetry, jobs):
+    # jobs: name -> (save_fn, *args). Runs them on the process-wide write
+    # scheduler, each timed by telemetry, and returns the write stats of
+    # those that report them.
+    scheduler = get_write_scheduler()
+    futures = {
+        scheduler.submit_store(telemetry.run_store, name, *job): name
+        for name, job in jobs.items()
+    }
+    print(f"  Write scheduler: {scheduler.metrics()}")
+
+    write_stats = []
+    for future in as_completed(futures):
+        name = futures[future]
+        try:
+            stats = future.result()
+            if stats:
+                write_stats.append(stats)
+            print(f"  ✓ {name} saved")
+        except Exception as e:
+            print(f"  ✗ {name} failed: {e}")
+            # Don't leave the rest of this sync queued on the shared pool
+            for pending in futures:
+                pending.cancel()
+            raise
+    return write_stats
+
+
+# ─── Stage 3: Atlas insights ──────────────────────────────────────────────────
+
+@celery_app.task(name="tasks.refresh_atlas_insights", bind=True, queue=ATLAS_QUEUE)
+def refresh_atlas_insights(self, result, user_id):
+    try:
+        telemetry = SyncTelemetry.from_dict(result.get("telemetry"))
+        telemetry.add_retries(self.request.retries)
+        if result["status"] == "success":
+            with telemetry.stage("atlas"):
+                _refresh_atlas(self, user_id)
+        result["telemetry"] = telemetry.as_dict()
+        save_sync_history(
+            user_id, self.request.id, result["status"], result["telemetry"],
+            sync_mode=result.get("sync_mode"), message=result.get("message"),
+        )
+        return result
+    finally:
+        _finish_sync(user_id, self.request.id)
+
+
+def _refresh_atlas(self, user_id):
+    # ── STEP 6: Regenerate Atlas AI insights ─────────────────────────────────
     print("\nSTEP 6: Checking Atlas insights...")
     self.update_state(state="PROGRESS", meta={"step": "checking_atlas_insights"})
     try:
         atlas_table   = get_atlas_stats_table()
         existing_item = atlas_table.get_item(Key={"user_id": user_id}).get("Item")
- 
+
         if existing_item:
-        
+
             created_at = datetime.fromisoformat(existing_item["created_at"])
             if created_at.tzinfo is None:
                 created_at = created_at.replace(tzinfo=timezone.utc)
- 
+
             age = datetime.now(timezone.utc) - created_at
- 
+
             if age < timedelta(hours=2):
-       
+
                 print(f" Atlas recent ({int(age.total_seconds() // 60)}m ago) — running lightweight check")
             else:
                 print(f"Atlas stale ({int(age.total_seconds() // 3600)}h ago) — running full check")
@@ -162,7 +513,7 @@ def get_account_summary(self, user_id, server, login, password, days=None):
 
         _atlas_compressor.get_or_update_atlas_stats(user_id, prompt_type="universal")
         print("  ✓ Atlas step complete")
- 
+
     except Exception as e:
         # Non-fatal — a failed Atlas step must never roll back a successful sync
         print(f"  ⚠ Atlas step failed (non-fatal): {e}")
@@ -170,15 +521,3 @@ def get_account_summary(self, user_id, server, login, password, days=None):
     print(f"\n{'='*60}")
     print(f"TASK COMPLETED SUCCESSFULLY")
     print(f"{'='*60}\n")
-
-    return {
-        "status": "success",
-        "message": "Analytics stats saved",
-        "summary": {
-            "total_trades": normalized["total_trades"],
-            "total_pnl": normalized["total_pnl"],
-            "win_rate": normalized["win_rate"],
-            "profit_factor": normalized["profit_factor"],
-            "expectancy": normalized["expectancy"],
-        }
-    }
\ No newline at end of file
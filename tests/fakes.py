@@ -0,0 +1,160 @@
+import re
+from botocore.exceptions import ClientError
+
+# Just enough of a DynamoDB Table for the services under test: items live in
+# a dict keyed on the table's key attributes, and update/condition
+# expressions are the small subset the services actually send.
+
+
+def condition_failed(operation: str = "UpdateItem") -> ClientError:
+    return ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "The conditional request failed"}},
+        operation,
+    )
+
+
+def check_condition(item, expression, names=None):
+    """True when item (None if absent) satisfies an attribute_(not_)exists condition."""
+    if not expression:
+        return True
+    names = names or {}
+    for clause in re.split(r"\s+AND\s+", expression):
+        match = re.fullmatch(r"(attribute_exists|attribute_not_exists)\((#?\w+)\)", clause.strip())
+        if not match:
+            raise NotImplementedError(f"Unsupported condition: {clause}")
+        function, name = match.groups()
+        exists = item is not None and names.get(name, name) in item
+        if exists != (function == "attribute_exists"):
+            return False
+    return True
+
+
+def apply_update(item: dict, expression: str, values=None, names=None) -> dict:
+    values = values or {}
+    names = names or {}
+    attr = lambda name: names.get(name, name)
+    for clause, body in re.findall(r"(SET|ADD|REMOVE)\s+(.*?)(?=\s+(?:SET|ADD|REMOVE)\s+|$)", expression.strip()):
+        for part in (p.strip() for p in body.split(",")):
+            if clause == "REMOVE":
+                item.pop(attr(part), None)
+            elif clause == "ADD":
+                name, value = part.split()
+                item[attr(name)] = item.get(attr(name), 0) + values[value]
+            else:
+                name, value = (s.strip() for s in part.split("=", 1))
+                default = re.fullmatch(r"if_not_exists\((#?\w+),\s*(:\w+)\)\s*\+\s*(:\w+)", value)
+                if default:
+                    current = item.get(attr(default.group(1)), values[default.group(2)])
+                    item[attr(name)] = current + values[default.group(3)]
+                else:
+                    item[attr(name)] = values[value]
+    return item
+
+
+class FakeTable:
+    def __init__(self, name: str, key_names: tuple):
+        self.name = name
+        self.key_names = key_names
+        self.items = {}
+
+    def _key(self, key: dict) -> tuple:
+        return tuple(key[k] for k in self.key_names)
+
+    def get(self, **key):
+        return self.items.get(self._key(key))
+
+    def put_item(self, Item, ConditionExpression=None):
+        if not check_condition(self.items.get(self._key(Item)), ConditionExpression):
+            raise condition_failed("PutItem")
+        self.items[self._key(Item)] = dict(Item)
+
+    def get_item(self, Key, ProjectionExpression=None, ConsistentRead=False):
+        item = self.items.get(self._key(Key))
+        return {"Item": dict(item)} if item is not None else {}
+
+    def delete_item(self, Key, ConditionExpression=None):
+        if not check_condition(self.items.get(self._key(Key)), ConditionExpression):
+            raise condition_failed("DeleteItem")
+        self.items.pop(self._key(Key), None)
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues=None,
+                    ExpressionAttributeNames=None, ConditionExpression=None, **kwargs):
+        current = self.items.get(self._key(Key))
+        if not check_condition(current, ConditionExpression, ExpressionAttributeNames):
+            raise condition_failed()
+        item = dict(current) if current is not None else dict(Key)
+        self.items[self._key(Key)] = apply_update(
+            item, UpdateExpression, ExpressionAttributeValues, ExpressionAttributeNames
+        )
+        return {}
+
+
+def _matches(item: dict, condition) -> bool:
+    expression = condition.get_expression()
+    operator, values = expression["operator"], expression["values"]
+    if operator == "AND":
+        return all(_matches(item, c) for c in values)
+    key, value = values
+    if operator == "=":
+        return item.get(key.name) == value
+    if operator == "begins_with":
+        return str(item.get(key.name, "")).startswith(value)
+    raise NotImplementedError(f"Unsupported key condition: {operator}")
+
+
+def fake_query_all(table: FakeTable, key_condition, projection=None, **kwargs) -> list:
+    items = [dict(item) for item in table.items.values() if _matches(item, key_condition)]
+    if projection:
+        items = [{k: v for k, v in item.items() if k in projection} for item in items]
+    return items
+
+
+class FakeClient:
+    """transact_write_items over FakeTables: every condition is checked before anything is written."""
+
+    def __init__(self, *tables: FakeTable):
+        self.tables = {table.name: table for table in tables}
+
+    def transact_write_items(self, TransactItems):
+        reasons = []
+        for entry in TransactItems:
+            (action, request), = entry.items()
+            table = self.tables[request["TableName"]]
+            current = table.items.get(table._key(request.get("Item") or request["Key"]))
+            ok = check_condition(current, request.get("ConditionExpression"))
+            reasons.append({"Code": "None" if ok else "ConditionalCheckFailed"})
+        if any(r["Code"] != "None" for r in reasons):
+            raise ClientError(
+                {"Error": {"Code": "TransactionCanceledException", "Message": "Transaction cancelled"},
+                 "CancellationReasons": reasons},
+                "TransactWriteItems",
+            )
+
+        for entry in TransactItems:
+            (action, request), = entry.items()
+            table = self.tables[request["TableName"]]
+            if action == "Put":
+                table.put_item(Item=request["Item"])
+            elif action == "Delete":
+                table.delete_item(Key=request["Key"])
+            else:
+                table.update_item(
+                    Key=request["Key"],
+                    UpdateExpression=request["UpdateExpression"],
+                    ExpressionAttributeValues=request.get("ExpressionAttributeValues"),
+                )
+
+
+class FakeScheduler:
+    """write_batch applied in place; before_write hooks run ahead of each batch."""
+
+    def __init__(self):
+        self.before_write = []
+
+    def write_batch(self, table: FakeTable, puts=(), delete_keys=()):
+        if self.before_write:
+            self.before_write.pop(0)()
+        for item in puts:
+            table.put_item(Item=item)
+        for key in delete_keys:
+            table.delete_item(Key=key)
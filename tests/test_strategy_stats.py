@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip("boto3")
+
+from services import strategy_stats
+from tests.fakes import FakeClient, FakeScheduler, FakeTable, fake_query_all
+
+
+@pytest.fixture
+def tables(monkeypatch):
+    tables = {
+        "trades": FakeTable("UserPositionTrades", ("user_id", "position_id")),
+        "stats": FakeTable("UserStrategyStats", ("user_id", "strategy_id")),
+        "points": FakeTable("UserStrategyPoints", ("user_id", "point_id")),
+        "onboarding": FakeTable("UserOnboarding", ("user_id",)),
+    }
+    scheduler = FakeScheduler()
+    client = FakeClient(*tables.values())
+    monkeypatch.setattr(strategy_stats, "get_trades_table", lambda: tables["trades"])
+    monkeypatch.setattr(strategy_stats, "get_strategy_stats_table", lambda: tables["stats"])
+    monkeypatch.setattr(strategy_stats, "get_strategy_points_table", lambda: tables["points"])
+    monkeypatch.setattr(strategy_stats, "get_onboarding_table", lambda: tables["onboarding"])
+    monkeypatch.setattr(strategy_stats, "get_dynamodb_client", lambda: client)
+    monkeypatch.setattr(strategy_stats, "get_write_scheduler", lambda: scheduler)
+    monkeypatch.setattr(strategy_stats, "query_all", fake_query_all)
+    tables["onboarding"].put_item(Item={"user_id": "u1"})
+    tables["scheduler"] = scheduler
+    return tables
+
+
+def _trade(position_id, pnl, tags):
+    return {
+        "user_id": "u1",
+        "position_id": position_id,
+        "timestamp": 1700000000 + position_id,
+        "pnl": Decimal(str(pnl)),
+        "r_multiple": Decimal("1"),
+        "tags": tags,
+    }
+
+
+def _tag_trade(tables, position_id, tags):
+    # What the tag routes do: update the row, then move the stats
+    old = tables["trades"].get(user_id="u1", position_id=position_id)
+    new = {**old, "tags": tags}
+    tables["trades"].put_item(Item=new)
+    strategy_stats.apply_trade_change("u1", old, new)
+
+
+def test_edit_during_rebuild_is_not_lost(tables):
+    tables["trades"].put_item(Item=_trade(1, 10, ["strategy#s1"]))
+    tables["trades"].put_item(Item=_trade(2, -5, ["strategy#s1"]))
+    tables["trades"].put_item(Item=_trade(3, 7, ["unreviewed"]))
+
+    # Trade 3 joins s1 after the rebuild's snapshot, just before it writes
+    tables["scheduler"].before_write.append(lambda: _tag_trade(tables, 3, ["strategy#s1"]))
+    assert strategy_stats.rebuild_strategy_stats("u1") == 1
+
+    row = tables["stats"].get(user_id="u1", strategy_id="s1")
+    assert (row["trades"], row["wins"], row["losses"], row["pnl"]) == (3, 2, 1, Decimal("12"))
+    assert {item["point_id"] for item in tables["points"].items.values()} == {"s1#1", "s1#2", "s1#3"}
+
+
+def test_rebuild_gives_up_when_edits_keep_landing(tables):
+    tables["trades"].put_item(Item=_trade(1, 10, ["strategy#s1"]))
+    for tags in (["strategy#s2"], ["strategy#s1"], ["strategy#s2"]):
+        # One edit per attempt, each before that attempt's first write
+        tables["scheduler"].before_write.extend([lambda tags=tags: _tag_trade(tables, 1, tags), lambda: None])
+
+    with pytest.raises(RuntimeError):
+        strategy_stats.rebuild_strategy_stats("u1")
+
+
+def test_repeated_move_is_counted_once(tables):
+    trade = _trade(1, 10, ["strategy#s1"])
+    strategy_stats.apply_trade_change("u1", None, trade)
+    strategy_stats.apply_trade_change("u1", None, trade)
+
+    assert tables["stats"].get(user_id="u1", strategy_id="s1")["trades"] == 1
+    assert strategy_stats.load_strategy_points("u1", "s1") == [[1700000001, Decimal("10")]]
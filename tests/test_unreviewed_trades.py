@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("boto3")
+
+from services import unreviewed_trades
+from tests.fakes import FakeTable
+
+
+@pytest.fixture
+def onboarding(monkeypatch):
+    table = FakeTable("UserOnboarding", ("user_id",))
+    table.put_item(Item={"user_id": "u1", "broker_linked": True})
+    monkeypatch.setattr(unreviewed_trades, "get_onboarding_table", lambda: table)
+    return table
+
+
+def test_edit_before_seed_does_not_create_counter(onboarding, monkeypatch):
+    # A tag edit before the first sync must not leave a negative counter
+    # behind, or the sync would take it as already seeded
+    unreviewed_trades.adjust_unreviewed_count("u1", -1)
+    assert "unreviewed_count" not in onboarding.get(user_id="u1")
+
+    monkeypatch.setattr(unreviewed_trades, "count_unreviewed_trades", lambda user_id: 4)
+    assert unreviewed_trades.seed_unreviewed_count("u1") == 4
+    assert onboarding.get(user_id="u1")["unreviewed_count"] == 4
+
+
+def test_edits_adjust_a_seeded_counter(onboarding, monkeypatch):
+    monkeypatch.setattr(unreviewed_trades, "count_unreviewed_trades", lambda user_id: 4)
+    unreviewed_trades.seed_unreviewed_count("u1")
+
+    unreviewed_trades.adjust_unreviewed_count("u1", -1)
+    assert onboarding.get(user_id="u1")["unreviewed_count"] == 3
+
+
+def test_seed_keeps_an_existing_counter(onboarding, monkeypatch):
+    onboarding.update_item(
+        Key={"user_id": "u1"},
+        UpdateExpression="SET unreviewed_count = :c",
+        ExpressionAttributeValues={":c": 2},
+    )
+    monkeypatch.setattr(unreviewed_trades, "count_unreviewed_trades", lambda user_id: 9)
+
+    unreviewed_trades.seed_unreviewed_count("u1")
+    assert onboarding.get(user_id="u1")["unreviewed_count"] == 2